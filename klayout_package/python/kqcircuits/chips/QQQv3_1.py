@@ -185,6 +185,7 @@ class ChipQQQv31(Chip):
             protection=self.cell.begin_shapes_rec(self.get_layer("ground_grid_avoidance", face_id)),
             grid_step=16 * (1 / self.layout.dbu),
             grid_size=2 * (1 / self.layout.dbu),
+            hierarchical=self.hierarchical_grid,
         )
 
     def build(self):
@@ -71,6 +71,7 @@ class Chip(Element):
     gnd_grid_faces = Param(
         pdt.TypeList, "Faces on which the grid is generated, [-1] is all, [] is None", [-1], hidden=True
     )
+    hierarchical_grid = Param(pdt.TypeBoolean, "Make ground grid as cell instance arrays instead of shapes", False)
     merge_base_metal_gap = Param(pdt.TypeBoolean, "Merge grid and other gaps into base_metal_gap layer", False)
     a_capped = Param(
         pdt.TypeDouble,
@@ -254,6 +255,7 @@ class Chip(Element):
             protection=self.cell.begin_shapes_rec(self.get_layer("ground_grid_avoidance", face_id)),
             grid_step=10 * (1 / self.layout.dbu),
             grid_size=5 * (1 / self.layout.dbu),
+            hierarchical=self.hierarchical_grid,
         )
 
     def produce_frame(self, frame_parameters, trans=pya.DTrans()):
@@ -347,11 +349,14 @@ class Chip(Element):
     def insert_filtered_elements(self, element_cell, shape_layers, filter_regions, locations, rotation=0):
         """Inserts elements into given locations filtered by filter_regions.
 
+        The elements are inserted as regular instance arrays, one for each run of equally spaced locations on a row.
+        No reference points or instance names are added for the elements.
+
         Args:
             element_cell: pya.Cell specifying the element to be repeated in the grid
             shape_layers: tuple (layer_name, face) specifying the shape layers on the element_cell
             filter_regions: dict with distances as keys and filtering regions as values
-            locations: list of grid element locations as DPoints
+            locations: grid element locations as numpy array of shape (N, 2) or as list of DPoints
             rotation: element rotation in degrees
 
         Returns:
@@ -364,7 +369,11 @@ class Chip(Element):
         shape.transform(pya.ICplxTrans(1, rotation, False, 0, 0))
 
         # Filter locations
-        locations_itype = [pya.Vector(pos.to_itype(self.layout.dbu)) for pos in locations]
+        if not isinstance(locations, numpy.ndarray):
+            locations = [[pos.x, pos.y] for pos in locations]
+        locations = numpy.asarray(locations, dtype=float).reshape(-1, 2) / self.layout.dbu
+        locations = numpy.trunc(locations + numpy.copysign(0.5, locations)).astype(numpy.int64)  # round as KLayout
+        locations_itype = [pya.Vector(x, y) for x, y in locations.tolist()]
         for distance, filter_region in filter_regions.items():
             # Create expanded shape polygon
             shape_polygons = list(shape.sized(distance / self.layout.dbu).merged().each())
@@ -383,10 +392,14 @@ class Chip(Element):
             locations_itype = [p.bbox().center() - shape_center for p in pass_region]
 
         # Insert elements into filtered locations
-        passed_locations = [pos.to_dtype(self.layout.dbu) for pos in locations_itype]
-        for passed_location in passed_locations:
-            self.insert_cell(element_cell, pya.DCplxTrans(1, rotation, False, passed_location))
-        return passed_locations
+        for start, step, count in _equally_spaced_runs(locations_itype):
+            trans = pya.ICplxTrans(1, rotation, False, start)
+            if count == 1:
+                self.cell.insert(pya.CellInstArray(element_cell.cell_index(), trans))
+            else:
+                step_x = pya.Vector(step, 0)
+                self.cell.insert(pya.CellInstArray(element_cell.cell_index(), trans, step_x, pya.Vector(), count, 1))
+        return [pos.to_dtype(self.layout.dbu) for pos in locations_itype]
 
     def get_ground_bump_locations(self, bump_box):
         """
@@ -668,11 +681,11 @@ class Chip(Element):
         y_neg = int((box.height() / 2 + y0) / delta_y)
         y_pos = int((box.height() / 2 - y0) / delta_y)
 
-        locations = []
-        for i in numpy.linspace(-x_neg, x_pos, x_neg + x_pos + 1):
-            for j in numpy.linspace(-y_neg, y_pos, y_neg + y_pos + 1):
-                locations.append(box.center() + pya.DPoint(x0 + i * delta_x, y0 + j * delta_y))
-        return locations
+        center = box.center()
+        xs = center.x + (x0 + numpy.arange(-x_neg, x_pos + 1) * delta_x)
+        ys = center.y + (y0 + numpy.arange(-y_neg, y_pos + 1) * delta_y)
+        grid = numpy.stack(numpy.meshgrid(xs, ys, indexing="ij"), axis=-1).reshape(-1, 2)
+        return [pya.DPoint(x, y) for x, y in grid.tolist()]
 
     def get_ground_tsv_locations(self, tsv_box):
         """
@@ -681,7 +694,7 @@ class Chip(Element):
         Args:
             box: DBox specifying the region that should be filled with TSVs
 
-        Returns: list of DPoint coordinates where a ground bump can be placed
+        Returns: list of DPoint coordinates where a ground TSVs will be placed
         """
         return self.make_grid_locations(tsv_box, delta_x=self.tsv_grid_spacing, delta_y=self.tsv_grid_spacing)
 
@@ -738,3 +751,32 @@ class Chip(Element):
             f"totalling {existing_tsv_count + len(tsv_locations)} TSVs."
         )
         return tsv_locations
+
+
+def _equally_spaced_runs(positions):
+    """Groups positions into runs of equally spaced positions along rows of equal y-coordinate.
+
+    Args:
+        positions: list of pya.Vector
+
+    Returns:
+        list of tuples ``(start, step, count)``, where ``start`` is pya.Vector of the first position of the run,
+        ``step`` is the x-distance between consecutive positions, and ``count`` is the number of positions in the run
+    """
+    rows = {}
+    for pos in positions:
+        rows.setdefault(pos.y, []).append(pos.x)
+    runs = []
+    for y, xs in rows.items():
+        xs.sort()
+        x_start, step, count = xs[0], 0, 1
+        for x in xs[1:]:
+            if count == 1 and x > x_start:
+                step, count = x - x_start, 2
+            elif step > 0 and x == x_start + count * step:
+                count += 1
+            else:
+                runs.append((pya.Vector(x_start, y), step, count))
+                x_start, step, count = x, 0, 1
+        runs.append((pya.Vector(x_start, y), step, count))
+    return runs
@@ -21,16 +21,21 @@
 """Configuration file for KQCircuits.
 
 Defines values for things such as default layers, paths, and default sub-element types.
+
+Importing this module has no side effects. The values that need the filesystem, i.e. ``TMP_PATH``,
+``ANSYS_EXECUTABLE``, ``STARTUPINFO`` and the layer configuration values loaded from ``layer_config_path``, are computed
+on first access. Accessing ``TMP_PATH`` creates the directory.
 """
+
 import os
 import subprocess
 from pathlib import Path
+from types import ModuleType
 
 from kqcircuits.pya_resolver import pya
 from kqcircuits.util.defaults_helper import find_ansys_executable
 from kqcircuits.util.import_helper import module_from_file
 
-
 _kqcircuits_path = Path(os.path.dirname(os.path.realpath(__file__)))
 # workaround for Windows because os.path.realpath doesn't work there before Python 3.8
 if os.name == "nt" and os.path.islink(Path(__file__).parent):
@@ -42,20 +47,17 @@ ROOT_PATH = Path(os.getenv("KQC_ROOT_PATH", os.getcwd()))  # "current dir" or se
 if _kqcircuits_path.parts[-3] == "klayout_package":  # developer setup
     ROOT_PATH = _kqcircuits_path.parents[2]
 
-TMP_PATH = Path(os.getenv("KQC_TMP_PATH", str(ROOT_PATH.joinpath("tmp"))))  # specify alternative tmp directory
+_tmp_path_value = Path(os.getenv("KQC_TMP_PATH", str(ROOT_PATH.joinpath("tmp"))))  # specify alternative tmp directory
 _py_path = ROOT_PATH.joinpath("klayout_package/python")
 
 if _kqcircuits_path.parts[-4] == "salt":  # KQC Salt package
     ROOT_PATH = _kqcircuits_path.parents[1]
     _py_path = ROOT_PATH.joinpath("python")
-    TMP_PATH = _kqcircuits_path.parents[3].joinpath("python/tmp")  # local tmp dir for salt package
+    _tmp_path_value = _kqcircuits_path.parents[3].joinpath("python/tmp")  # local tmp dir for salt package
 
 SCRIPTS_PATH = _py_path.joinpath("scripts")
 DRC_PATH = _py_path.joinpath("drc")
 
-TMP_PATH.mkdir(parents=True, exist_ok=True)  # TODO move elsewhere?
-
-ANSYS_EXECUTABLE = find_ansys_executable(r"%PROGRAMFILES%\AnsysEM\v241\Win64\ansysedt.exe")
 ANSYS_SCRIPT_PATHS = [
     SCRIPTS_PATH.joinpath("simulations").joinpath("ansys"),
     SCRIPTS_PATH.joinpath("simulations").joinpath("post_process"),
@@ -75,12 +77,6 @@ KQC_REMOTE_TMP_PATH = os.getenv("KQC_REMOTE_TMP_PATH", "~/KQCircuits/tmp")
 # Remote account for slurm
 KQC_REMOTE_ACCOUNT = os.getenv("KQC_REMOTE_ACCOUNT")
 
-# Given to subprocess.Popen calls, hides terminals on Windows
-STARTUPINFO = None
-if os.name == "nt":
-    STARTUPINFO = subprocess.STARTUPINFO()
-    STARTUPINFO.dwFlags |= subprocess.STARTF_USESHOWWINDOW
-
 # printed to corners of all chips and top of all masks
 # could be for example "IQM" or "A!"
 default_brand = "NIST"
@@ -218,38 +214,95 @@ excluded_module_names = ()
 # Path to the layer configuration file, which defines layer/face related defaults.
 # The path can be either absolute or relative.
 # layer_config_path = Path(__file__).parent / "layer_config" / "default_layer_config.py"
-layer_config_path = Path(__file__).parent/"layer_config"/"ZP_layer_config.py"
+layer_config_path = Path(__file__).parent / "layer_config" / "ZP_layer_config.py"
 
-# Load layer/face related defaults from the layer config file
-
-layer_config_module = module_from_file(layer_config_path)
+# Layer/face related defaults, loaded from the layer config file on first access
 # pya layer information
-default_layers = layer_config_module.default_layers
+default_layers: dict
 # default_faces[face_id] contains the face dictionary for the face determined by face_id.
 #
 # Each face dictionary should contain:
 #   - key "id" with value face_id (string)
 #   - for all the available layers in that face: key "Layer_name", value pya.LayerInfo object for that layer
-default_faces = layer_config_module.default_faces
+default_faces: dict
 # face_id of the face that is used by default in some contexts
-default_face_id = layer_config_module.default_face_id
+default_face_id: str
 # Layer names (without face prefix) for layers exported as individual .oas files during mask layout export
-default_mask_export_layers = layer_config_module.default_mask_export_layers
+default_mask_export_layers: list
 # Layer names (without face prefix) with mask label postfix for mask label and mask covered region creation
-default_layers_to_mask = layer_config_module.default_layers_to_mask
+default_layers_to_mask: dict
 # Layer names (without face prefix) in `layers_to_mask` for which mask covered region is not created
-default_covered_region_excluded_layers = layer_config_module.default_covered_region_excluded_layers
+default_covered_region_excluded_layers: list
 # Layer names (without face prefix) for layers exported as bitmap files during full mask layout export (does not
 # apply to individual pixels)
-mask_bitmap_export_layers = layer_config_module.mask_bitmap_export_layers
+mask_bitmap_export_layers: list
 # Layers to hide when exporting a bitmap with "all" layers
-all_layers_bitmap_hide_layers = layer_config_module.all_layers_bitmap_hide_layers
+all_layers_bitmap_hide_layers: list
 # Layer clusters used for exporting only certain layers together in the same file, when exporting individual chips
 # during mask layout export (dict with items `cluster name: LayerCluster`)
-chip_export_layer_clusters = layer_config_module.chip_export_layer_clusters
+chip_export_layer_clusters: dict
 # Default layers to use for calculating cell path lengths with get_cell_path_length()
-default_path_length_layers = layer_config_module.default_path_length_layers
+default_path_length_layers: list
 # Default mask parameters for each face (dict with items `face_id: parameters`)
-default_mask_parameters = layer_config_module.default_mask_parameters
+default_mask_parameters: dict
 # Path to layer properties file
-default_layer_props = layer_config_module.default_layer_props
+default_layer_props: str
+
+_LAYER_CONFIG_NAMES = (
+    "default_layers",
+    "default_faces",
+    "default_face_id",
+    "default_mask_export_layers",
+    "default_layers_to_mask",
+    "default_covered_region_excluded_layers",
+    "mask_bitmap_export_layers",
+    "all_layers_bitmap_hide_layers",
+    "chip_export_layer_clusters",
+    "default_path_length_layers",
+    "default_mask_parameters",
+    "default_layer_props",
+)
+
+# Values computed on first access
+TMP_PATH: Path  # tmp directory, created on first access
+ANSYS_EXECUTABLE: str
+STARTUPINFO: "subprocess.STARTUPINFO | None"  # Given to subprocess.Popen calls, hides terminals on Windows
+layer_config_module: ModuleType
+
+
+def _tmp_path():
+    _tmp_path_value.mkdir(parents=True, exist_ok=True)
+    return _tmp_path_value
+
+
+def _startupinfo():
+    if os.name != "nt":
+        return None
+    startupinfo = subprocess.STARTUPINFO()
+    startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
+    return startupinfo
+
+
+_LAZY_VALUES = {
+    "TMP_PATH": _tmp_path,
+    "ANSYS_EXECUTABLE": lambda: find_ansys_executable(r"%PROGRAMFILES%\AnsysEM\v241\Win64\ansysedt.exe"),
+    "STARTUPINFO": _startupinfo,
+    "layer_config_module": lambda: module_from_file(layer_config_path),
+}
+
+
+def __getattr__(name):
+    """Computes the lazy values on first access and stores them as module attributes."""
+    if name in _LAZY_VALUES:
+        value = _LAZY_VALUES[name]()
+    elif name in _LAYER_CONFIG_NAMES:
+        # module globals are not looked up through __getattr__, so call it explicitly
+        value = getattr(globals().get("layer_config_module") or __getattr__("layer_config_module"), name)
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted({*globals(), *_LAZY_VALUES, *_LAYER_CONFIG_NAMES})
@@ -25,7 +25,7 @@ from kqcircuits.defaults import default_layers, default_faces
 from kqcircuits.pya_resolver import pya
 from kqcircuits.simulations.epr.gui_config import epr_gui_visualised_partition_regions
 from kqcircuits.util.geometry_helper import get_cell_path_length
-from kqcircuits.util.library_helper import load_libraries, to_library_name, to_module_name
+from kqcircuits.util.library_helper import get_pcell_declaration, load_libraries, to_library_name, to_module_name
 from kqcircuits.util.parameters import Param, pdt
 from kqcircuits.util.refpoints import Refpoints
 
@@ -247,15 +247,16 @@ class Element(pya.PCellDeclarationHelper):
             tuple of the cell instance and a boolean indicating code generated cell
         """
 
-        library_layout = (load_libraries(path=cls.LIBRARY_PATH)[cls.LIBRARY_NAME]).layout()
+        library_layout = (load_libraries(path=cls.LIBRARY_PATH, lazy=True)[cls.LIBRARY_NAME]).layout()
 
         if subtype is None:  # derive type from the class name
             subtype = to_library_name(cls.__name__)
 
         cl = cls._get_abstract()
 
-        if subtype in library_layout.pcell_names():  # code generated
-            pcell_class = type(library_layout.pcell_declaration(subtype))
+        pcell_declaration = get_pcell_declaration(cls.LIBRARY_NAME, subtype)
+        if pcell_declaration is not None:  # code generated
+            pcell_class = type(pcell_declaration)
             return Element._create_cell(pcell_class, layout, library, **parameters), True
         elif library_layout.cell(subtype):  # manually designed
             return layout.create_cell(subtype, cl.LIBRARY_NAME), False
@@ -365,9 +366,10 @@ class Element(pya.PCellDeclarationHelper):
                 mod_type = f"{to_module_name(cls.__name__)}_type"
                 subtype = parameters[mod_type] if mod_type in parameters else getattr(self, mod_type, "")
                 if subtype:
-                    library_layout = (load_libraries(path=cls.LIBRARY_PATH)[cls.LIBRARY_NAME]).layout()
-                    if subtype in library_layout.pcell_names():
-                        cls = type(library_layout.pcell_declaration(subtype))
+                    load_libraries(path=cls.LIBRARY_PATH, lazy=True)
+                    pcell_declaration = get_pcell_declaration(cls.LIBRARY_NAME, subtype)
+                    if pcell_declaration is not None:
+                        cls = type(pcell_declaration)
             keys = list(set(cls.get_schema().keys()) & set(keys))
 
         p = {k: self.__getattribute__(k) for k in keys if k != "refpoints"}  # pylint: disable=unnecessary-dunder-call
@@ -523,9 +525,11 @@ class Element(pya.PCellDeclarationHelper):
         """
         cell_library_name = to_library_name(elem_cls.__name__)
         if elem_cls.LIBRARY_NAME == library:  # Matthias' workaround: https://github.com/KLayout/klayout/issues/905
+            get_pcell_declaration(library, cell_library_name)
             return layout.create_cell(cell_library_name, parameters)
         else:
-            load_libraries(path=elem_cls.LIBRARY_PATH)
+            load_libraries(path=elem_cls.LIBRARY_PATH, lazy=True)
+            get_pcell_declaration(elem_cls.LIBRARY_NAME, cell_library_name)
             return layout.create_cell(cell_library_name, elem_cls.LIBRARY_NAME, parameters)
 
     @classmethod
@@ -18,7 +18,6 @@
 
 
 from math import pi, cos, sin, tan, atan, atan2, degrees, sqrt
-from scipy.optimize import brentq
 from kqcircuits.util.parameters import add_parameters_from
 from kqcircuits.elements.waveguide_coplanar_straight import WaveguideCoplanarStraight
 
@@ -124,6 +123,8 @@ class Meander(Element):
             if target_increment >= min_90deg_increment:  # if all meander bends are 90 degrees
                 width = 4 * self.r + (target_increment - min_90deg_increment) / self.meanders
             else:  # computation of meander width is not trivial, so we need to use root finding algorithm
+                from scipy.optimize import brentq  # pylint: disable=import-outside-toplevel
+
                 width = brentq(lambda w: meander_length_increment(w) - target_increment, 0.0, 4 * self.r)
 
             l_rest = l_direct / 2 - self.r * self.meanders  # distance to first corner
@@ -756,26 +756,21 @@ def produce_fixed_length_bend(element, target_len, point_a, point_a_corner, poin
     """
 
     def objective(x):
-        return (
-            _length_of_var_length_bend(
-                element.layout,
-                element.LIBRARY_NAME,
-                x,
-                point_a,
-                point_a_corner,
-                point_b,
-                point_b_corner,
-                bridges,
-                element.r,
-            )
-            - target_len
-        )
+        return _length_of_var_length_bend(x, point_a, point_a_corner, point_b, point_b_corner, element.r) - target_len
 
     try:
-        # floods the database with PCell variants :(
+        # the root is solved using an analytic length model, so that only the final waveguide cell is created
         root = root_scalar(objective, bracket=(element.r, target_len / 2))
         cell = _var_length_bend(
-            element.layout, element.LIBRARY_NAME, root.root, point_a, point_a_corner, point_b, point_b_corner, bridges
+            element.layout,
+            element.LIBRARY_NAME,
+            root.root,
+            point_a,
+            point_a_corner,
+            point_b,
+            point_b_corner,
+            bridges,
+            element.r,
         )
         inst, _ = element.insert_cell(cell)
     except ValueError as e:
@@ -786,17 +781,21 @@ def produce_fixed_length_bend(element, target_len, point_a, point_a_corner, poin
     return inst
 
 
-def _length_of_var_length_bend(
-    layout, library, corner_dist, point_a, point_a_corner, point_b, point_b_corner, bridges, r
-):
+def _length_of_var_length_bend(corner_dist, point_a, point_a_corner, point_b, point_b_corner, r):
+    """Returns the length of the waveguide created by ``_var_length_bend`` without creating it.
+
+    The waveguide consists of three straights and two corner arcs of radius ``r``. Airbridges do not affect the length.
+    """
     # This function shouldn't raise exception, so we have to manually test if waveguide doesn't fit.
     # These tests do not cover all cases, but are enough in most cases
     point_a_shift = point_shift_along_vector(point_a, point_a_corner, corner_dist)
     point_b_shift = point_shift_along_vector(point_b, point_b_corner, corner_dist)
     v1, v2, alpha1, alpha2, _ = WaveguideCoplanar.get_corner_data(point_a, point_a_shift, point_b_shift, r)
     _, v3, _, alpha3, _ = WaveguideCoplanar.get_corner_data(point_a_shift, point_b_shift, point_b, r)
-    cut_dist1 = r * tan((pi - abs(pi - abs(alpha2 - alpha1))) / 2)
-    cut_dist2 = r * tan((pi - abs(pi - abs(alpha3 - alpha2))) / 2)
+    turn1 = pi - abs(pi - abs(alpha2 - alpha1))
+    turn2 = pi - abs(pi - abs(alpha3 - alpha2))
+    cut_dist1 = r * tan(turn1 / 2)
+    cut_dist2 = r * tan(turn2 / 2)
     if v1.length() < cut_dist1 or v3.length() < cut_dist2:
         return -1e30  # straight doesn't fit at the ends -> corner_dist is probably too short
     if v2.length() < cut_dist1 + cut_dist2:
@@ -806,15 +805,15 @@ def _length_of_var_length_bend(
     if b_crosses_a and a_crosses_b:
         return 1e30  # waveguide is crossing itself -> corner_dist is probably too large
 
-    # Create waveguide and measure it's length
-    cell = _var_length_bend(layout, library, corner_dist, point_a, point_a_corner, point_b, point_b_corner, bridges)
-    return get_cell_path_length(cell)
+    straights = v1.length() + v2.length() + v3.length() - 2 * (cut_dist1 + cut_dist2)
+    return straights + r * (turn1 + turn2)
 
 
-def _var_length_bend(layout, library, corner_dist, point_a, point_a_corner, point_b, point_b_corner, bridges):
+def _var_length_bend(layout, library, corner_dist, point_a, point_a_corner, point_b, point_b_corner, bridges, r):
     cell = WaveguideComposite.create(
         layout,
         library,
+        r=r,
         nodes=[
             Node(point_a, ab_across=bridges.endswith("ends")),
             Node(point_shift_along_vector(point_a, point_a_corner, corner_dist)),
@@ -0,0 +1,249 @@
+# This code is part of KQCircuits
+# Copyright (C) 2025 IQM Finland Oy
+#
+# This program is free software: you can redistribute it and/or modify it under the terms of the GNU General Public
+# License as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+# warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with this program. If not, see
+# https://www.gnu.org/licenses/gpl-3.0.html.
+#
+# The software distribution should follow IQM trademark policy for open-source software
+# (meetiqm.com/iqm-open-source-trademark-policy). IQM welcomes contributions to the code.
+# Please see our contribution agreements for individuals (meetiqm.com/iqm-individual-contributor-license-agreement)
+# and organizations (meetiqm.com/iqm-organization-contributor-license-agreement).
+
+"""Content-addressed cache for chips built by ``MaskSet.add_chip``.
+
+A chip variant is identified by a hash of everything that affects its exported files: the source code of the chip
+class module and of all ``kqcircuits`` and own package modules it transitively imports, the source code of all library
+PCell modules, the source code of the chip export modules, the layer configuration, the chip parameters and the mask set
+options passed to ``MaskSet._create_chip``. The hash is stored next to the exported chip files in
+``Chips/<variant>/<variant>.cache.json``. If the hash of a later run matches, the chip files are reused as they are.
+Chips whose class source code cannot be found are not cached.
+"""
+
+import ast
+import hashlib
+import importlib.util
+import json
+import logging
+import sys
+from functools import lru_cache
+from inspect import isclass
+from pathlib import Path
+
+from kqcircuits import defaults
+from kqcircuits.util.export_helper import get_klayout_version
+from kqcircuits.util.geometry_json_encoder import GeometryJsonEncoder
+from kqcircuits.util.library_helper import get_library_module_names
+
+# Bump this if the format of the exported chip files changes in a way that is not visible in the source code hashes
+CHIP_CACHE_VERSION = 1
+
+# Extra parameters of ``MaskSet`` which do not affect the exported chip files
+_IGNORED_EXTRA_PARAMS = ("enable_debug", "no_cache")
+
+
+class _CacheKeyEncoder(GeometryJsonEncoder):
+    """JSON encoder for cache keys. Objects not handled by ``GeometryJsonEncoder`` are encoded by their string."""
+
+    def default(self, o):
+        try:
+            return super().default(o)
+        except TypeError:
+            return str(o)
+
+
+def _hash_file(path):
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def _imported_module_names(tree, module_name, is_package):
+    """Yields names of the kqcircuits modules imported in the given module syntax tree."""
+    package = module_name if is_package else module_name.rpartition(".")[0]
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                yield alias.name
+        elif isinstance(node, ast.ImportFrom):
+            if node.level > 0:
+                base = package.rsplit(".", node.level - 1)[0] if node.level > 1 else package
+                base = f"{base}.{node.module}" if node.module else base
+            else:
+                base = node.module
+            yield base
+            # ``from package import module`` imports a submodule
+            for alias in node.names:
+                yield f"{base}.{alias.name}"
+
+
+def _find_source(module_name):
+    """Returns (source path, is_package) of a module, or (None, False) if the module has no Python source."""
+    if module_name == "__main__":
+        # the spec of a script run as ``__main__`` is None, but its source is the script file
+        main_file = getattr(sys.modules.get("__main__"), "__file__", None)
+        return (Path(main_file), False) if main_file and main_file.endswith(".py") else (None, False)
+    try:
+        spec = importlib.util.find_spec(module_name)
+    except (ImportError, ValueError):
+        return None, False
+    if spec is None or spec.origin is None or not spec.origin.endswith(".py"):
+        return None, False
+    return Path(spec.origin), spec.submodule_search_locations is not None
+
+
+@lru_cache(maxsize=None)
+def module_source_hashes(module_name):
+    """Returns hashes of the source files of a module and of the modules it transitively imports.
+
+    The followed imports are the ``kqcircuits`` modules and the modules of the same top-level package as
+    ``module_name``. For a script run as ``__main__``, the modules next to the script are followed instead.
+
+    Args:
+        module_name: full name of the module, e.g. ``kqcircuits.chips.demo``
+
+    Returns:
+        dictionary ``{module name: sha256 of the module source}`` sorted by module name
+    """
+    packages = {"kqcircuits", module_name.partition(".")[0]}
+    main_path, _ = _find_source("__main__") if module_name == "__main__" else (None, False)
+
+    def _is_followed(imported):
+        top_level = imported.partition(".")[0]
+        if top_level in packages:
+            return True
+        if main_path is None:
+            return False
+        path, is_package = _find_source(top_level)
+        return path is not None and (path.parents[1] if is_package else path.parent) == main_path.parent
+
+    hashes = {}
+    stack = [module_name]
+    while stack:
+        name = stack.pop()
+        if name in hashes:
+            continue
+        path, is_package = _find_source(name)
+        if path is None:
+            continue
+        hashes[name] = _hash_file(path)
+        with open(path, "rb") as f:
+            tree = ast.parse(f.read(), filename=str(path))
+        for imported in _imported_module_names(tree, name, is_package):
+            if _is_followed(imported):
+                stack.append(imported)
+    return dict(sorted(hashes.items()))
+
+
+@lru_cache(maxsize=None)
+def pcell_source_hashes():
+    """Returns hashes of the source files of all library PCell modules and of the ``kqcircuits`` modules they import.
+
+    Elements may create PCells by name, e.g. airbridge and flip chip connector types, so a chip can depend on PCell
+    modules which it does not import.
+
+    Returns:
+        dictionary ``{module name: sha256 of the module source}`` sorted by module name
+    """
+    hashes = {}
+    for module_name in get_library_module_names():
+        hashes.update(module_source_hashes(module_name))
+    return dict(sorted(hashes.items()))
+
+
+def chip_cache_key(chip, name, with_grid, export_drc, extra_params):
+    """Returns a hash identifying the files exported by ``MaskSet._create_chip`` for the given arguments.
+
+    Args:
+        chip: tuple ``(chip_class, variant_name, parameters)`` where parameters are optional, as in ``add_chip``.
+              ``chip_class`` may also be a path to a static layout file.
+        name: name of the mask set
+        with_grid: Boolean determining if ground grid is generated
+        export_drc: DRC script name used for the chip DRC report
+        extra_params: ``MaskSet._extra_params`` dictionary
+
+    Returns:
+        hexadecimal sha256 digest string, or None if the source code of the chip class is not found
+    """
+    chip_class, variant_name, *chip_params = chip
+    chip_params = chip_params[0] if chip_params else {}
+
+    if isclass(chip_class):
+        modules = module_source_hashes(chip_class.__module__)
+        if chip_class.__module__ not in modules:
+            logging.warning(f"Source code of {chip_class.__qualname__} not found, the chip is always rebuilt")
+            return None
+        source = {"class": f"{chip_class.__module__}.{chip_class.__qualname__}", "modules": modules}
+    else:
+        source = {"file": _hash_file(chip_class)}
+
+    key_data = {
+        "version": CHIP_CACHE_VERSION,
+        "klayout": get_klayout_version(),
+        "source": source,
+        "pcell_source": pcell_source_hashes(),
+        "export_source": module_source_hashes("kqcircuits.masks.mask_set"),
+        "layer_config": _hash_file(defaults.layer_config_path),
+        "variant": variant_name,
+        "name": name,
+        "with_grid": with_grid,
+        "export_drc": export_drc,
+        "parameters": chip_params,
+        "extra_params": {k: v for k, v in extra_params.items() if k not in _IGNORED_EXTRA_PARAMS},
+    }
+    key_json = json.dumps(key_data, cls=_CacheKeyEncoder, sort_keys=True)
+    return hashlib.sha256(key_json.encode("utf-8")).hexdigest()
+
+
+def _cache_file(chip_path, variant_name):
+    return Path(chip_path) / f"{variant_name}.cache.json"
+
+
+def load_cached_chip(chip_path, variant_name, key):
+    """Returns the path of the cached chip .oas file if the cache of the variant matches key, otherwise None.
+
+    Args:
+        chip_path: directory of the exported chip files, ``Chips/<variant>``
+        variant_name: name of the chip variant
+        key: cache key from ``chip_cache_key``
+    """
+    cache_file = _cache_file(chip_path, variant_name)
+    if not cache_file.exists():
+        return None
+    try:
+        with open(cache_file, "r", encoding="utf-8") as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        logging.warning(f"Ignoring unreadable chip cache file {cache_file}")
+        return None
+    if cache.get("key") != key:
+        return None
+    if not all((Path(chip_path) / file_name).exists() for file_name in cache.get("files", [])):
+        return None
+    return str(Path(chip_path) / f"{variant_name}.oas")
+
+
+def save_chip_cache(chip_path, variant_name, key):
+    """Writes the cache file of a freshly exported chip variant.
+
+    The names of all files in ``chip_path`` are recorded, so that the cache is invalidated if any of them is removed.
+
+    Args:
+        chip_path: directory of the exported chip files, ``Chips/<variant>``
+        variant_name: name of the chip variant
+        key: cache key from ``chip_cache_key``
+    """
+    cache_file = _cache_file(chip_path, variant_name)
+    files = sorted(p.name for p in Path(chip_path).iterdir() if p.is_file() and p != cache_file)
+    with open(cache_file, "w", encoding="utf-8") as f:
+        json.dump({"key": key, "files": files}, f, indent=4)
+
+
+def clear_chip_cache(chip_path, variant_name):
+    """Removes the cache file of a chip variant, if it exists."""
+    _cache_file(chip_path, variant_name).unlink(missing_ok=True)
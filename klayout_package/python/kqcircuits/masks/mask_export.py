@@ -17,35 +17,47 @@
 # and organizations (meetiqm.com/iqm-organization-contributor-license-agreement).
 
 """Functions for exporting mask sets."""
+
 import json
 import os
+import sys
 from math import pi
+from multiprocessing import get_all_start_methods, get_context
+from time import perf_counter
 
 import logging
 
+from tqdm import tqdm
+
 from kqcircuits.chips.chip import Chip
 from kqcircuits.defaults import (
+    default_bar_format,
     mask_bitmap_export_layers,
     chip_export_layer_clusters,
     default_layers,
     default_mask_parameters,
 )
 from kqcircuits.elements.flip_chip_connectors.flip_chip_connector_dc import FlipChipConnectorDc
+from kqcircuits.junctions import junction_type_choices
 from kqcircuits.klayout_view import resolve_default_layer_info
 from kqcircuits.pya_resolver import pya
-from kqcircuits.util.area import get_area_and_density
-from kqcircuits.util.count_instances import count_instances_in_cell
+from kqcircuits.util.area import get_area_and_density, export_density_maps
 from kqcircuits.util.geometry_helper import circle_polygon
 from kqcircuits.util.geometry_json_encoder import GeometryJsonEncoder
+from kqcircuits.util.hierarchy_statistics import HierarchyStatistics
 from kqcircuits.util.load_save_layout import save_layout
 from kqcircuits.util.netlist_extraction import export_cell_netlist
 from kqcircuits.util.export_helper import export_drc_report
 from kqcircuits.util.replace_junctions import (
     extract_junctions,
     get_tuned_junction_json,
-    check_static_cell_has_junctions,
 )
 
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
 
 def export_mask_set(mask_set, skip_extras=False):
     """Exports the designs, bitmap and documentation for the mask_set."""
@@ -72,8 +84,14 @@ def export_chip(
     alt_netlists=None,
     skip_extras=False,
     export_chip_layer_clusters=False,
+    density_map_tile_size=2000,
 ):
-    """Exports a chip used in a maskset."""
+    """Exports a chip used in a maskset.
+
+    Unless ``skip_extras`` is set, per-tile area and density maps of all layers are exported to
+    ``{chip_name}_density_map.npz`` with tiles of ``density_map_tile_size`` um, together with density heatmap images of
+    the ``base_metal_gap`` layers.
+    """
 
     is_pcell = chip_cell.pcell_declaration() is not None
 
@@ -84,6 +102,9 @@ def export_chip(
     else:
         chip_class, chip_params = None, None
 
+    # junction check and bump count are computed from the same single pass over the chip hierarchy
+    hierarchy_stats = None if skip_extras else HierarchyStatistics(chip_cell)
+
     # export .oas file with pcells (requires exporting a cell one hierarchy level above chip pcell)
     dummy_cell = layout.create_cell(chip_name)
     dummy_cell.insert(pya.DCellInstArray(chip_cell.cell_index(), pya.DTrans()))
@@ -92,7 +113,7 @@ def export_chip(
         if is_pcell:
             # Export junctions if chip is PCell
             export_junction_parameters(dummy_cell, chip_dir / f"{chip_name}_junction_parameters.json")
-        elif check_static_cell_has_junctions(dummy_cell):
+        elif hierarchy_stats.contains_cell_class(chip_cell, junction_type_choices):
             # Write empty file if static chip but it has junctions
             with open(chip_dir / f"{chip_name}_junction_parameters.json", "w", encoding="utf-8") as file:
                 file.write(json.dumps({}, indent=2))
@@ -108,14 +129,21 @@ def export_chip(
         # export netlist
         export_cell_netlist(static_cell, chip_dir / f"{chip_name}-netlist.json", chip_cell, alt_netlists)
         # calculate flip-chip bump count
-        bump_count = count_instances_in_cell(chip_cell, FlipChipConnectorDc)
+        bump_count = hierarchy_stats.count_instances(chip_cell, FlipChipConnectorDc)
         # find layer areas and densities
-        for layer, values in get_area_and_density(static_cell, None, True).items():
-            if values["area"] != 0.0:
-                layer_areas_and_densities[layer] = {
-                    "area": f"{values['area']:.2f}",
-                    "density": f"{values['density'] * 100:.2f}",
-                }
+        area_data = get_area_and_density(static_cell, None, True, density_map_tile_size, density_map=True)
+        area_data = {layer: values for layer, values in area_data.items() if values["area"] != 0.0}
+        export_density_maps(
+            area_data,
+            chip_dir / f"{chip_name}_density_map",
+            [layer for layer in area_data if layer.endswith("base_metal_gap")],
+            density_map_tile_size,
+        )
+        for layer, values in area_data.items():
+            layer_areas_and_densities[layer] = {
+                "area": f"{values['area']:.2f}",
+                "density": f"{values['density'] * 100:.2f}",
+            }
 
         if export_chip_layer_clusters:
             print(f"{chip_name} - Exporting chip layer clusters")
@@ -179,15 +207,22 @@ def export_masks_of_face(export_dir, mask_layout, mask_set):
     path = export_dir_for_face / f"{get_mask_layout_full_name(mask_set, mask_layout)}.oas"
     _export_cell(path, mask_layout.top_cell, "all")
     # export .oas files for individual optical lithography layers
-    for layer_name in mask_layout.mask_export_layers:
-        export_mask(export_dir_for_face, layer_name, mask_layout, mask_set)
+    export_mask_layers(export_dir_for_face, mask_layout, mask_set, _get_mask_export_cpus(mask_set))
 
     # Find area and density for the layers defined in mask_layout.mask_export_density_layers
     layer_infos = [
         resolve_default_layer_info(layer_name, mask_layout.face_id)
         for layer_name in mask_layout.mask_export_density_layers
     ]
-    area_data = get_area_and_density(mask_layout.top_cell, layer_infos)
+    area_data = get_area_and_density(
+        mask_layout.top_cell, layer_infos, tile_size=mask_layout.mask_export_tile_size, density_map=True
+    )
+    if area_data:
+        export_density_maps(
+            area_data,
+            export_dir_for_face / f"{subdir_name_for_face}_density_map",
+            tile_size=mask_layout.mask_export_tile_size,
+        )
 
     wafer_area = pi * mask_layout.wafer_rad**2  # Use circular wafer area instead of rectangular bounding boxes
     layer_areas_and_densities = {
@@ -202,7 +237,122 @@ def export_masks_of_face(export_dir, mask_layout, mask_set):
         json.dump(mask_json, f, cls=GeometryJsonEncoder, sort_keys=True, indent=4)
 
 
-def export_mask(export_dir, layer_name, mask_layout, mask_set):
+def _get_mask_export_cpus(mask_set):
+    """Returns the number of processes used for exporting mask layers, limited by the ``-c`` switch of the mask set."""
+    if mask_set._single_process:
+        return 1
+    return mask_set._cpu_override if mask_set._cpu_override > 0 else os.cpu_count()
+
+
+# Arguments of ``export_mask`` shared with the forked processes of ``export_mask_layers``
+_forked_export_args = None
+
+
+def _export_mask_in_forked_process(layer_name):
+    export_dir, mask_layout, mask_set, threads = _forked_export_args
+    export_mask(export_dir, layer_name, mask_layout, mask_set, threads)
+    return layer_name
+
+
+def export_mask_layers(export_dir, mask_layout, mask_set, cpus=1):
+    """Exports masks of all ``mask_layout.mask_export_layers``, possibly in parallel processes.
+
+    Parallel export forks the current process, so that every process has its own copy of the mask layout without
+    saving and reloading it. Each process then exports exactly the same files as the serial export would. If forking
+    is not supported by the platform, the layers are exported serially.
+
+    Args:
+        export_dir: directory for the files
+        mask_layout: MaskLayout object for the cell and face reference
+        mask_set: MaskSet object for the name and version attributes to be included in the filename
+        cpus: maximum number of parallel processes
+    """
+    global _forked_export_args  # pylint: disable=global-statement
+
+    layer_names = mask_layout.mask_export_layers
+    processes = min(cpus, len(layer_names))
+    if processes <= 1 or "fork" not in get_all_start_methods():
+        for layer_name in layer_names:
+            export_mask(export_dir, layer_name, mask_layout, mask_set, cpus)
+        return
+
+    _forked_export_args = (export_dir, mask_layout, mask_set, max(1, cpus // processes))
+    try:
+        with get_context("fork").Pool(processes) as pool:
+            for _ in tqdm(
+                pool.imap_unordered(_export_mask_in_forked_process, layer_names),
+                total=len(layer_names),
+                desc=f"Exporting mask layers of {mask_layout.face_id}{mask_layout.extra_id}",
+                bar_format=default_bar_format,
+            ):
+                pass
+    finally:
+        _forked_export_args = None
+
+
+def _peak_memory_usage():
+    """Returns the peak resident memory usage of this process in MB, or None if it is not available."""
+    if resource is None:
+        return None
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return max_rss / 1024**2 if sys.platform == "darwin" else max_rss / 1024  # bytes on macOS, kilobytes on Linux
+
+
+class _TileRegionReceiver(pya.TileOutputReceiver):
+    """Collects the output regions of :class:`TilingProcessor` by tile.
+
+    The tiles are processed in a nondeterministic order when several threads are used, so the regions are kept until
+    all tiles are done and then inserted in the order of the tile indices.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.tile_regions = {}
+
+    def put(self, ix, iy, tile, obj, dbu, clip):
+        """Function called by :class:`TilingProcessor` on output"""
+        # pylint: disable=unused-argument
+        self.tile_regions.setdefault((ix, iy), []).append(obj.dup())
+
+    def insert_into(self, shapes):
+        """Inserts the collected regions into ``shapes`` in the order of the tile indices."""
+        for key in sorted(self.tile_regions):
+            for region in self.tile_regions[key]:
+                shapes.insert(region)
+
+
+def invert_layer_tiled(cell, input_layer, output_layer, wafer_rad, tile_size=2000, threads=1):
+    """Inserts the inverse of a layer within a circular wafer into another layer, one tile at a time.
+
+    Each tile computes the symmetric difference of the wafer disc and the input shapes within the tile, so the merged
+    region of the full wafer is never collected into memory. The output polygons are split at the tile boundaries,
+    where slanted edges are snapped to the database grid. The tile outputs are inserted in the order of the tiles, so
+    the result does not depend on the number of threads.
+
+    Args:
+        cell: cell containing the input shapes and receiving the output shapes
+        input_layer: layer index of the shapes to invert
+        output_layer: layer index where the inverted shapes are inserted, must be different from ``input_layer``
+        wafer_rad: radius of the wafer disc centered at origin
+        tile_size: side length of the square tiles in µm
+        threads: number of threads used for processing the tiles
+    """
+    layout = cell.layout()
+    disc = pya.Region(circle_polygon(wafer_rad).to_itype(layout.dbu))  # must stay alive until tp.execute()
+    tp = pya.TilingProcessor()
+    tp.dbu = layout.dbu
+    tp.threads = threads
+    tp.tile_size(tile_size, tile_size)
+    tp.input("layer", cell.begin_shapes_rec(input_layer))
+    tp.input("disc", disc)
+    receiver = _TileRegionReceiver()
+    tp.output("inverted", receiver)
+    tp.queue("_output(inverted, (disc & _tile) ^ (layer & _tile), false)")
+    tp.execute("Invert mask layer")
+    receiver.insert_into(cell.shapes(output_layer))
+
+
+def export_mask(export_dir, layer_name, mask_layout, mask_set, threads=1):
     """Exports a mask from a single layer of a single face of a mask set.
 
     Args:
@@ -212,7 +362,9 @@ def export_mask(export_dir, layer_name, mask_layout, mask_set):
            * Prefix ``^``: mirror the layer (left-right)
         mask_layout: MaskLayout object for the cell and face reference
         mask_set: MaskSet object for the name and version attributes to be included in the filename
+        threads: number of threads used for inverting the layer
     """
+    start_time = perf_counter()
     invert = False
     if layer_name.startswith("-"):
         layer_name = layer_name[1:]
@@ -229,29 +381,31 @@ def export_mask(export_dir, layer_name, mask_layout, mask_set):
     tmp_layer = layout.layer()
 
     if invert:
-        # TODO: collecting merged region of some layer and inverting it is slow,
-        # if it's a full wafer with ground grid. Consider some approach similar to mirror
-        wafer = pya.Region(cell_to_export.begin_shapes_rec(layer)).merged()
-        disc = pya.Region(circle_polygon(mask_layout.wafer_rad).to_itype(layout.dbu))
+        # Collecting merged region of a full wafer with ground grid is slow, so the layer is inverted in tiles
         layout.copy_layer(layer, tmp_layer)
         layout.clear_layer(layer)
-        cell_to_export.shapes(layer).insert(wafer ^ disc)
+        invert_layer_tiled(
+            cell_to_export, tmp_layer, layer, mask_layout.wafer_rad, mask_layout.mask_export_tile_size, threads
+        )
 
     if mirror:
         # Copying shapes to separate cell, then applying mirror transformation to
         # entire cell is faster than collecting merged region.
-        # Another option is to copy cell shapes into a separate temporary layout.
-        tmp_cell = layout.create_cell(mask_layout.top_cell.name)
+        # The cell is created in a separate temporary layout, so that the exported file does not depend on the cells
+        # created earlier in the mask layout. This keeps serial and parallel export bit-identical.
+        tmp_layout = pya.Layout()
+        tmp_layout.dbu = layout.dbu
+        tmp_cell = tmp_layout.create_cell(mask_layout.top_cell.name)
         cm = pya.CellMapping()
         cm.for_single_cell(tmp_cell, cell_to_export)
         lm = pya.LayerMapping()
-        lm.map(layer, layer)
+        lm.map(layer, tmp_layout.layer(layer_info))
 
         tmp_cell.copy_tree_shapes(cell_to_export, cm, lm)
         tmp_cell.transform(pya.Trans(2, True, 0, 0))
         cell_to_export = tmp_cell
 
-    layers_to_export = {layer_info.name: layer}
+    layers_to_export = {layer_info.name: cell_to_export.layout().layer(layer_info)}
     path = export_dir / (get_mask_layout_full_name(mask_set, mask_layout) + f"-{layer_info.name}.oas")
     _export_cell(path, cell_to_export, layers_to_export)
 
@@ -259,9 +413,12 @@ def export_mask(export_dir, layer_name, mask_layout, mask_set):
         layout.clear_layer(layer)
         layout.copy_layer(tmp_layer, layer)
     layout.delete_layer(tmp_layer)
-    if mirror:
-        # Delete temporary cell created for mirroring
-        layout.delete_cell(tmp_cell.cell_index())
+
+    peak_memory = _peak_memory_usage()
+    logging.info(
+        f"Exported mask layer {layer_info.name} in {perf_counter() - start_time:.1f} seconds"
+        + (f", peak memory usage {peak_memory:.0f} MB" if peak_memory is not None else "")
+    )
 
 
 def export_docs(mask_set, filename="Mask_Documentation.md"):
@@ -84,6 +84,8 @@ class MaskLayout:
         mask_export_layers: list of layer names (without face_ids) to be exported as individual mask `.oas` files
         mask_export_density_layers: list of layer names (without face_ids) for which we want to calculate the coverage
             density
+        mask_export_tile_size: side length of the tiles in µm used in mask export for inverting layers and for the
+            density maps of ``mask_export_density_layers`` (float)
         submasks: list of submasks, each element is a tuple (submask mask_layout, submask position)
         extra_id: extra string used to create unique name for mask layouts with the same face_id
         extra_chips: List of tuples (name, position, trans, position_label) for chips placed outside chips_map
@@ -144,6 +146,7 @@ class MaskLayout:
         )
         self.mask_export_layers = kwargs.get("mask_export_layers", default_mask_export_layers)
         self.mask_export_density_layers = kwargs.get("mask_export_density_layers", [])
+        self.mask_export_tile_size = kwargs.get("mask_export_tile_size", 2000)
         self.submasks = kwargs.get("submasks", [])
         self.extra_id = kwargs.get("extra_id", "")
         self.extra_chips = kwargs.get("extra_chips", [])
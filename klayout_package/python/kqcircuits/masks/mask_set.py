@@ -17,13 +17,14 @@
 # and organizations (meetiqm.com/iqm-organization-contributor-license-agreement).
 
 import copy
+import json
 import os
 import logging
 import sys
 from sys import argv
 from time import perf_counter
 from inspect import isclass
-from multiprocessing import Pool
+from multiprocessing import Pool, current_process
 from pathlib import Path
 
 from tqdm import tqdm
@@ -35,8 +36,26 @@ from kqcircuits.util.log_router import route_log
 from kqcircuits.pya_resolver import pya, is_standalone_session
 from kqcircuits.defaults import default_bar_format, TMP_PATH, default_face_id
 from kqcircuits.masks.mask_export import export_chip, export_mask_set
+from kqcircuits.masks.chip_cache import chip_cache_key, load_cached_chip, save_chip_cache, clear_chip_cache
 from kqcircuits.masks.mask_layout import MaskLayout
 from kqcircuits.klayout_view import KLayoutView
+from kqcircuits.util.library_helper import load_libraries
+
+# File in the mask set directory where the build times of the chip variants are recorded
+CHIP_BUILD_TIMES_FILE = "chip_build_times.json"
+
+
+def _main_module_objects(chips):
+    """Yields the classes and functions of ``__main__`` that are pickled by reference when sending chips to workers.
+
+    Args:
+        chips: list of tuples ``(chip_class, variant_name, parameters)`` as in ``MaskSet.add_chip``
+    """
+    for chip_class, _, *chip_params in chips:
+        for obj in [chip_class, *(chip_params[0].values() if chip_params else [])]:
+            obj = obj if hasattr(obj, "__qualname__") else type(obj)
+            if obj.__module__ == "__main__":
+                yield obj
 
 
 class MaskSet:
@@ -48,9 +67,21 @@ class MaskSet:
     add_chip(). These functions also export some files for each chip. Then call build() to create the
     cell hierarchy of the entire mask, and finally export mask files by calling export().
 
-    Chips are created in parallel in separate processes but the user may choose to use a ``-d`` switch on
-    the command line for debugging with a single process. It is also possible to manually limit the number of
-    concurrently used CPUs for resource management purposes with the ``-c 4`` switch (to 4 in this example).
+    Chips are created and mask layers are exported in parallel in separate processes but the user may choose to use a
+    ``-d`` switch on the command line for debugging with a single process. It is also possible to manually limit the
+    number of concurrently used CPUs for resource management purposes with the ``-c 4`` switch (to 4 in this example).
+
+    Exported chips are cached: if a chip variant with identical source code, parameters and mask set options was
+    already exported to the same directory, its files are reused instead of building the chip again. Use the
+    ``--no-cache`` switch on the command line to rebuild all chips.
+
+    The worker processes are kept alive over ``add_chip`` calls until ``export()`` or ``close_pool()`` is called. The
+    workers are forked at the first ``add_chip`` call and see the state of the script at that point. The pool is
+    restarted if later chips or their parameters use classes defined after that, but other changes, e.g. to
+    ``kqcircuits.defaults`` or to global variables of the script, should be made before the first ``add_chip``. Chips
+    are handed out to the workers one at a time, the slowest chip variants of previous runs first. Each chip is loaded
+    into the mask as soon as it and the chips before it are ready. The build time and worker of each chip variant are
+    recorded in ``chip_build_times.json`` in the mask set directory.
 
     Example:
         mask = MaskSet(...)
@@ -71,6 +102,7 @@ class MaskSet:
         mask_layouts: list of MaskLayout objects in this mask set
         mask_export_layers: list of names of the layers which are exported for each MaskLayout
         used_chips: similar to chips_map_legend, but only includes chips which are actually used in mask layouts
+        rebuilt_chips: names of the chip variants which were built in ``add_chip``, i.e. not loaded from cache
         export_path: The folder for mask files will be generated under this. TMP_PATH by default.
     """
 
@@ -104,6 +136,7 @@ class MaskSet:
         self.mask_layouts = []
         self.mask_export_layers = mask_export_layers if mask_export_layers is not None else []
         self.used_chips = {}
+        self.rebuilt_chips = []
         self.add_mask_name_to_chips = add_mask_name_to_chips
         self._extra_params = {}
         self._mask_set_dir = Path(export_path) / f"{name}_v{version}"
@@ -116,11 +149,18 @@ class MaskSet:
 
         self._extra_params["mock_chips"] = "-m" in argv
         self._extra_params["skip_extras"] = "-s" in argv
+        self._extra_params["no_cache"] = "--no-cache" in argv
 
         self._cpu_override = 0
         if "-c" in argv and len(argv) > argv.index("-c") + 1:
             self._cpu_override = int(argv[argv.index("-c") + 1])
 
+        self._pool = None
+        self._pool_size = 0
+        self._pool_main = {}  # contents of __main__ when the pool was created, inherited by the workers
+        self._build_times = {}  # build times of the chips built by this mask set, {variant: timing}
+        self._previous_build_times = self._load_build_times()
+
     def add_mask_layout(self, chips_map, face_id=default_face_id, mask_layout_type=MaskLayout, **kwargs):
         """Creates a mask layout from chips_map and adds it to self.mask_layouts.
 
@@ -194,6 +234,8 @@ class MaskSet:
         created for the chip containing only the layers defined per each non-empty LayerCluster
         defined in ``chip_export_layer_clusters``.
 
+        The ``density_map_tile_size`` chip parameter sets the tile size in µm of the exported layer density maps.
+
         Args:
             chip: A chip class. Or a list of tuples, like ``[(QualityFactor, "QDG", parameters),...]``,
                   parameters are optional.
@@ -213,21 +255,141 @@ class MaskSet:
         if self._cpu_override > 0:
             cpus = self._cpu_override
 
-        # Pool.map() needs all arguments packed into a single list
+        # reuse previously exported chips if nothing affecting them has changed
+        cache_keys = {}
+        cached_file_names = []
+        chips_to_build = []
+        for chip in chips:
+            variant = chip[1]
+            chip_path = self._mask_set_dir / "Chips" / f"{variant}"
+            cache_keys[variant] = chip_cache_key(chip, self.name, self.with_grid, self.export_drc, self._extra_params)
+            cached_file = None
+            if not self._extra_params["no_cache"] and cache_keys[variant] is not None:
+                cached_file = load_cached_chip(chip_path, variant, cache_keys[variant])
+            if cached_file is None:
+                clear_chip_cache(chip_path, variant)
+                chips_to_build.append(chip)
+            else:
+                cached_file_names.append((variant, cached_file))
+        if cached_file_names:
+            print(f"Reusing cached chip variant(s) {[variant for variant, _ in cached_file_names]}")
+
+        # Pool.imap_unordered() needs all arguments packed into a single list
         xargs = (self.name, self.with_grid, self._mask_set_dir, self.export_drc, self._extra_params)
-        chip_args = ((chip, xargs) for chip in chips)
-        file_names = []
-        print(f"Building chip variant(s) {[ch[1] for ch in chips]} using {cpus} process(es)")
-        if cpus == 1 or self._single_process:
+        chip_args = [(chip, xargs) for chip in self._longest_first(chips_to_build)]
+        results = []
+        if chips_to_build:
+            print(f"Building chip variant(s) {[ch[1] for ch in chips_to_build]} using {cpus} process(es)")
+            if cpus == 1 or self._single_process:
+                results = map(self._build_chip, chip_args)
+            else:
+                results = self._get_pool(cpus, chips_to_build).imap_unordered(self._build_chip, chip_args)
+
+        # import chip cells exported by the parallel processes into the mask, keeping the order of the given chips. Each
+        # chip is imported as soon as it and the chips before it are ready, while the workers keep building the rest.
+        variants = [ch[1] for ch in chips]
+        file_names = dict(cached_file_names)
+        loaded = 0
+        with tqdm(total=len(variants), desc="Add chips into mask", bar_format=default_bar_format) as progress:
+            for variant, file_name, timing in results:
+                if cache_keys[variant] is not None:
+                    save_chip_cache(self._mask_set_dir / "Chips" / f"{variant}", variant, cache_keys[variant])
+                self._build_times[variant] = timing
+                file_names[variant] = file_name
+                newly_loaded = self._load_ready_chips(variants, file_names, loaded)
+                progress.update(newly_loaded - loaded)
+                loaded = newly_loaded
+            progress.update(self._load_ready_chips(variants, file_names, loaded) - loaded)
+
+        self.rebuilt_chips += [ch[1] for ch in chips_to_build]
+        if chips_to_build:
+            self._save_build_times()
+
+    def _load_ready_chips(self, variants, file_names, loaded):
+        """Loads chips into the mask in the order of ``variants`` until the next chip is not in ``file_names`` yet.
 
-            file_names += map(self._create_chip, chip_args)
-        else:
-            with Pool(cpus) as pool:
-                file_names += pool.map(self._create_chip, chip_args)
+        Args:
+            variants: names of the chip variants in the order they are loaded
+            file_names: dictionary ``{variant: file name}`` of the chips that are ready to be loaded
+            loaded: number of chips at the start of ``variants`` that are already loaded
+
+        Returns:
+            number of chips at the start of ``variants`` that are loaded after this call
+        """
+        while loaded < len(variants) and variants[loaded] in file_names:
+            self._load_chip_into_mask(file_names[variants[loaded]], variants[loaded])
+            loaded += 1
+        return loaded
 
-        # import chip cells exported by the parallel processes into the mask
-        for variant, file_name in tqdm(file_names, desc="Add chips into mask", bar_format=default_bar_format):
-            self._load_chip_into_mask(file_name, variant)
+    def close_pool(self):
+        """Closes the worker processes used for building chips.
+
+        Called by ``export()``. A new pool is created if chips are added after this.
+        """
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+            self._pool_size = 0
+            self._pool_main = {}
+
+    def _get_pool(self, cpus, chips):
+        """Returns the worker pool for building the given chips.
+
+        A new pool is created if there is none of the given size, or if the chips refer to classes or functions of
+        ``__main__`` which the workers of the current pool did not inherit, i.e. ones defined or redefined after the
+        pool was created.
+        """
+        if self._pool_size != cpus or any(
+            self._pool_main.get(obj.__qualname__) is not obj for obj in _main_module_objects(chips)
+        ):
+            self.close_pool()
+        if self._pool is None:
+            # libraries loaded here are inherited by the forked workers and kept for all chips built by them
+            load_libraries(lazy=True)
+            self._pool = Pool(cpus)  # pylint: disable=consider-using-with
+            self._pool_size = cpus
+            self._pool_main = dict(vars(sys.modules["__main__"]))
+        return self._pool
+
+    def _longest_first(self, chips):
+        """Returns chips sorted by their build time in previous runs, longest first and unknown chip variants first."""
+        build_times = {**self._previous_build_times, **self._build_times}
+        return sorted(chips, key=lambda chip: -build_times.get(chip[1], {}).get("seconds", float("inf")))
+
+    def _load_build_times(self):
+        """Returns the chip variant build times recorded in the mask set directory by previous runs."""
+        try:
+            with open(self._mask_set_dir / CHIP_BUILD_TIMES_FILE, "r", encoding="utf-8") as f:
+                return json.load(f)["variants"]
+        except (OSError, ValueError, KeyError):
+            return {}
+
+    def _save_build_times(self):
+        """Writes the build times of chip variants and a per-worker summary of the chips built by this mask set.
+
+        Build times of chip variants which were not rebuilt are kept from the previous runs.
+        """
+        workers = {}
+        for variant, timing in self._build_times.items():
+            worker = workers.setdefault(timing["worker"], {"pid": timing["pid"], "variants": [], "seconds": 0.0})
+            worker["variants"].append(variant)
+            worker["seconds"] += timing["seconds"]
+        build_times = {
+            "variants": {**self._previous_build_times, **self._build_times},
+            "workers": workers,
+        }
+        with open(self._mask_set_dir / CHIP_BUILD_TIMES_FILE, "w", encoding="utf-8") as f:
+            json.dump(build_times, f, indent=4)
+
+    @staticmethod
+    def _build_chip(chip_arg):
+        """Create chip and return its variant name, file name and build timing, possibly in a separate process."""
+        start = perf_counter()
+        variant_name, file_name = MaskSet._create_chip(chip_arg)
+        process = current_process()
+        timing = {"seconds": perf_counter() - start, "worker": process.name, "pid": process.pid}
+        return variant_name, file_name, timing
 
     @staticmethod
     def _create_chip(chip_arg):
@@ -248,6 +410,7 @@ class MaskSet:
         mock_chip = _extra_params["mock_chips"] or chip_params.pop("mock_chip", False)
         skip_extras = _extra_params["skip_extras"]
         export_chip_layer_clusters = chip_params.pop("export_chip_layer_clusters", False)
+        density_map_tile_size = chip_params.pop("density_map_tile_size", 2000)
 
         view = KLayoutView()
         layout = view.layout
@@ -291,6 +454,7 @@ class MaskSet:
             alt_netlists=alt_netlists,
             skip_extras=skip_extras,
             export_chip_layer_clusters=export_chip_layer_clusters,
+            density_map_tile_size=density_map_tile_size,
         )
         view.close()
 
@@ -382,12 +546,15 @@ class MaskSet:
         Assumes that self.build() has been called before.
         """
         self._time["EXPORT"] = perf_counter()
+        self.close_pool()
 
         print("Exporting mask set...")
         export_mask_set(self, self._extra_params["skip_extras"])
 
         self._time["END"] = perf_counter()
 
+        print(f"Rebuilt chip variant(s): {self.rebuilt_chips}")
+
         def tdiff(a, b):  # get elapsed time from "a" to "b"
             return f"{self._time[b] - self._time[a]:.1f}s" if self._time[a] and self._time[b] else "n/a"
 
@@ -33,11 +33,13 @@ from kqcircuits.simulations.export.simulation_export import (
     copy_content_into_directory,
     get_post_process_command_lines,
     get_combined_parameters,
+    get_geometry_fingerprint,
     export_simulation_json,
 )
 from kqcircuits.simulations.export.simulation_validate import validate_simulation
 from kqcircuits.util.load_save_layout import save_layout
 from kqcircuits.util.export_helper import write_commit_reference_file
+from kqcircuits.util.geometry_json_encoder import GeometryJsonEncoder
 from kqcircuits.defaults import ELMER_SCRIPT_PATHS, KQC_REMOTE_ACCOUNT, SIM_SCRIPT_PATH
 from kqcircuits.simulations.simulation import Simulation
 from kqcircuits.simulations.cross_section_simulation import CrossSectionSimulation
@@ -362,7 +364,7 @@ def export_elmer_script(
         indep_mesh_scripts = []
         for i, json_filename in enumerate(json_filenames):
 
-            (simulation_name, mesh_name) = _get_from_json(json_filename, ["name", "mesh_name"])
+            simulation_name, mesh_name = _get_from_json(json_filename, ["name", "mesh_name"])
             python_run_cmd = f'{python_executable} -u "{execution_script}" "{Path(json_filename).relative_to(path)}"'
 
             def get_log_cmd(logfile_suffix, filename=simulation_name):
@@ -467,16 +469,8 @@ def export_elmer_script(
         if compile_elmer_modules:
             main_script_lines.append(elmer_compile_str)
 
-        if parallelize_workload:
-            export_kw = "export" if use_sh else "set"
-            main_script_lines.append(f"{export_kw} OMP_NUM_THREADS={workflow['elmer_n_threads']}\n")
-            main_script_lines.append(
-                f"{python_executable} {Path(script_folder) / 'simple_workload_manager.py'} {n_workers}"
-            )
-
-        dependent_sims = []
         for i, json_filename in enumerate(json_filenames):
-            (simulation_name, mesh_name) = _get_from_json(json_filename, ["name", "mesh_name"])
+            (simulation_name,) = _get_from_json(json_filename, ["name"])
             python_run_cmd = f'{python_executable} "{execution_script}" "{Path(json_filename).relative_to(path)}"'
 
             def get_log_cmd(logfile_suffix, filename=simulation_name):
@@ -504,13 +498,7 @@ def export_elmer_script(
             _write_script(script_filename, script_lines)
 
             script_path = Path(script_filename).relative_to(path)
-            if parallelize_workload:
-                script_cmd = f' "./{script_path}"' if use_sh else f" {script_path}"
-                if mesh_name == simulation_name:
-                    main_script_lines.append(script_cmd)
-                else:
-                    dependent_sims.append(script_cmd)
-            else:
+            if not parallelize_workload:
                 script_cmd = f'"./{script_path}"' if use_sh else f"call {script_path}"
                 main_script_lines += [
                     f'echo "Submitting the main script of simulation {i + 1}/{n_jsons}"\n',
@@ -518,11 +506,19 @@ def export_elmer_script(
                     f"{script_cmd}\n",
                 ]
 
-        if dependent_sims:
+        if parallelize_workload:
+            # Run the stages of all simulations as separate tasks, such that shared meshes are produced only once
+            # the json files are listed in a manifest file, since command lines of .bat files are limited to 8191 chars
+            n_cpus = n_workers * workflow["elmer_n_processes"] * workflow["elmer_n_threads"]
+            manifest_file = file_prefix + "_simulations.txt"
+            path.joinpath(manifest_file).write_text(
+                "".join(f"{Path(json_filename).relative_to(path)}\n" for json_filename in json_filenames),
+                encoding="utf-8",
+            )
             main_script_lines.append(
-                f"\n{python_executable} {Path(script_folder)/'simple_workload_manager.py'} {n_workers}"
+                f"{python_executable} {Path(script_folder) / 'dag_scheduler.py'} --cpus {n_cpus} "
+                f'--manifest "{manifest_file}"\n'
             )
-            main_script_lines += dependent_sims
 
         main_script_lines += [
             '\necho "--------------------------------------------"\n',
@@ -606,27 +602,29 @@ def export_elmer(
     ]
     sim_objects, sol_objects = list(zip(*simulations))
 
-    n_sim = len(simulations)
-    mesh_reuse_name = n_sim * [None]
-    for i in range(n_sim):
-        for j in range(i):
-            if (
-                sim_objects[i] == sim_objects[j]
-                and sol_objects[i].mesh_size == sol_objects[j].mesh_size
-                and sol_objects[i].mesh_optimizer == sol_objects[j].mesh_optimizer
-                and sol_objects[i].tool == sol_objects[j].tool
-            ):
-                mesh_reuse_name[i] = (
-                    mesh_reuse_name[j] if mesh_reuse_name[j] else (sim_objects[j].name + sol_objects[j].name)
-                )
-                break
-
+    # Simulations with equal geometry and mesh settings share a single mesh. The mesh is named after the first
+    # successfully exported simulation of each such group.
+    fingerprints = {}
+    mesh_owners = {}
+    n_reused = 0
     json_filenames = []
-    for simulation, solution, mesh_reuse in zip(sim_objects, sol_objects, mesh_reuse_name):
+    for simulation, solution in zip(sim_objects, sol_objects):
         validate_simulation(simulation, solution)
 
         try:
+            if id(simulation) not in fingerprints:
+                fingerprints[id(simulation)] = get_geometry_fingerprint(simulation)
+            mesh_key = json.dumps(
+                [fingerprints[id(simulation)], solution.mesh_size, solution.mesh_optimizer, solution.tool],
+                cls=GeometryJsonEncoder,
+                sort_keys=True,
+            )
+            mesh_reuse = mesh_owners.get(mesh_key)
             json_filenames.append(export_elmer_json(simulation, solution, path, workflow, mesh_reuse))
+            if mesh_reuse is None:
+                mesh_owners[mesh_key] = simulation.name + solution.name
+            else:
+                n_reused += 1
         except (IndexError, ValueError, Exception) as e:  # pylint: disable=broad-except
             if skip_errors:
                 logging.warning(
@@ -641,6 +639,12 @@ def export_elmer(
                     "geometry files."
                 ) from e
 
+    if json_filenames:
+        logging.info(
+            f"Mesh deduplication: {len(mesh_owners)} meshes for {len(json_filenames)} simulations "
+            f"({n_reused / len(json_filenames):.0%} of simulations reuse a mesh)"
+        )
+
     return export_elmer_script(
         json_filenames,
         path,
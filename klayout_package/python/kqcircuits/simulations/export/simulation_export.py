@@ -16,15 +16,21 @@
 # Please see our contribution agreements for individuals (meetiqm.com/iqm-individual-contributor-license-agreement)
 # and organizations (meetiqm.com/iqm-organization-contributor-license-agreement).
 
+import hashlib
 import logging
 import json
+import os
+import pickle
 from itertools import product
+from multiprocessing import Pool
 from pathlib import Path
 from shutil import copytree
 from typing import Sequence
 from scipy.stats import qmc
 import numpy as np
 
+from kqcircuits.pya_resolver import pya
+from kqcircuits.util.library_helper import load_libraries
 from kqcircuits.util.load_save_layout import save_layout
 from kqcircuits.util.geometry_json_encoder import GeometryJsonEncoder
 
@@ -88,6 +94,35 @@ def export_simulation_json(json_data, json_file_path):
         )
 
 
+def get_geometry_fingerprint(simulation):
+    """Return a hash that identifies the simulation geometry independently of the simulation name.
+
+    The hash covers the shapes and properties of all simulation layers (z-levels, materials, excitations, etc.), the
+    material dictionary, the ports, and the simulation box. Simulations with equal fingerprints produce equal meshes
+    when meshed with equal mesh settings.
+
+    Args:
+        simulation: Simulation or CrossSectionSimulation object
+
+    Returns:
+        hexadecimal sha256 digest string
+    """
+    sim_data = {k: v for k, v in simulation.get_simulation_data().items() if k != "simulation_name"}
+    layers = {}
+    for name, data in sim_data["layers"].items():
+        if "layer" in data:
+            region = pya.Region(simulation.cell.begin_shapes_rec(simulation.layout.layer(data["layer"], 0)))
+        else:
+            region = data.get("region", pya.Region())
+        layers[name] = {
+            **{k: v for k, v in data.items() if k not in ("layer", "region")},
+            "shapes": sorted(p.to_s() for p in region.merged().each()),
+        }
+    fingerprint_data = {**sim_data, "layers": layers, "dbu": simulation.layout.dbu}
+    fingerprint_json = json.dumps(fingerprint_data, cls=GeometryJsonEncoder, sort_keys=True)
+    return hashlib.sha256(fingerprint_json.encode("utf-8")).hexdigest()
+
+
 def export_simulation_oas(simulations, path: Path, file_prefix="simulation"):
     """
     Write single OASIS file containing all simulations in list.
@@ -115,9 +150,164 @@ def _join_flat_str(value):
         return str(value)  # convert any non-iterable to string
 
 
-def sweep_simulation(layout, sim_class, sim_parameters, sweeps):
-    """Create simulation sweep by varying one parameter at time. Return list of simulations."""
-    simulations = []
+def _build_simulation_in_process(args):
+    """Builds a simulation in a new layout, possibly in a separate process.
+
+    Returns:
+        tuple ``(oas, named_layers, library_cells, state)``, where ``oas`` is the simulation cell tree as OASIS bytes
+        with context info, ``named_layers`` is the list of names of layers without layer number, ``library_cells`` is
+        the list of keys of the library cells in the simulation in the order they were created and ``state`` is the
+        pickled attributes of the simulation object other than ``layout`` and ``cell``, or ``(None, None, None, None)``
+        if the attributes cannot be pickled
+    """
+    sim_class, parameters, dbu = args
+    layout = pya.Layout()
+    layout.dbu = dbu
+    simulation = sim_class(layout, **parameters)
+    try:
+        state = pickle.dumps({k: v for k, v in vars(simulation).items() if k not in ("layout", "cell")})
+    except (TypeError, AttributeError, pickle.PicklingError):
+        return None, None, None, None
+    options = pya.SaveLayoutOptions()
+    options.format = "OASIS"
+    options.write_context_info = True  # keep PCell variants, so that they can be shared with other simulations
+    options.clear_cells()
+    options.add_cell(simulation.cell.cell_index())
+    named_layers = [layout.get_info(i).name for i in layout.layer_indexes() if layout.get_info(i).is_named()]
+    keys = [_library_cell_key(layout.cell(i)) for i in sorted(simulation.cell.called_cells())]
+    return layout.write_bytes(options), named_layers, [key for key in keys if key is not None], state
+
+
+def _library_cell_key(cell):
+    """Returns a picklable key identifying a library cell or a PCell variant, or None if the cell is of neither kind."""
+    library = cell.library()
+    if library is None:
+        return None
+    if cell.is_pcell_variant():
+        return library.name(), cell.pcell_declaration().name(), str(sorted(cell.pcell_parameters_by_name().items()))
+    return library.name(), library.layout().cell(cell.library_cell_index()).name, ""
+
+
+def _create_library_cell(layout, source_cell):
+    """Creates the library cell or PCell variant of ``source_cell`` in ``layout``, or returns the existing one."""
+    library = source_cell.library()
+    if source_cell.is_pcell_variant():
+        name = source_cell.pcell_declaration().name()
+        return layout.create_cell(name, library.name(), source_cell.pcell_parameters_by_name())
+    return layout.create_cell(library.layout().cell(source_cell.library_cell_index()).name, library.name())
+
+
+def _load_built_simulation(layout, sim_class, oas, named_layers, library_cells, state):
+    """Copies a simulation built by ``_build_simulation_in_process`` into ``layout``.
+
+    OASIS assigns layer numbers to layers which only have a name, so such layers are mapped back by name. Library cells
+    and PCell variants are created in ``layout`` in the order they were created in the simulation, so that they get the
+    same names and are shared with the other simulations like in a sequential build.
+    """
+    tmp_layout = pya.Layout()
+    tmp_layout.read_bytes(oas)
+    simulation = sim_class.__new__(sim_class)
+    vars(simulation).update(pickle.loads(state))
+    simulation.layout = layout
+    simulation.cell = layout.create_cell(simulation.name)
+
+    source_cells = {}
+    for cell in tmp_layout.each_cell():
+        source_cells.setdefault(_library_cell_key(cell), cell)
+    cell_mapping = {}
+    for key in library_cells:
+        if key in source_cells:
+            cell_mapping[source_cells[key].cell_index()] = _create_library_cell(layout, source_cells[key]).cell_index()
+
+    layer_mapping = {}
+    for index in tmp_layout.layer_indexes():
+        info = tmp_layout.get_info(index)
+        layer_mapping[index] = layout.layer(pya.LayerInfo(info.name) if info.name in named_layers else info)
+    _copy_cell_tree(simulation.cell, tmp_layout.top_cell(), layer_mapping, cell_mapping)
+    return simulation
+
+
+def _copy_cell_tree(cell, source_cell, layer_mapping, cell_mapping):
+    """Copies shapes and instances of ``source_cell`` into ``cell`` of another layout.
+
+    Library cells and PCell variants are created in the target layout by name and parameters, other cells are copied
+    recursively.
+
+    Args:
+        cell: target cell
+        source_cell: cell to copy
+        layer_mapping: dictionary ``{source layer index: target layer index}``
+        cell_mapping: dictionary ``{source cell index: target cell index}`` of already copied cells, updated in place
+    """
+    layout, source_layout = cell.layout(), source_cell.layout()
+    for source_layer, layer in layer_mapping.items():
+        cell.shapes(layer).insert(source_cell.shapes(source_layer))
+    for inst in source_cell.each_inst():
+        if inst.cell_index not in cell_mapping:
+            child = source_layout.cell(inst.cell_index)
+            if _library_cell_key(child) is not None:
+                target = _create_library_cell(layout, child)
+            else:
+                target = layout.create_cell(child.name)
+                _copy_cell_tree(target, child, layer_mapping, cell_mapping)
+            cell_mapping[inst.cell_index] = target.cell_index()
+        cell_inst_array = inst.cell_inst
+        cell_inst_array.cell_index = cell_mapping[inst.cell_index]
+        if inst.has_prop_id():
+            cell.insert(cell_inst_array, layout.properties_id(source_layout.properties(inst.prop_id)))
+        else:
+            cell.insert(cell_inst_array)
+
+
+def build_simulations(layout, sim_class, parameter_list, cpus=1):
+    """Creates a simulation (or solution) for each set of parameters. Returns list of simulations.
+
+    With ``cpus > 1`` the simulations are built in a pool of processes, each in a layout of its own. The simulation
+    cells are then copied into ``layout`` in the order of ``parameter_list``, so that the cell hierarchy and cell names
+    are the same as in a sequential build. If the simulation class or parameters cannot be pickled, the simulations are
+    built sequentially. Simulations whose attributes cannot be pickled are built again in the current process.
+
+    Args:
+        layout: Layout for simulations, or None for creating solutions
+        sim_class: Simulation (or Solution) class
+        parameter_list: list of parameter dictionaries, one for each simulation
+        cpus: number of processes used for building the simulations. None to use ``os.cpu_count()``.
+
+    Returns:
+        A list of simulations
+    """
+    if layout is None:
+        return [sim_class(**parameters) for parameters in parameter_list]
+    cpus = min(cpus or os.cpu_count(), len(parameter_list))
+    if cpus > 1:
+        try:
+            pickle.dumps((sim_class, parameter_list))
+        except (TypeError, AttributeError, pickle.PicklingError):
+            logging.warning(f"Cannot pass {sim_class.__name__} to other processes, building simulations sequentially")
+            cpus = 1
+    if cpus <= 1:
+        return [sim_class(layout, **parameters) for parameters in parameter_list]
+
+    logging.info(f"Building {len(parameter_list)} simulations using {cpus} processes")
+    load_libraries()  # the libraries must be registered to restore PCell variants of the built simulations
+    with Pool(cpus) as pool:
+        built = pool.map(_build_simulation_in_process, [(sim_class, p, layout.dbu) for p in parameter_list])
+    return [
+        (
+            sim_class(layout, **parameters)
+            if state is None
+            else _load_built_simulation(layout, sim_class, oas, named_layers, library_cells, state)
+        )
+        for parameters, (oas, named_layers, library_cells, state) in zip(parameter_list, built)
+    ]
+
+
+def sweep_simulation(layout, sim_class, sim_parameters, sweeps, cpus=1):
+    """Create simulation sweep by varying one parameter at time. Return list of simulations.
+
+    The simulations are built using ``cpus`` processes, see ``build_simulations``.
+    """
+    parameter_list = []
     lengths = [len(l) for l in sweeps.values()]
     logging.info(f'Added simulations: {" + ".join([str(l) for l in lengths])} = {sum(lengths)}')
     for param in sweeps:
@@ -127,13 +317,16 @@ def sweep_simulation(layout, sim_class, sim_parameters, sweeps):
                 param: value,
                 "name": _join_flat_str((sim_parameters.get("name", ""), param, value)),
             }
-            simulations.append(sim_class(**parameters) if layout is None else sim_class(layout, **parameters))
-    return simulations
+            parameter_list.append(parameters)
+    return build_simulations(layout, sim_class, parameter_list, cpus)
+
 
+def cross_sweep_simulation(layout, sim_class, sim_parameters, sweeps, cpus=1):
+    """Create simulation sweep by cross-varying all parameters. Return list of simulations.
 
-def cross_sweep_simulation(layout, sim_class, sim_parameters, sweeps):
-    """Create simulation sweep by cross-varying all parameters. Return list of simulations."""
-    simulations = []
+    The simulations are built using ``cpus`` processes, see ``build_simulations``.
+    """
+    parameter_list = []
     keys = list(sweeps)
     sets = [list(prod) for prod in product(*sweeps.values())]
     logging.info(f'Added simulations: {" * ".join([str(len(l)) for l in sweeps.values()])} = {len(sets)}')
@@ -142,8 +335,8 @@ def cross_sweep_simulation(layout, sim_class, sim_parameters, sweeps):
         for i, key in enumerate(keys):
             parameters[key] = values[i]
         parameters["name"] = _join_flat_str((sim_parameters.get("name", ""), values))
-        simulations.append(sim_class(**parameters) if layout is None else sim_class(layout, **parameters))
-    return simulations
+        parameter_list.append(parameters)
+    return build_simulations(layout, sim_class, parameter_list, cpus)
 
 
 def sweep_solution(sol_class, sol_parameters, sweeps):
@@ -251,7 +444,7 @@ def latin_hypercube_sampling_mixed_dtypes(
     return samples
 
 
-def combine_sweep_simulation(layout, sim_class, sim_parameters, keys, samples):
+def combine_sweep_simulation(layout, sim_class, sim_parameters, keys, samples, cpus=1):
     """Creates a simulation sweep from created samples. Returns a list of simulations.
     Args:
         layout: Layout for simulation
@@ -259,15 +452,16 @@ def combine_sweep_simulation(layout, sim_class, sim_parameters, keys, samples):
         sim_parameters: Simulation parameters which are not in the sweep
         keys: List of parameter names corresponding to samples
         samples: List of samples for sweep parameters
+        cpus: Number of processes used for building the simulations, see ``build_simulations``
     Returns:
         A list of simulations
     """
     assert len(samples[0]) == len(keys), "Samples don't have same dimension as keys"
-    simulations = []
+    parameter_list = []
     for values in samples:
         parameters = {**sim_parameters}
         for i, key in enumerate(keys):
             parameters[key] = values[i]
         parameters["name"] = _join_flat_str((sim_parameters.get("name", ""), values))
-        simulations.append(sim_class(**parameters) if layout is None else sim_class(layout, **parameters))
-    return simulations
+        parameter_list.append(parameters)
+    return build_simulations(layout, sim_class, parameter_list, cpus)
@@ -42,7 +42,6 @@ from kqcircuits.util.groundgrid import make_ground_grid_region
 from kqcircuits.junctions.sim import Sim
 from kqcircuits.util.library_helper import load_libraries
 
-
 simulation_layer_dict = {}
 
 load_libraries()  # allows parameter overrides from defaults.py
@@ -587,17 +586,19 @@ class Simulation:
         This function should be called before `produce_layers`.
         """
 
-        def are_connected(part1, part2):
-            """Return True only if part1 and part2 are connected."""
-            for n1, r1 in part1.items():
-                l1 = self.layers[n1]
-                for n2, r2 in part2.items():
-                    if n1 == n2:
-                        continue
-                    l2 = self.layers[n2]
-                    if l1["bottom"] <= l2["top"] and l2["bottom"] <= l1["top"] and not r1.interacting(r2).is_empty():
-                        return True
-            return False
+        def are_connected(n1, r1, n2, r2):
+            """Return True only if region r1 of layer n1 and region r2 of layer n2 are connected."""
+            if n1 == n2:
+                return False
+            l1, l2 = self.layers[n1], self.layers[n2]
+            return l1["bottom"] <= l2["top"] and l2["bottom"] <= l1["top"] and not r1.interacting(r2).is_empty()
+
+        def find_root(i):
+            """Return the representative polygon index of the connected set containing polygon i."""
+            while roots[i] != i:
+                roots[i] = roots[roots[i]]
+                i = roots[i]
+            return i
 
         def merge_parts(part1, part2):
             """Merge part1 into part2 and clear part1."""
@@ -619,16 +620,34 @@ class Simulation:
                         return p
             return {}
 
-        # create individual part for each metal polygon
+        # create individual region for each metal polygon
         metal_names = [n for n, l in self.layers.items() if self.is_metal(l.get("material"))]
-        parts = [{n: pya.Region(p)} for n in metal_names for p in self.layers[n]["region"].each()]
-
-        # combine connected parts
-        for i in range(1, len(parts)):
-            for j in range(i):
-                if are_connected(parts[i], parts[j]):
-                    merge_parts(parts[j], parts[i])
-        parts = [p for p in parts if p]
+        polygons = [(n, pya.Region(p)) for n in metal_names for p in self.layers[n]["region"].each()]
+        boxes = [r.bbox() for _, r in polygons]
+
+        # combine connected polygons using union-find. Candidate pairs are found by sweeping the bounding boxes in
+        # x-direction, and the exact interaction is checked only for bounding boxes that overlap.
+        roots = list(range(len(polygons)))
+        active = []
+        for i in sorted(range(len(polygons)), key=lambda k: boxes[k].left):
+            box = boxes[i]
+            active = [j for j in active if boxes[j].right >= box.left]
+            for j in active:
+                if boxes[j].bottom <= box.top and box.bottom <= boxes[j].top:
+                    root_i, root_j = find_root(i), find_root(j)
+                    if root_i != root_j and are_connected(*polygons[i], *polygons[j]):
+                        roots[min(root_i, root_j)] = max(root_i, root_j)
+            active.append(i)
+
+        # collect parts such that each part contains the polygons of one connected set
+        part_by_root = {}
+        for i, (n, r) in enumerate(polygons):
+            part = part_by_root.setdefault(find_root(i), {})
+            if n in part:
+                part[n].insert(r)
+            else:
+                part[n] = r
+        parts = [part_by_root[k] for k in sorted(part_by_root)]
 
         # assign excitation to parts
         ports = sorted(self.ports, key=lambda p: p.number) if self.use_ports else []
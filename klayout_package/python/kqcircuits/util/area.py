@@ -16,28 +16,39 @@
 # Please see our contribution agreements for individuals (meetiqm.com/iqm-individual-contributor-license-agreement)
 # and organizations (meetiqm.com/iqm-organization-contributor-license-agreement).
 import logging
+from math import ceil, floor
 from os import cpu_count
 from time import perf_counter
 
-from kqcircuits.pya_resolver import pya
-from kqcircuits.defaults import default_faces
+import numpy as np
+
+from kqcircuits.pya_resolver import pya, lay
+from kqcircuits.defaults import default_faces, default_png_dimensions
 
 
 class AreaReceiver(pya.TileOutputReceiver):
-    """Class for handling and storing output from :class:`TilingProcessor`"""
+    """Class for handling and storing output from :class:`TilingProcessor`
+
+    The total area is accumulated over all tiles and the area of each tile is stored in ``tile_areas``.
+    """
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.area = 0.0
+        self.tile_areas = {}
 
     def put(self, ix, iy, tile, obj, dbu, clip):
         """Function called by :class:`TilingProcessor` on output"""
         # pylint: disable=unused-argument
         logging.debug(f"Area for tile {ix},{iy}: {obj} ({dbu})")
-        self.area = obj * (dbu * dbu)  # report as um^2
+        area = obj * (dbu * dbu)  # report as um^2
+        self.tile_areas[(ix, iy)] = area
+        self.area += area
 
 
-def get_area_and_density(cell: pya.Cell, layer_infos=None, optimize_ground_grid_calculations=True):
+def get_area_and_density(
+    cell: pya.Cell, layer_infos=None, optimize_ground_grid_calculations=True, tile_size=2000, density_map=False
+):
     """Get total area and density :math:`\\rho=\\frac{area}{bbox.area}` of all layers.
 
     This calculation is slow for geometries with many polygons, and in practice the layers containing ground grid
@@ -46,13 +57,22 @@ def get_area_and_density(cell: pya.Cell, layer_infos=None, optimize_ground_grid_
     (which they should be by definition). Further, the area of ``base_metal_gap`` is calculated by combining the areas
     of ``base_metal_gap_wo_grid`` and ``ground_grid`` areas.
 
+    The area is calculated in square tiles starting from the lower left corner of the cell bounding box. If
+    ``density_map`` is ``True``, the per-tile results are returned as well. In the optimized ground grid calculation,
+    each grid polygon is assigned to the tile containing its center.
+
     Args:
         cell: target cell to get area from
         layer_infos: list of ``LayerInfo`` to get area for, or None to get area for all layers.
         optimize_ground_grid_calculations:  ``True`` (default) to optimize ground grid area calculations.
+        tile_size: side length of the tiles in um
+        density_map: ``True`` to include per-tile area and density arrays in the results
 
     Returns: dictionary ``{layer_name: {'area': area, 'density': density}}``, where ``area`` is in um^2 and ``density``
-       is a fraction < 1.
+       is a fraction < 1. If ``density_map`` is ``True``, each value also contains arrays ``area_map`` and
+       ``density_map`` of shape ``(number of tile rows, number of tile columns)``, where the first row is at the bottom
+       of the cell. The density of the tiles at the top and right edges is relative to their area inside the cell
+       bounding box.
     """
     start_time = perf_counter()
     layout = cell.layout()
@@ -62,15 +82,51 @@ def get_area_and_density(cell: pya.Cell, layer_infos=None, optimize_ground_grid_
         layer_infos = all_layer_infos.values()
     layer_infos = set(layer_infos)
 
+    # Fixed tile grid covering the cell, so that the tiles of all layers and the ground grid bins match
+    cell_bbox = cell.dbbox()
+    tile_origin = cell_bbox.p1 if not cell_bbox.empty() else pya.DPoint(0, 0)
+    tiles_x = max(1, ceil(cell_bbox.width() / tile_size)) if not cell_bbox.empty() else 1
+    tiles_y = max(1, ceil(cell_bbox.height() / tile_size)) if not cell_bbox.empty() else 1
+
+    def _tile_lengths(start, end, count):
+        """Lengths of the tiles along one axis, clipped to the cell bounding box"""
+        if cell_bbox.empty():
+            return np.full(count, float(tile_size))
+        return np.clip(end - (start + tile_size * np.arange(count)), 0.0, tile_size)
+
+    tile_areas = np.outer(
+        _tile_lengths(tile_origin.y, cell_bbox.top, tiles_y), _tile_lengths(tile_origin.x, cell_bbox.right, tiles_x)
+    )
+
+    def _bbox_area(layer_info):
+        return cell.bbox_per_layer(layout.layer(layer_info)).area() * layout.dbu**2
+
+    def _to_map(tile_areas):
+        area_map = np.zeros((tiles_y, tiles_x))
+        for (ix, iy), area in tile_areas.items():
+            area_map[iy, ix] += area
+        return area_map
+
     def _grid_area_and_density(layer_info):
-        """Calculate the area and density for a layer where all shapes are known to be identical"""
-        shapes = list(cell.begin_shapes_rec(layout.layer(layer_info)).each())
-        shape_count = len(shapes)
-        shape_area = shapes[0].shape().area() if shape_count > 0 else 0
+        """Calculate the area, density and area map for a layer where all shapes are known to be identical"""
+        shape_count, shape_area, centers = 0, 0, []
+        for it in cell.begin_shapes_rec(layout.layer(layer_info)).each():
+            if shape_count == 0:
+                shape_area = it.shape().area()
+            shape_count += 1
+            if density_map:
+                centers.append(it.shape().bbox().transformed(it.trans()).center())
         area = shape_count * float(shape_area)
         bbox_area = cell.bbox_per_layer(layout.layer(layer_info)).area()
         density = area / bbox_area if bbox_area != 0.0 else 0.0
-        return area * layout.dbu**2, density
+        area_map = None
+        if density_map:
+            area_map = np.zeros((tiles_y, tiles_x))
+            if shape_count > 0:
+                ix = [min(tiles_x - 1, max(0, floor((c.x * layout.dbu - tile_origin.x) / tile_size))) for c in centers]
+                iy = [min(tiles_y - 1, max(0, floor((c.y * layout.dbu - tile_origin.y) / tile_size))) for c in centers]
+                np.add.at(area_map, (iy, ix), shape_area * layout.dbu**2)
+        return area * layout.dbu**2, density, area_map
 
     # Separate out `ground_grid` and `base_metal_gap` layers in `layer_infos` for optimization
     ground_grid_faces = set()
@@ -95,26 +151,29 @@ def get_area_and_density(cell: pya.Cell, layer_infos=None, optimize_ground_grid_
 
     # Perform tiled area calculation for all other layers
     tp = pya.TilingProcessor()
+    tp.dbu = layout.dbu
     tp.threads = cpu_count()
-    tp.tile_size = (2000, 2000)  # microns
+    tp.tile_size(tile_size, tile_size)  # microns
+    tp.tile_origin(tile_origin.x, tile_origin.y)
+    tp.tiles(tiles_x, tiles_y)
     layer_areas = [AreaReceiver() for _ in layer_infos]
-    layer_bboxes = [AreaReceiver() for _ in layer_infos]
-    for layer_info, area_receiver, bbox_receiver in zip(layer_infos, layer_areas, layer_bboxes):
+    for layer_info, area_receiver in zip(layer_infos, layer_areas):
         name = f"_{layer_info.name}"  # if `name` starts with a number, tp.execute() fails, so we add an underscore
-        area, bbox = name + "_area", name + "_bbox"
+        area = name + "_area"
         tp.input(name, cell.begin_shapes_rec(layout.layer(layer_info)))
         tp.output(area, area_receiver)
-        tp.output(bbox, bbox_receiver)
-        tp.queue(f"_output({area}, {name}.area)")
-        tp.queue(f"_output({bbox}, {name}.bbox.area)")
-    tp.execute("Calculate polygon and bounding box area")
-
-    areas = [area.area for area in layer_areas]
-    bboxes = [bbox.area for bbox in layer_bboxes]
-    results = {
-        layer_info.name: {"area": area, "density": area / bbox if bbox != 0.0 else 0.0}
-        for layer_info, area, bbox in zip(layer_infos, areas, bboxes)
-    }
+        tp.queue(f"_output({area}, {name}.area(_tile.bbox))")
+    tp.execute("Calculate polygon area")
+
+    results = {}
+    for layer_info, area_receiver in zip(layer_infos, layer_areas):
+        bbox = _bbox_area(layer_info)
+        results[layer_info.name] = {
+            "area": area_receiver.area,
+            "density": area_receiver.area / bbox if bbox != 0.0 else 0.0,
+        }
+        if density_map:
+            results[layer_info.name]["area_map"] = _to_map(area_receiver.tile_areas)
 
     # Add optimized ground grid calculation results
     for face in ground_grid_faces:
@@ -123,16 +182,78 @@ def get_area_and_density(cell: pya.Cell, layer_infos=None, optimize_ground_grid_
         base_metal_gap_layer = default_faces[face]["base_metal_gap"]
 
         # Calculate ground grid area assuming all shapes in ``ground_grid`` are identical
-        ground_grid_area, ground_grid_density = _grid_area_and_density(ground_grid_layer)
+        ground_grid_area, ground_grid_density, ground_grid_map = _grid_area_and_density(ground_grid_layer)
         results[ground_grid_layer.name] = {"area": ground_grid_area, "density": ground_grid_density}
 
         # Calcualte base_metal_gap area assuming the ground grid does not overlap with base_metal_gap_wo_grid
         gap_area = results[base_metal_gap_wo_grid_layer.name]["area"] + ground_grid_area
-        gap_bbox = cell.bbox_per_layer(layout.layer(base_metal_gap_layer)).area() * layout.dbu**2
+        gap_bbox = _bbox_area(base_metal_gap_layer)
         gap_density = gap_area / gap_bbox if gap_bbox != 0.0 else 0.0
         results[base_metal_gap_layer.name] = {"area": gap_area, "density": gap_density}
 
+        if density_map:
+            results[ground_grid_layer.name]["area_map"] = ground_grid_map
+            gap_map = results[base_metal_gap_wo_grid_layer.name]["area_map"] + ground_grid_map
+            results[base_metal_gap_layer.name]["area_map"] = gap_map
+
+    if density_map:
+        for values in results.values():
+            values["density_map"] = np.divide(
+                values["area_map"], tile_areas, out=np.zeros_like(values["area_map"]), where=tile_areas > 0.0
+            )
+
     if len(results) > 0:
         logging.info(f"Area calculation took {perf_counter() - start_time:.1f} seconds")
 
     return results
+
+
+def export_density_maps(area_data, path, image_layers=None, tile_size=None):
+    """Exports the per-tile area and density maps returned by ``get_area_and_density`` with ``density_map=True``.
+
+    The maps of all layers are saved to ``path`` with ``.npz`` suffix, with arrays ``{layer_name}-area`` and
+    ``{layer_name}-density``. Heatmap images of the density are saved as ``{path}-{layer_name}.png``.
+
+    Args:
+        area_data: dictionary returned by ``get_area_and_density``
+        path: path of the exported files without suffix
+        image_layers: list of layer names for which heatmap images are exported, or None to export images of all layers
+        tile_size: tile size in um that is stored to the ``.npz`` file, or None to not store it
+    """
+    arrays = {}
+    for layer_name, values in area_data.items():
+        arrays[f"{layer_name}-area"] = values["area_map"]
+        arrays[f"{layer_name}-density"] = values["density_map"]
+    if tile_size is not None:
+        arrays["tile_size"] = np.array(tile_size)
+    np.savez_compressed(f"{path}.npz", **arrays)
+
+    for layer_name in area_data if image_layers is None else image_layers:
+        if layer_name in area_data:
+            export_density_map_image(area_data[layer_name]["density_map"], f"{path}-{layer_name}.png")
+
+
+def export_density_map_image(density, file_name, size=default_png_dimensions[0]):
+    """Exports a density map as a heatmap image, from blue (zero density) to red (full density).
+
+    Args:
+        density: array of tile densities with the bottom row first
+        file_name: name of the png file
+        size: approximate length of the longer image side in pixels
+    """
+    rows, columns = density.shape
+    pixels_per_tile = max(1, size // max(rows, columns))
+    value = np.clip(np.flipud(density), 0.0, 1.0)
+    red, blue = np.round(255 * value).astype(np.uint32), np.round(255 * (1.0 - value)).astype(np.uint32)
+    argb = np.repeat(np.repeat(0xFF000000 | (red << 16) | blue, pixels_per_tile, axis=0), pixels_per_tile, axis=1)
+    height, width = argb.shape
+    if hasattr(lay.PixelBuffer, "from_bytes"):  # KLayout 0.30.10 or later
+        data = np.array([width, height], dtype="<u4").tobytes() + argb.astype("<u4").tobytes()
+        image = lay.PixelBuffer.from_bytes(data)
+        image.transparent = False  # as in a new pixel buffer, the image is opaque
+    else:
+        image = lay.PixelBuffer(width, height)
+        for y, row in enumerate(argb.tolist()):
+            for x, color in enumerate(row):
+                image.set_pixel(x, y, color)
+    image.write_png(file_name)
@@ -16,12 +16,16 @@
 # Please see our contribution agreements for individuals (meetiqm.com/iqm-individual-contributor-license-agreement)
 # and organizations (meetiqm.com/iqm-organization-contributor-license-agreement).
 
+from kqcircuits.util.hierarchy_statistics import HierarchyStatistics
+
 
 def count_instances_in_cell(cell, pcell_class):
     """Returns the number of pcell instances of type `pcell_class` in cell.
 
     The instances are counted from the entire hierarchy below cell, not only direct child instances. Also pcells with
-    type derived from `pcell_class` are counted.
+    type derived from `pcell_class` are counted. Each member of an instance array is counted separately.
+
+    Use ``HierarchyStatistics`` directly to count several pcell classes from the same cell hierarchy.
 
     Args:
         cell: cell from which the instances are counted
@@ -30,13 +34,4 @@ def count_instances_in_cell(cell, pcell_class):
     Returns:
         The number of instances below `cell` for which `isinstance(inst.cell.pcell_declaration(), pcell_class) == True`.
     """
-    n = 0
-    if isinstance(cell.pcell_declaration(), pcell_class):
-        n += 1
-    for inst in cell.each_inst():
-        # workaround for getting the cell due to KLayout bug, see
-        # https://www.klayout.de/forum/discussion/1191/cell-shapes-cannot-call-non-const-method-on-a-const-reference
-        # TODO: replace by `inst_cell = inst.cell` once KLayout bug is fixed
-        inst_cell = cell.layout().cell(inst.cell_index)
-        n += count_instances_in_cell(inst_cell, pcell_class)
-    return n
+    return HierarchyStatistics(cell).count_instances(cell, pcell_class)
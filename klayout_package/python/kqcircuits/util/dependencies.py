@@ -21,8 +21,6 @@ from io import IOBase
 from pathlib import Path
 from sys import platform
 import os
-import site
-import setuptools
 
 
 def install_kqc_gui_dependencies():
@@ -39,6 +37,9 @@ def install_kqc_gui_dependencies():
     if not hasattr(pya, "MessageBox"):
         return
 
+    import site
+    import setuptools
+
     detected_os = None
     if os.name == "nt":  # Windows
         detected_os = "win"
@@ -22,7 +22,6 @@
 from math import cos, sin, radians, atan2, degrees, pi, ceil
 from typing import List
 import numpy as np
-from scipy import spatial
 from kqcircuits.defaults import default_layers, default_path_length_layers
 from kqcircuits.pya_resolver import pya
 
@@ -307,6 +306,8 @@ def merge_points_and_match_on_edges(regions, tolerance=2):
     # Create point sets to merge adjacent points into single point
     merge_sets = []
     point_list = list(all_points)
+    from scipy import spatial  # pylint: disable=import-outside-toplevel
+
     vor = spatial.Voronoi([(p.x, p.y) for p in point_list])
     for link in vor.ridge_points:
         p = [point_list[i] for i in link]
@@ -19,6 +19,9 @@
 
 from kqcircuits.pya_resolver import pya
 
+# Name of the cell containing a single ground grid rectangle in hierarchical ground grids
+GROUND_GRID_ELEMENT_CELL_NAME = "ground_grid_element"
+
 
 def insert_ground_grid(
     target_cell: pya.Cell,
@@ -28,10 +31,15 @@ def insert_ground_grid(
     grid_step: int,
     grid_size: int,
     grid_offset: int = 0,
+    hierarchical: bool = False,
 ):
     """Generates ground grid as shapes in a target cell, without cell hierarchy.
     This function uses integer database units for all inputs.
 
+    If ``hierarchical`` is True, the grid is instead inserted as regular instance arrays of a single
+    ``ground_grid_element`` cell, as produced by ``Cell.fill_region``. This keeps the layout and exported files small,
+    see also ``ground_grid_element_cells``.
+
     Args:
         target_cell: Cell to place the grid into
         target_layer: Layer to place the grid into
@@ -42,15 +50,57 @@ def insert_ground_grid(
         grid_offset: Value between 0 (inclusive) and grid_step/grid_size (exclusive) to place grid rectangle.
             0 (default) for bottom left of grid_step * grid_step tile, increasing integer value places rectangle
             further up and right. Ensures multiple grids don't overlap.
+        hierarchical: True to insert the grid as instance arrays instead of shapes
     """
     _, grid_cell = _make_ground_grid_cell(target_layer, grid_area, protection, grid_step, grid_size, grid_offset)
 
+    if hierarchical:
+        _insert_ground_grid_arrays(target_cell, target_layer, grid_cell, grid_size, grid_offset)
+        return
+
     # Copy shapes from temporary layout to the target cell. This flattens the instances of ``grid_element_cell``.
     cm = pya.CellMapping()
     cm.for_single_cell(target_cell, grid_cell)
     target_cell.copy_tree_shapes(grid_cell, cm)
 
 
+def ground_grid_element_cells(cell: pya.Cell) -> list[pya.Cell]:
+    """Returns the ``ground_grid_element`` cells of hierarchical ground grids instantiated directly in ``cell``.
+
+    Args:
+        cell: Cell into which the ground grid was inserted with ``insert_ground_grid(..., hierarchical=True)``
+
+    Returns: list of grid element cells
+    """
+    layout = cell.layout()
+    cells = [layout.cell(i) for i in cell.each_child_cell()]
+    return [c for c in cells if c.name.split("$")[0] == GROUND_GRID_ELEMENT_CELL_NAME]
+
+
+def _insert_ground_grid_arrays(
+    target_cell: pya.Cell,
+    target_layer: pya.LayerInfo,
+    grid_cell: pya.Cell,
+    grid_size: int,
+    grid_offset: int,
+):
+    """Inserts the grid instance arrays of ``grid_cell`` into ``target_cell`` referring to a new grid element cell."""
+    layout = target_cell.layout()
+    element_cell = layout.create_cell(GROUND_GRID_ELEMENT_CELL_NAME)
+    element_cell.shapes(layout.layer(target_layer)).insert(
+        pya.Box(
+            grid_offset * grid_size,
+            grid_offset * grid_size,
+            (grid_offset + 1) * grid_size,
+            (grid_offset + 1) * grid_size,
+        )
+    )
+    for inst in grid_cell.each_inst():
+        cell_inst = inst.cell_inst.dup()
+        cell_inst.cell_index = element_cell.cell_index()
+        target_cell.insert(cell_inst)
+
+
 def make_ground_grid_region(
     grid_area: pya.Box,
     protection: pya.Region | pya.RecursiveShapeIterator,
@@ -89,8 +139,8 @@ def _make_ground_grid_cell(
     grid_size: int,
     grid_offset: int,
 ) -> tuple[pya.Layout, pya.Cell]:
-    """Generates ground grid as cell instances in a new cell in a new layout. The returned ``cell`` contains a child
-    cell instance for each grid cell element, and should generally be flattened to avoid having too many cell instances.
+    """Generates ground grid as cell instances in a new cell in a new layout. The returned ``cell`` contains regular
+    instance arrays of the grid element cell.
 
     A reference to ``layout`` must be kept as long as ``cell`` is used.
 
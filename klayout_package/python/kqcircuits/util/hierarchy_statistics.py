@@ -0,0 +1,105 @@
+# This code is part of KQCircuits
+# Copyright (C) 2025 IQM Finland Oy
+#
+# This program is free software: you can redistribute it and/or modify it under the terms of the GNU General Public
+# License as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+# warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with this program. If not, see
+# https://www.gnu.org/licenses/gpl-3.0.html.
+#
+# The software distribution should follow IQM trademark policy for open-source software
+# (meetiqm.com/iqm-open-source-trademark-policy). IQM welcomes contributions to the code.
+# Please see our contribution agreements for individuals (meetiqm.com/iqm-individual-contributor-license-agreement)
+# and organizations (meetiqm.com/iqm-organization-contributor-license-agreement).
+
+"""Statistics of the cell hierarchy computed once per unique cell."""
+
+from collections import Counter
+from typing import Dict, FrozenSet, Iterable
+
+from kqcircuits.pya_resolver import pya
+
+
+def static_cell_class_name(cell_name: str) -> str:
+    """Returns the PCell class name encoded in the name of a static cell, e.g. ``"Manhattan"`` for ``"Manhattan$1"``."""
+    return cell_name.split("$")[0].replace("*", " ")
+
+
+class HierarchyStatistics:
+    """Per-cell statistics of the cell hierarchy below a top cell.
+
+    The statistics are computed in a single pass over the cells in bottom-up order. The statistics of each unique cell
+    are combined from the statistics of its child cells, so the cost is proportional to the number of cells and
+    instance records instead of the number of placed instances. Each member of an instance array is counted
+    separately.
+
+    The statistics of a cell always include the cell itself.
+
+    Args:
+        top_cell: cell whose hierarchy is analysed
+    """
+
+    def __init__(self, top_cell: pya.Cell):
+        layout = top_cell.layout()
+        cell_indices = set(top_cell.called_cells())
+        cell_indices.add(top_cell.cell_index())
+
+        self._pcell_counts: Dict[int, Counter] = {}
+        self._class_names: Dict[int, FrozenSet[str]] = {}
+        for cell_index in layout.each_cell_bottom_up():
+            if cell_index not in cell_indices:
+                continue
+            cell = layout.cell(cell_index)
+            counts = Counter()
+            pcell_declaration = cell.pcell_declaration()
+            if pcell_declaration is not None:
+                counts[type(pcell_declaration)] = 1
+            class_names = {static_cell_class_name(cell.name)}
+
+            child_sizes = Counter()
+            for inst in cell.each_inst():
+                child_sizes[inst.cell_index] += inst.size()
+            for child_index, size in child_sizes.items():
+                for pcell_class, n in self._pcell_counts[child_index].items():
+                    counts[pcell_class] += size * n
+                class_names.update(self._class_names[child_index])
+
+            self._pcell_counts[cell_index] = counts
+            self._class_names[cell_index] = frozenset(class_names)
+
+    @staticmethod
+    def _index(cell: pya.Cell | int) -> int:
+        return cell if isinstance(cell, int) else cell.cell_index()
+
+    def pcell_counts(self, cell: pya.Cell | int) -> Dict[type, int]:
+        """Returns the number of instances of each PCell class in the hierarchy of cell.
+
+        Args:
+            cell: cell or cell index in the hierarchy of the top cell
+        """
+        return dict(self._pcell_counts[self._index(cell)])
+
+    def count_instances(self, cell: pya.Cell | int, pcell_class: type) -> int:
+        """Returns the number of instances of ``pcell_class`` or classes derived from it in the hierarchy of cell.
+
+        Args:
+            cell: cell or cell index in the hierarchy of the top cell
+            pcell_class: pcell class of the instances
+        """
+        counts = self._pcell_counts[self._index(cell)]
+        return sum(n for c, n in counts.items() if issubclass(c, pcell_class))
+
+    def contains_cell_class(self, cell: pya.Cell | int, class_names: Iterable[str]) -> bool:
+        """Returns True if the hierarchy of cell contains a cell whose static cell class name is in ``class_names``.
+
+        Static cell class names are given by ``static_cell_class_name``. Works also for static cells without PCell data.
+
+        Args:
+            cell: cell or cell index in the hierarchy of the top cell
+            class_names: PCell class names, e.g. ``junction_type_choices``
+        """
+        return not self._class_names[self._index(cell)].isdisjoint(class_names)
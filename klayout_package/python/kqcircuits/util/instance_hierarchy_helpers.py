@@ -43,31 +43,29 @@ def get_cell_instance_hierarchy(layout: pya.Layout, cell_index: int) -> List[Ins
     Returns: list of ``InstanceHierarchy`` structrures describing the cell hierarchy of each instance
     """
 
-    to_do = [(cell_index, pya.DCplxTrans(), None, [])]
-    results = []
-
-    # Traverse the cell hierarchy upwards from the current cell, and accumulate the transformations at each hierarchy
-    # level until we reach the top cell, such that we have the global transform of each instance.
-    while len(to_do) > 0:
-        current_cell_index, input_trans, input_inst, parent_instances = to_do.pop(0)
-        cell = layout.cell(current_cell_index)
-        has_parents = False
-        for parent_inst in cell.each_parent_inst():
-            inst = parent_inst.child_inst()
-            if input_inst is None:
-                input_inst = inst
-            else:
-                parent_instances = parent_instances + [inst]
-            trans = inst.dcplx_trans
-            to_do.append((parent_inst.parent_cell_index(), trans * input_trans, input_inst, parent_instances))
-            has_parents = True
-        if not has_parents and input_inst is not None:
-            results.append(
-                InstanceHierarchy(
-                    instance=input_inst, trans=input_trans, parent_instances=parent_instances, top_cell=cell
-                )
-            )
-    return results
+    # Placements of each cell in the top cells as (transformation, instance path from the cell upwards, top cell).
+    # The placements of each ancestor cell are resolved only once, even if the ancestor is instantiated many times.
+    placements = {}
+
+    def cell_placements(current_cell_index):
+        if current_cell_index not in placements:
+            cell = layout.cell(current_cell_index)
+            result = []
+            for parent_inst in cell.each_parent_inst():
+                inst = parent_inst.child_inst()
+                trans = inst.dcplx_trans
+                for parent_trans, parent_path, top_cell in cell_placements(parent_inst.parent_cell_index()):
+                    result.append((parent_trans * trans, [inst] + parent_path, top_cell))
+            if not result:
+                result.append((pya.DCplxTrans(), [], cell))
+            placements[current_cell_index] = result
+        return placements[current_cell_index]
+
+    return [
+        InstanceHierarchy(instance=path[0], trans=trans, parent_instances=path[1:], top_cell=top_cell)
+        for trans, path, top_cell in cell_placements(cell_index)
+        if path
+    ]
 
 
 def formatted_cell_instance_hierarchy(inst_data: InstanceHierarchy) -> str:
@@ -25,21 +25,32 @@ Typical usage example::
     from kqcircuits.util.library_helper import load_libraries
     load_libraries(path=Airbridge.LIBRARY_PATH)
     cell = Airbridge.create(layout, **kwargs)
+
+The PCell classes found in each library source directory are stored in a manifest file in ``TMP_PATH``. The manifest
+entries of a directory are rebuilt when the modification time or size of any Python file in it changes. With
+``load_libraries(lazy=True)`` the libraries are created from the manifest without importing the PCell modules, and each
+PCell is imported and registered only when it is first needed, see ``get_pcell_declaration``.
 """
 
 import os
 import re
+import json
 import types
 import inspect
 import importlib
 from pathlib import Path
 import logging
 
+from kqcircuits import defaults
 from kqcircuits.defaults import SRC_PATHS, kqc_library_names, excluded_module_names
 from kqcircuits.pya_resolver import pya
 
-
 _kqc_libraries = {}  # dictionary {library name: (library, library path relative to kqcircuits)}
+# PCells of lazily loaded libraries which are not yet registered, {library name: {pcell name: (module, class name)}}
+_unregistered_pcells = {}
+
+_MANIFEST_FILE_NAME = "pcell_library_manifest.json"
+_MANIFEST_VERSION = 1
 
 # Source directories not to be included in the library
 _excluded_paths = (
@@ -73,13 +84,15 @@ if SRC_PATHS[0].parts[-4] == "salt":
         SRC_PATHS.append(Path(os.path.join(user_dirs, ud)))
 
 
-def load_libraries(flush=False, path=""):
+def load_libraries(flush=False, path="", lazy=False):
     """Load all KQCircuits libraries from the given path.
 
     Args:
         flush: If True, old libraries will be deleted and new ones created. Otherwise old libraries will be used.
             (if old libraries exist)
         path: path (relative to SRC_PATH) from which the pcell classes and cells are loaded to libraries
+        lazy: If True, the libraries are created from the library manifest without importing the PCell modules. The
+            PCells are registered on first use by ``get_pcell_declaration``. Ignored if ``flush`` is True.
 
     Returns:
          A dictionary of libraries that have been loaded, keys are library names and values are libraries.
@@ -90,30 +103,33 @@ def load_libraries(flush=False, path=""):
         _get_all_pcell_classes(flush, path)
         delete_all_libraries()
         _kqc_libraries.clear()
+        _unregistered_pcells.clear()
         logging.debug("Deleted all libraries.")
+        lazy = False
     else:
         # if a library with the given path already exist, use it
-        for _, lib_path in _kqc_libraries.values():
-            if lib_path == path:
+        for library_name, (_, lib_path) in _kqc_libraries.items():
+            if lib_path == path and (lazy or not _unregistered_pcells.get(library_name)):
                 return {key: value[0] for key, value in _kqc_libraries.items()}
 
-    for cls in _get_all_pcell_classes(flush, path):
-
-        library_name = cls.LIBRARY_NAME
-        library_path = cls.LIBRARY_PATH
-
-        library = pya.Library.library_by_name(library_name)  # returns only registered libraries
-        if (library is None) or flush:
-            if library_name in _kqc_libraries:
-                logging.debug('Using created library "%s".', library_name)
-                library, _ = _kqc_libraries[library_name]
-            else:
-                # create a library, but do not register it yet
-                logging.debug(f'Creating new library "{library_name}".')
-                library = pya.Library()
-                library.description = cls.LIBRARY_DESCRIPTION
-                _kqc_libraries[library_name] = (library, library_path)
-            _register_pcell(cls, library, library_name)
+    if lazy:
+        for entry in _get_library_manifest(path):
+            library = _get_library(entry["library"], entry["library_path"], entry["description"])
+            pcell_name = to_library_name(entry["class"])
+            if library.layout().pcell_declaration(pcell_name) is None:
+                _unregistered_pcells.setdefault(entry["library"], {})[pcell_name] = (entry["module"], entry["class"])
+    else:
+        for cls in _get_all_pcell_classes(flush, path):
+            library_name = cls.LIBRARY_NAME
+            pcell_name = to_library_name(cls.__name__)
+            _unregistered_pcells.get(library_name, {}).pop(pcell_name, None)
+
+            library = pya.Library.library_by_name(library_name)  # returns only registered libraries
+            if (library is None) or flush:
+                library = _get_library(library_name, cls.LIBRARY_PATH, cls.LIBRARY_DESCRIPTION)
+                _register_pcell(cls, library, library_name)
+            elif library.layout().pcell_declaration(pcell_name) is None:  # library was loaded lazily
+                _register_pcell(cls, library, library_name)
 
     # Libraries should be registered in dependency-order, otherwise reload will crash.
     for library_name in kqc_library_names:
@@ -127,6 +143,53 @@ def load_libraries(flush=False, path=""):
     return {key: value[0] for key, value in _kqc_libraries.items()}
 
 
+def get_pcell_declaration(library_name: str, pcell_name: str):
+    """Returns the declaration of a PCell in a loaded library.
+
+    If the library was loaded lazily, the module of the PCell is imported and the PCell is registered first.
+
+    Args:
+        library_name: name of the library
+        pcell_name: name of the PCell in the library, e.g. ``"Airbridge Rectangular"``
+
+    Returns:
+        The ``pya.PCellDeclaration`` of the PCell, or None if the library has no PCell with the given name.
+    """
+    if library_name in _kqc_libraries:
+        library, _ = _kqc_libraries[library_name]
+    else:
+        library = pya.Library.library_by_name(library_name)
+    if library is None:
+        return None
+    unregistered = _unregistered_pcells.get(library_name, {})
+    if pcell_name in unregistered:
+        module_name, class_name = unregistered.pop(pcell_name)
+        _register_pcell(getattr(importlib.import_module(module_name), class_name), library, library_name)
+    return library.layout().pcell_declaration(pcell_name)
+
+
+def register_lazy_pcells():
+    """Registers all PCells of lazily loaded libraries which are not yet registered.
+
+    Must be called before reading a layout saved with context info, since KLayout can restore PCell instances only for
+    registered PCells.
+    """
+    for library_name, unregistered in list(_unregistered_pcells.items()):
+        for pcell_name in list(unregistered):
+            get_pcell_declaration(library_name, pcell_name)
+
+
+def get_library_module_names(path=""):
+    """Returns the sorted names of the modules defining the PCells of the libraries in the given path.
+
+    The names are read from the library manifest, so the modules are imported only if the manifest is outdated.
+
+    Args:
+        path: path (relative to SRC_PATH) from which the PCell classes are searched
+    """
+    return sorted({entry["module"] for entry in _get_library_manifest(path)})
+
+
 def get_library_paths():
     """Returns a list of library paths under kqcircuits."""
     return (path for _, path in _kqc_libraries.values())
@@ -157,6 +220,7 @@ def delete_library(name=None):
     library.delete()
     if name in _kqc_libraries:
         _kqc_libraries.pop(name)
+    _unregistered_pcells.pop(name, None)
     if library._destroyed():
         logging.info(f"Successfully deleted library '{name}'.")
     else:
@@ -174,7 +238,10 @@ def element_by_class_name(class_name: str, library_path: str = "elements", libra
 
     Returns: Class of the element, or None if the element is not in the library
     """
-    layout = load_libraries(path=library_path)[library_name].layout()
+    layout = load_libraries(path=library_path, lazy=True)[library_name].layout()
+    for pcell_name, (_, name) in list(_unregistered_pcells.get(library_name, {}).items()):
+        if name == class_name:
+            get_pcell_declaration(library_name, pcell_name)
     for pcell_id in layout.pcell_ids():
         pcell_class = layout.pcell_declaration(pcell_id).__class__
         if pcell_class.__name__ == class_name:
@@ -241,6 +308,26 @@ def to_library_name(class_name=None):
 # ********************************************************************************
 
 
+def _get_library(library_name, library_path, description):
+    """Returns the library with the given name, creating it if it does not exist yet.
+
+    Args:
+        library_name: name of the library
+        library_path: library path relative to kqcircuits
+        description: description of a new library
+    """
+    if library_name in _kqc_libraries:
+        logging.debug('Using created library "%s".', library_name)
+        library, _ = _kqc_libraries[library_name]
+    else:
+        # create a library, but do not register it yet
+        logging.debug(f'Creating new library "{library_name}".')
+        library = pya.Library()
+        library.description = description
+        _kqc_libraries[library_name] = (library, library_path)
+    return library
+
+
 def _register_pcell(pcell_class, library, library_name):
     """Registers the PCell to the library.
 
@@ -281,40 +368,113 @@ def _get_all_pcell_classes(reload=False, path="", skip_modules=False):
     Returns:
         List of the PCell classes
     """
-    pcell_classes = []
-
-    for src in SRC_PATHS:
-        pkg = src.parts[-1]
+    skip_list = _excluded_module_names if not skip_modules else _excluded_module_names + excluded_module_names
+    return [
+        cls
+        for src in SRC_PATHS
+        for library_src in _get_library_src_paths(src, path)
+        for cls in _get_library_src_pcell_classes(src, library_src, reload, skip_list)
+    ]
 
-        if path == "":
-            library_src_paths = [f for f in src.iterdir() if f.is_dir() and f.name not in _excluded_paths]
-        else:
-            library_src_paths = [src.joinpath(path)]
 
-        skip_list = _excluded_module_names if not skip_modules else _excluded_module_names + excluded_module_names
+def _get_library_src_paths(src, path):
+    """Returns the library source directories in ``src`` for the given path (relative to SRC_PATH)."""
+    if path == "":
+        return [f for f in src.iterdir() if f.is_dir() and f.name not in _excluded_paths]
+    return [src.joinpath(path)]
 
-        for library_src in library_src_paths:
-            module_paths = library_src.rglob("*.py")
-            for mp in module_paths:
-                module_name = mp.stem
-                if module_name in skip_list:
-                    continue
-                # Get the module path starting from the "pkg" directory below project root directory.
-                import_path_parts = mp.parts[::-1][mp.parts[::-1].index(pkg) :: -1]
-                import_path = ".".join(import_path_parts)[:-3]  # the -3 is for removing ".py" from the path
 
-                module = importlib.import_module(import_path)
-                if reload:
-                    importlib.reload(module)
-                    logging.debug(f"Reloaded module '{module_name}'.")
+def _get_library_src_pcell_classes(src, library_src, reload=False, skip_list=_excluded_module_names):
+    """Imports the modules in a library source directory and returns the PCell class of each module.
 
-                classes = _get_pcell_classes(module)
-                if classes:
-                    pcell_classes.append(classes[-1])
+    Args:
+        src: source path in SRC_PATHS
+        library_src: library source directory in ``src``
+        reload: Boolean determining if the modules should be reloaded.
+        skip_list: module names to skip
 
+    Returns:
+        List of the PCell classes
+    """
+    pcell_classes = []
+    pkg = src.parts[-1]
+    for mp in library_src.rglob("*.py"):
+        module_name = mp.stem
+        if module_name in skip_list:
+            continue
+        # Get the module path starting from the "pkg" directory below project root directory.
+        import_path_parts = mp.parts[::-1][mp.parts[::-1].index(pkg) :: -1]
+        import_path = ".".join(import_path_parts)[:-3]  # the -3 is for removing ".py" from the path
+
+        module = importlib.import_module(import_path)
+        if reload:
+            importlib.reload(module)
+            logging.debug(f"Reloaded module '{module_name}'.")
+
+        classes = _get_pcell_classes(module)
+        if classes:
+            pcell_classes.append(classes[-1])
     return pcell_classes
 
 
+def _get_library_manifest(path=""):
+    """Returns the library manifest entries of the PCell classes in the given path.
+
+    The manifest is cached in ``TMP_PATH``. The entries of a library source directory are rebuilt by importing its
+    modules if the modification time or size of any Python file in the directory has changed.
+
+    Args:
+        path: path (relative to SRC_PATH) from which the classes are searched
+
+    Returns:
+        List of dictionaries with keys "class", "module", "library", "library_path" and "description"
+    """
+    manifest_file = defaults.TMP_PATH / _MANIFEST_FILE_NAME
+    try:
+        manifest = json.loads(manifest_file.read_text(encoding="utf-8"))
+        if manifest.get("version") != _MANIFEST_VERSION:
+            manifest = {}
+    except (OSError, ValueError):
+        manifest = {}
+    directories = manifest.setdefault("directories", {})
+
+    entries = []
+    changed = False
+    for src in SRC_PATHS:
+        for library_src in _get_library_src_paths(src, path):
+            files = {
+                str(f.relative_to(library_src)): [f.stat().st_mtime_ns, f.stat().st_size]
+                for f in library_src.rglob("*.py")
+            }
+            cached = directories.get(str(library_src))
+            if cached is None or cached["files"] != files:
+                logging.debug(f"Updating library manifest of '{library_src}'.")
+                cached = {
+                    "files": files,
+                    "pcells": [
+                        {
+                            "class": cls.__name__,
+                            "module": cls.__module__,
+                            "library": cls.LIBRARY_NAME,
+                            "library_path": cls.LIBRARY_PATH,
+                            "description": cls.LIBRARY_DESCRIPTION,
+                        }
+                        for cls in _get_library_src_pcell_classes(src, library_src)
+                    ],
+                }
+                directories[str(library_src)] = cached
+                changed = True
+            entries += cached["pcells"]
+
+    if changed:
+        manifest["version"] = _MANIFEST_VERSION
+        # write to a temporary file first, so that concurrent processes never read a partially written manifest
+        tmp_file = manifest_file.with_name(f"{manifest_file.name}.{os.getpid()}.tmp")
+        tmp_file.write_text(json.dumps(manifest, indent=1), encoding="utf-8")
+        os.replace(tmp_file, manifest_file)
+    return entries
+
+
 def _get_pcell_classes(module=None):
     """Returns all PCell classes found in the module.
 
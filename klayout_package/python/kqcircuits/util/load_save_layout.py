@@ -16,6 +16,7 @@
 # Please see our contribution agreements for individuals (meetiqm.com/iqm-individual-contributor-license-agreement)
 # and organizations (meetiqm.com/iqm-organization-contributor-license-agreement).
 from kqcircuits.pya_resolver import pya
+from kqcircuits.util.library_helper import register_lazy_pcells
 
 
 def load_layout(filename, layout: pya.Layout, **opts) -> None:
@@ -24,6 +25,7 @@ def load_layout(filename, layout: pya.Layout, **opts) -> None:
     The default LoadLayoutOptions of KLayout are employed with following exceptions:
     * This function sets cell_conflict_resolution = RenameCell by default (conflicting cells will be renamed).
     * The LoadLayoutOptions can be modified via keyword arguments.
+    * PCells of lazily loaded libraries are registered first, so that PCell instances are restored from context info.
 
     Args:
         filename: The name of the file to load.
@@ -36,6 +38,7 @@ def load_layout(filename, layout: pya.Layout, **opts) -> None:
         if not hasattr(load_opts, key):
             raise NotImplementedError(f"pya.LoadLayoutOptions has no attribute called {key}.")
         setattr(load_opts, key, value)
+    register_lazy_pcells()
     layout.read(str(filename), load_opts)
 
 
@@ -18,6 +18,7 @@
 from kqcircuits.elements.element import Element
 from kqcircuits.pya_resolver import pya
 from kqcircuits.util.geometry_helper import region_with_merged_polygons
+from kqcircuits.util.groundgrid import ground_grid_element_cells
 
 
 def merge_layers(layout, cell_list, layer_1, layer_2, layer_merged):
@@ -55,11 +56,21 @@ def merge_layout_layers_on_face(layout, cell, face, tolerance=0.004):
         cell: Cell to merge
         face: face dictionary containing layer names as keys and layer info objects as values
         tolerance: gap length to be ignored while merging (µm)
+
+    Hierarchical ground grids in ``cell`` are not flattened. Instead, the grid rectangle is copied to
+    "base_metal_gap" layer of the grid element cell.
     """
     gaps = pya.Region(cell.begin_shapes_rec(layout.layer(face["base_metal_gap_wo_grid"])))
     metal = pya.Region(cell.begin_shapes_rec(layout.layer(face["base_metal_addition"])))
-    grid = cell.begin_shapes_rec(layout.layer(face["ground_grid"]))
-    res = cell.shapes(layout.layer(face["base_metal_gap"]))
+    grid_layer = layout.layer(face["ground_grid"])
+    gap_layer = layout.layer(face["base_metal_gap"])
+    grid = cell.begin_shapes_rec(grid_layer)
+    element_cells = [c for c in ground_grid_element_cells(cell) if not c.shapes(grid_layer).is_empty()]
+    if element_cells:
+        grid.unselect_cells([c.cell_index() for c in element_cells])
+        for element_cell in element_cells:
+            element_cell.shapes(gap_layer).insert(element_cell.shapes(grid_layer))
+    res = cell.shapes(gap_layer)
     res.insert(region_with_merged_polygons(gaps - metal, tolerance / layout.dbu))
     res.insert(grid)
 
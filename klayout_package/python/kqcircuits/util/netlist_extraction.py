@@ -73,18 +73,37 @@ def export_cell_netlist(cell, filename, pcell=None, alt_netlists=None):
     if pcell is None:
         pcell = cell
 
-    _export_cell_netlist_breakdown(cell, filename, pcell, default_netlist_breakdown)
-
+    breakdowns = {filename: default_netlist_breakdown}
     if isinstance(alt_netlists, dict):
         fn, ext = os.path.splitext(filename)
         for tag, breakdown in alt_netlists.items():
-            fnt = f"{fn}_{tag}{ext}"
-            _export_cell_netlist_breakdown(cell, fnt, pcell, breakdown)
-
-
-def _export_cell_netlist_breakdown(cell, filename, pcell, breakdown_list):
-    """A helper function of ``export_cell_netlist``, processes a single breakdown list."""
+            breakdowns[f"{fn}_{tag}{ext}"] = breakdown
 
+    # the netlist is extracted only once, and alternative breakdowns are applied to copies of the extracted netlist
+    ltn, cm, circuit_index = _extract_cell_netlist(cell)
+    if circuit_index is None:
+        log.info(f"No circuit found for {cell.display_title()}")
+        return
+    # unnamed extracted nets are only named by their cluster ids, which are not copied, so their names are made explicit
+    for net in ltn.netlist().circuit_by_cell_index(circuit_index).each_net():
+        net.name = net.expanded_name()
+    # copies are made before the default breakdown flattens the extracted netlist; keep references to the netlists,
+    # since their circuits are destroyed with them
+    netlists = [ltn.netlist()] + [ltn.netlist().dup() for _ in range(len(breakdowns) - 1)]
+    for netlist, (breakdown_filename, breakdown) in zip(netlists, breakdowns.items()):
+        circuit = netlist.circuit_by_cell_index(circuit_index)
+        log.info(f"Exporting netlist to {breakdown_filename}")
+        _export_netlist(circuit, breakdown_filename, ltn.internal_layout(), cell.layout(), cm, pcell, breakdown)
+
+
+def _extract_cell_netlist(cell):
+    """A helper function of ``export_cell_netlist``, extracts the netlist of the cell.
+
+    Returns:
+        tuple ``(ltn, cell_mapping, circuit_index)``, where ``ltn`` is the pya LayoutToNetlist object, ``cell_mapping``
+        maps its internal cells to the original layout, and ``circuit_index`` is the internal cell index of the circuit
+        of ``cell``, or None if no circuit was found.
+    """
     # get LayoutToNetlist object
     layout = cell.layout()
     faces_with_ports = [face_id for face_id in default_faces if f"{face_id}_ports" in default_layers]
@@ -104,13 +123,33 @@ def _export_cell_netlist_breakdown(cell, filename, pcell, breakdown_list):
     # extract cell to circuit map for finding the netlist of interest
     cm = ltn.const_cell_mapping_into(layout, cell)
     reverse_cell_map = {v: k for k, v in cm.table().items()}
-    # export the circuit of interest
-    circuit = ltn.netlist().circuit_by_cell_index(reverse_cell_map[cell.cell_index()])
-    if circuit:
-        log.info(f"Exporting netlist to {filename}")
-        _export_netlist(circuit, filename, ltn.internal_layout(), layout, cm, pcell, breakdown_list)
-    else:
-        log.info(f"No circuit found for {cell.display_title()}")
+    circuit_index = reverse_cell_map[cell.cell_index()]
+    if not ltn.netlist().circuit_by_cell_index(circuit_index):
+        circuit_index = None
+    return ltn, cm, circuit_index
+
+
+class _FlattenedNetNames:
+    """Names the nets created by flattening subcircuits of a circuit.
+
+    Nets created by ``Circuit.flatten_subcircuit`` have no name. They are named ``$I<n>`` in the order of creation,
+    numbered after the nets that exist when this object is created and skipping names already in use. The names do not
+    depend on whether the circuit belongs to the extracted netlist or to a copy of it.
+    """
+
+    def __init__(self, circuit):
+        self.circuit = circuit
+        self.used_names = {net.expanded_name() for net in circuit.each_net()}
+        self.next_index = len(self.used_names) + 1
+
+    def assign(self):
+        """Names the unnamed nets of the circuit."""
+        for net in self.circuit.each_net():
+            if not net.name:
+                while f"$I{self.next_index}" in self.used_names:
+                    self.next_index += 1
+                net.name = f"$I{self.next_index}"
+                self.used_names.add(net.name)
 
 
 def _transformations_close_enough(trans_a, trans_b):
@@ -142,12 +181,14 @@ def _export_netlist(circuit, filename, internal_layout, original_layout, cell_ma
 
     # first flatten subcircuits mentioned in elements to breakdown
     # TODO implement an efficient depth first search or similar solution
+    net_names = _FlattenedNetNames(circuit)
     for _ in range(internal_layout.top_cell().hierarchy_levels()):
         subcircuits = list(circuit.each_subcircuit())
         for subcircuit in subcircuits:
             internal_cell = internal_layout.cell(subcircuit.circuit_ref().cell_index)
             if internal_cell.name.split("$")[0].replace("*", " ") in breakdown_list:
                 circuit.flatten_subcircuit(subcircuit)
+                net_names.assign()
 
     nets_for_export = {}
     for net in circuit.each_net():
@@ -28,6 +28,7 @@ import logging
 from kqcircuits.defaults import default_layers
 from kqcircuits.elements.element import get_refpoints
 from kqcircuits.pya_resolver import pya
+from kqcircuits.util.hierarchy_statistics import HierarchyStatistics, static_cell_class_name
 from kqcircuits.util.load_save_layout import load_layout, save_layout
 from kqcircuits.junctions import junction_type_choices
 from kqcircuits.junctions.junction import Junction
@@ -255,6 +256,14 @@ def extract_junctions(top_cell: pya.Cell, tuned_junction_parameters: Dict) -> Li
     if not is_pcell:
         logging.warning("Top cell doesn't contain PCell parameter data")
 
+    # Subtrees without junctions are skipped, which is determined once per unique cell
+    hierarchy_stats = HierarchyStatistics(top_cell)
+
+    def contains_junctions(cell_index):
+        if is_pcell:
+            return hierarchy_stats.count_instances(cell_index, Junction) > 0
+        return hierarchy_stats.contains_cell_class(cell_index, junction_type_choices)
+
     def recursive_junction_search(inst, parent_name, prev_trans, trans_path):
         cell = layout.cell(inst.cell_index)
         name = inst.property("id")
@@ -264,7 +273,7 @@ def extract_junctions(top_cell: pya.Cell, tuned_junction_parameters: Dict) -> Li
             pcell = inst.pcell_declaration()
             is_junction = pcell and isinstance(pcell, Junction)
         else:
-            cell_class_from_name = cell.name.split("$")[0].replace("*", " ")
+            cell_class_from_name = static_cell_class_name(cell.name)
             pcell = library_layout.pcell_declaration(cell_class_from_name)
             is_junction = cell_class_from_name in junction_type_choices
         if is_junction:
@@ -318,12 +327,14 @@ def extract_junctions(top_cell: pya.Cell, tuned_junction_parameters: Dict) -> Li
                 JunctionEntry(type(junction_type), trans, trans_path + [inst.dcplx_trans], params, parent_name, name)
             )
         for i in cell.each_inst():
-            # For pcell oas, accumulate transformation starting from root
-            # For static oas, only use parent.dcplx_trans * this.dcplx_trans
-            recursive_junction_search(i, name, trans if is_pcell else prev_trans, trans_path + [inst.dcplx_trans])
+            if contains_junctions(i.cell_index):
+                # For pcell oas, accumulate transformation starting from root
+                # For static oas, only use parent.dcplx_trans * this.dcplx_trans
+                recursive_junction_search(i, name, trans if is_pcell else prev_trans, trans_path + [inst.dcplx_trans])
 
     for i in top_cell.each_inst():
-        recursive_junction_search(i, None, i.dcplx_trans, [])
+        if contains_junctions(i.cell_index):
+            recursive_junction_search(i, None, i.dcplx_trans, [])
     # Need to know face of junctions before performing chip specific transformation,
     # because we need to know for which face we need to perform the marker position test
     if found_junctions:
@@ -343,23 +354,8 @@ def check_static_cell_has_junctions(top_cell: pya.Cell) -> bool:
 
     Returns: True if chip contains at least one junction.
     """
-    layout = top_cell.layout()
-
-    def recursive_junction_search(inst):
-        cell = layout.cell(inst.cell_index)
-        cell_class_from_name = cell.name.split("$")[0].replace("*", " ")
-        is_junction = cell_class_from_name in junction_type_choices
-        if is_junction:
-            return True
-        for i in cell.each_inst():
-            if recursive_junction_search(i):
-                return True
-        return False
-
-    for i in top_cell.each_inst():
-        if recursive_junction_search(i):
-            return True
-    return False
+    hierarchy_stats = HierarchyStatistics(top_cell)
+    return any(hierarchy_stats.contains_cell_class(c, junction_type_choices) for c in top_cell.each_child_cell())
 
 
 def place_junctions(top_cell: pya.Cell, junctions: List[JunctionEntry]) -> None:
@@ -32,13 +32,13 @@ from elmer_helpers import (
 )
 
 from gmsh_helpers import (
-    separated_hull_and_holes,
-    add_polygon,
+    add_region_surfaces,
     get_recursive_children,
     set_meshing,
     apply_elmer_layer_prefix,
     get_metal_layers,
     optimize_mesh,
+    write_mesh,
 )
 
 try:
@@ -80,26 +80,7 @@ def produce_cross_section_mesh(json_data: dict[str, Any], msh_file: Path | str)
     dim_tags = {}
     for name, data in layers.items():
         reg = pya.Region(cell.shapes(layout.layer(data["layer"], 0)))
-        layer_dim_tags = []
-        for simple_poly in reg.each():
-            poly = separated_hull_and_holes(simple_poly)
-            hull_point_coordinates = [
-                (point.x * layout.dbu, point.y * layout.dbu, 0) for point in poly.each_point_hull()
-            ]
-            hull_plane_surface_id, _ = add_polygon(hull_point_coordinates)
-            hull_dim_tag = (2, hull_plane_surface_id)
-            hole_dim_tags = []
-            for hole in range(poly.holes()):
-                hole_point_coordinates = [
-                    (point.x * layout.dbu, point.y * layout.dbu, 0) for point in poly.each_point_hole(hole)
-                ]
-                hole_plane_surface_id, _ = add_polygon(hole_point_coordinates)
-                hole_dim_tags.append((2, hole_plane_surface_id))
-            if hole_dim_tags:
-                layer_dim_tags += gmsh.model.occ.cut([hull_dim_tag], hole_dim_tags)[0]
-            else:
-                layer_dim_tags.append(hull_dim_tag)
-        dim_tags[name] = layer_dim_tags
+        dim_tags[name] = add_region_surfaces(reg, layout.dbu)
 
     # Call fragment and get updated dim_tags as new_tags. Then synchronize.
     all_dim_tags = [tag for tags in dim_tags.values() for tag in tags]
@@ -136,7 +117,7 @@ def produce_cross_section_mesh(json_data: dict[str, Any], msh_file: Path | str)
     gmsh.model.mesh.generate(2)
 
     optimize_mesh(json_data.get("mesh_optimizer"))
-    gmsh.write(str(msh_file))
+    write_mesh(msh_file, workflow)
 
     # Open mesh viewer
     if workflow.get("run_gmsh_gui", False):
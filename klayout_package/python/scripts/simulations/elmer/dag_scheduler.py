@@ -0,0 +1,344 @@
+# This code is part of KQCircuits
+# Copyright (C) 2025 IQM Finland Oy
+#
+# This program is free software: you can redistribute it and/or modify it under the terms of the GNU General Public
+# License as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+# warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with this program. If not, see
+# https://www.gnu.org/licenses/gpl-3.0.html.
+#
+# The software distribution should follow IQM trademark policy for open-source software
+# (meetiqm.com/iqm-open-source-trademark-policy). IQM welcomes contributions to the code.
+# Please see our contribution agreements for individuals (meetiqm.com/iqm-individual-contributor-license-agreement)
+# and organizations (meetiqm.com/iqm-organization-contributor-license-agreement).
+
+"""Dependency-aware local scheduler for exported Elmer simulations.
+
+Each exported simulation is split into stages that are run as separate tasks with ``run.py``:
+
+* Gmsh meshing, once per mesh shared by the simulations (``mesh_name`` in the simulation json)
+* ElmerGrid, once per mesh
+* writing Elmer sif files
+* ElmerSolver
+* Paraview, if ``run_paraview`` is set in workflow
+* writing project results
+
+A task is started as soon as its dependencies are finished and its CPU and memory budget fits into the free resources.
+The CPU budgets are given by ``gmsh_n_threads`` and ``elmer_n_processes * elmer_n_threads`` in the workflow. Memory
+budgets are given by optional workflow keys ``gmsh_mem`` and ``elmer_mem``, e.g. ``"16G"``. Ready tasks are started in
+order of the number of tasks depending on them, and the largest tasks that fit are started first to keep the machine
+saturated.
+
+Finished tasks are recorded in a state file, so that an interrupted run continues from where it stopped when
+the scheduler is started again with the same arguments. The state is ignored if the simulation json files have been
+changed or replaced since, e.g. by exporting new simulations into the same folder.
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import subprocess
+import sys
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+import importlib.util
+
+has_tqdm = importlib.util.find_spec("tqdm") is not None
+if has_tqdm:
+    from tqdm import tqdm
+
+STATE_FILE = "dag_scheduler_state.json"
+
+# run.py arguments and log file suffixes of the stages
+_STAGES = {
+    "gmsh": (["--only-gmsh"], "Gmsh"),
+    "elmergrid": (["--only-elmergrid"], "ElmerGrid"),
+    "sifs": (["--only-elmer-sifs"], "Elmer_sifs"),
+    "elmer": (["--only-elmer"], "ElmerSolver"),
+    "paraview": (["--only-paraview"], "Paraview"),
+    "results": (["--write-project-results"], "write_project_results"),
+}
+
+
+@dataclass
+class Task:
+    """A single stage of a simulation run with ``run.py``."""
+
+    name: str
+    json_filename: str
+    stage: str
+    cpus: int = 1
+    memory: float = 0.0
+    env: dict[str, str] = field(default_factory=dict)
+    deps: list[str] = field(default_factory=list)
+    priority: int = 0
+
+    def command(self, run_script: Path | str) -> list[str]:
+        return [sys.executable, str(run_script), self.json_filename, *_STAGES[self.stage][0]]
+
+    def log_file(self, simulation_name: str) -> Path:
+        return Path("log_files") / f"{simulation_name}.{_STAGES[self.stage][1]}.log"
+
+
+def parse_memory(mem: str | float | int | None) -> float:
+    """Returns memory in bytes from a number of bytes or a string with suffix K, M, G or T, e.g. ``"64G"``."""
+    if not mem:
+        return 0.0
+    if isinstance(mem, str):
+        suffixes = {"K": 1e3, "M": 1e6, "G": 1e9, "T": 1e12}
+        mem = mem.strip().upper()
+        return float(mem[:-1]) * suffixes[mem[-1]] if mem[-1] in suffixes else float(mem)
+    return float(mem)
+
+
+def get_machine_memory() -> float:
+    """Returns the physical memory of the machine in bytes, or infinity if it cannot be determined."""
+    try:
+        return float(os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES"))
+    except (AttributeError, ValueError, OSError):
+        return float("inf")
+
+
+def build_tasks(json_filenames: list[str]) -> dict[str, Task]:
+    """Returns the stage tasks of the given simulation json files as dictionary ``{task name: task}``."""
+    json_data = {}
+    for json_filename in json_filenames:
+        with open(json_filename, encoding="utf-8") as f:
+            json_data[json_filename] = json.load(f)
+
+    # the mesh is produced by the simulation named after the mesh, or by the first simulation using it
+    mesh_owners = {}
+    for json_filename, data in json_data.items():
+        if data["mesh_name"] == data["name"] or data["mesh_name"] not in mesh_owners:
+            mesh_owners[data["mesh_name"]] = json_filename
+
+    tasks = {}
+
+    def add(task):
+        tasks[task.name] = task
+
+    for mesh_name, json_filename in mesh_owners.items():
+        workflow = json_data[json_filename]["workflow"]
+        add(
+            Task(
+                f"gmsh:{mesh_name}",
+                json_filename,
+                "gmsh",
+                cpus=max(int(workflow.get("gmsh_n_threads", 1)), 1),
+                memory=parse_memory(workflow.get("gmsh_mem")),
+            )
+        )
+        add(Task(f"elmergrid:{mesh_name}", json_filename, "elmergrid", deps=[f"gmsh:{mesh_name}"]))
+
+    for json_filename, data in json_data.items():
+        name, workflow = data["name"], data["workflow"]
+        n_processes = max(int(workflow.get("elmer_n_processes", 1)), 1)
+        n_threads = max(int(workflow.get("elmer_n_threads", 1)), 1)
+        n_parallel = int(workflow.get("n_workers", 1)) if workflow.get("_parallelization_level") == "elmer" else 1
+        add(Task(f"sifs:{name}", json_filename, "sifs", deps=[f"elmergrid:{data['mesh_name']}"]))
+        add(
+            Task(
+                f"elmer:{name}",
+                json_filename,
+                "elmer",
+                cpus=max(n_parallel, 1) * n_processes * n_threads,
+                memory=max(n_parallel, 1) * parse_memory(workflow.get("elmer_mem")),
+                env={"OMP_NUM_THREADS": str(n_threads)},
+                deps=[f"sifs:{name}"],
+            )
+        )
+        results_deps = [f"elmer:{name}"]
+        if workflow.get("run_paraview", False):
+            add(Task(f"paraview:{name}", json_filename, "paraview", deps=[f"elmer:{name}"]))
+            results_deps.append(f"paraview:{name}")
+        add(Task(f"results:{name}", json_filename, "results", deps=results_deps))
+
+    # priority is the number of tasks that depend on the task directly or indirectly
+    dependents = {n: set() for n in tasks}
+    for task in tasks.values():
+        for dep in task.deps:
+            dependents[dep].add(task.name)
+
+    memo = {}
+
+    def all_dependents(n):
+        if n not in memo:
+            memo[n] = set(dependents[n]).union(*(all_dependents(d) for d in dependents[n]))
+        return memo[n]
+
+    for task in tasks.values():
+        task.priority = len(all_dependents(task.name))
+    return tasks
+
+
+def read_manifest(manifest_file: Path | str) -> list[str]:
+    """Returns the simulation json files listed in a manifest file, one per line. Empty lines are ignored."""
+    with open(manifest_file, encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def _state_fingerprint(tasks: dict[str, Task]) -> str:
+    """Returns a hash of the names and modification times of the simulation json files of the tasks."""
+    json_filenames = sorted({task.json_filename for task in tasks.values()})
+    files = [(json_filename, os.stat(json_filename).st_mtime_ns) for json_filename in json_filenames]
+    return hashlib.sha256(json.dumps(files).encode("utf-8")).hexdigest()
+
+
+def _load_state(state_file: Path, fingerprint: str) -> set[str]:
+    if not state_file.exists():
+        return set()
+    try:
+        with open(state_file, encoding="utf-8") as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        logging.warning(f"Ignoring unreadable scheduler state file {state_file}")
+        return set()
+    if not isinstance(state, dict) or state.get("fingerprint") != fingerprint:
+        logging.info(f"Ignoring scheduler state file {state_file} of other simulation files")
+        return set()
+    return set(state.get("done", []))
+
+
+def _save_state(state_file: Path, fingerprint: str, done: set[str]) -> None:
+    tmp_file = state_file.with_suffix(".tmp")
+    with open(tmp_file, "w", encoding="utf-8") as f:
+        json.dump({"fingerprint": fingerprint, "done": sorted(done)}, f, indent=4)
+    os.replace(tmp_file, state_file)  # atomic, so that a crash never leaves a partial state file
+
+
+def run_tasks(
+    tasks: dict[str, Task],
+    cpus: int,
+    memory: float = float("inf"),
+    run_script: Path | str = Path(__file__).parent / "run.py",
+    state_file: Path | str = STATE_FILE,
+    poll_interval: float = 0.2,
+) -> set[str]:
+    """Runs the tasks respecting their dependencies and the available resources.
+
+    Args:
+        tasks: dictionary of tasks from ``build_tasks``
+        cpus: number of CPUs available for the tasks
+        memory: memory available for the tasks in bytes
+        run_script: path of ``run.py``
+        state_file: file where finished tasks are recorded. Tasks recorded in it are not run again, unless the
+            simulation json files have been modified after the state file was written.
+        poll_interval: time in seconds between checks of finished tasks
+
+    Returns:
+        names of the tasks that failed or were skipped due to a failed dependency
+    """
+    state_file = Path(state_file)
+    fingerprint = _state_fingerprint(tasks)
+    done = _load_state(state_file, fingerprint) & tasks.keys()
+    if done:
+        logging.info(f"Resuming with {len(done)}/{len(tasks)} tasks already finished")
+    failed = set()
+    running = {}
+    sim_names = {}
+    for task in tasks.values():
+        if task.json_filename not in sim_names:
+            with open(task.json_filename, encoding="utf-8") as f:
+                sim_names[task.json_filename] = json.load(f)["name"]
+
+    progress_bar = tqdm(total=len(tasks), initial=len(done), unit="task") if has_tqdm else None
+    Path("log_files").mkdir(exist_ok=True)
+
+    while True:
+        # skip tasks with failed dependencies
+        for task in tasks.values():
+            if task.name not in failed and any(d in failed for d in task.deps):
+                logging.warning(f"Skipping {task.name} due to failed dependency")
+                failed.add(task.name)
+                if progress_bar is not None:
+                    progress_bar.update()
+
+        # start ready tasks that fit into the free resources
+        free_cpus = cpus - sum(t.cpus for t, _, _ in running.values())
+        free_memory = memory - sum(t.memory for t, _, _ in running.values())
+        ready = [
+            t
+            for t in tasks.values()
+            if t.name not in done and t.name not in failed and t.name not in running and set(t.deps) <= done
+        ]
+        for task in sorted(ready, key=lambda t: (-t.priority, -t.cpus)):
+            # tasks larger than the machine are run alone
+            task_cpus, task_memory = min(task.cpus, cpus), min(task.memory, memory)
+            if task_cpus <= free_cpus and task_memory <= free_memory:
+                log = open(  # pylint: disable=consider-using-with
+                    task.log_file(sim_names[task.json_filename]), "a", encoding="utf-8"
+                )
+                process = subprocess.Popen(  # pylint: disable=consider-using-with
+                    task.command(run_script),
+                    stdout=log,
+                    stderr=subprocess.STDOUT,
+                    env={**os.environ, **task.env},
+                )
+                running[task.name] = (task, process, log)
+                free_cpus -= task_cpus
+                free_memory -= task_memory
+                logging.info(f"Started {task.name}")
+
+        if not running:
+            break
+
+        # wait until at least one task finishes
+        finished = []
+        while not finished:
+            time.sleep(poll_interval)
+            finished = [n for n, (_, p, _) in running.items() if p.poll() is not None]
+        for name in finished:
+            _, process, log = running.pop(name)
+            log.close()
+            if process.returncode == 0:
+                done.add(name)
+                _save_state(state_file, fingerprint, done)
+                logging.info(f"Finished {name}")
+            else:
+                failed.add(name)
+                logging.warning(f"Task {name} exited with code {process.returncode}")
+            if progress_bar is not None:
+                progress_bar.update()
+
+    if progress_bar is not None:
+        progress_bar.close()
+    return failed
+
+
+_description = """
+Run exported Elmer simulations locally by scheduling Gmsh, ElmerGrid, ElmerSolver and post-processing stages of all
+simulations as separate tasks. Shared meshes are produced only once. An interrupted run is resumed from the state file.
+"""
+
+parser = argparse.ArgumentParser(description=_description, epilog="A progress bar is shown if `tqdm` is installed.")
+parser.add_argument("simulations", metavar="json", type=str, nargs="*", help="Simulation json files")
+parser.add_argument(
+    "--manifest", type=str, default=None, help="Text file listing simulation json files, one per line, in addition"
+)
+parser.add_argument("--cpus", type=int, default=None, help="Number of CPUs to use (default: all)")
+parser.add_argument("--memory", type=str, default=None, help="Memory to use, e.g. 64G (default: all)")
+parser.add_argument("--restart", action="store_true", help="Ignore the state file and run all tasks")
+
+if __name__ == "__main__":
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    json_files = args.simulations + (read_manifest(args.manifest) if args.manifest else [])
+    if not json_files:
+        parser.error("no simulation json files given")
+    if args.restart:
+        Path(STATE_FILE).unlink(missing_ok=True)
+    failed_tasks = run_tasks(
+        build_tasks(json_files),
+        cpus=args.cpus or os.cpu_count() or 1,
+        memory=parse_memory(args.memory) or get_machine_memory(),
+    )
+    if failed_tasks:
+        logging.warning(f"{len(failed_tasks)} tasks failed or were skipped: {', '.join(sorted(failed_tasks))}")
+        sys.exit(1)
@@ -17,6 +17,7 @@
 # and organizations (meetiqm.com/iqm-organization-contributor-license-agreement).
 # pylint: disable=too-many-lines
 import csv
+import math
 import re
 import json
 import logging
@@ -636,7 +637,7 @@ def get_result_output_solver(ordinate: str | int, output_file_name: str | Path,
 def get_save_data_solver(
     ordinate: str | int,
     result_file: str = "results.dat",
-    save_coordinates: list[list] | None = None,
+    save_coordinates: list[list] | np.ndarray | None = None,
     coordinate_file: str | None = None,
 ) -> str:
     """
@@ -645,7 +646,7 @@ def get_save_data_solver(
     Args:
         ordinate: solver ordinate
         result_file: data file name for results
-        save_coordinates: list of coordinates to extract the field values at
+        save_coordinates: list or array of coordinates to extract the field values at
         coordinate_file: If provided, writes the coordinates in an additional file instead of
                           the sif file.
 
@@ -658,7 +659,7 @@ def get_save_data_solver(
         'Procedure = "SaveData" "SaveScalars"',
         f"Filename = {result_file}",
     ]
-    if save_coordinates:
+    if save_coordinates is not None and len(save_coordinates) > 0:
         if coordinate_file:
             np.savetxt(coordinate_file, np.array(save_coordinates))
             coords_str = f'Real \n   include "{coordinate_file}"'
@@ -1660,6 +1661,22 @@ def sif_wave_equation(
     return header + constants + matc_blocks + solvers + equations + materials + bodies + boundary_conditions
 
 
+def _read_square_matrix(filename: str | Path) -> np.ndarray:
+    """Reads a whitespace separated square matrix written by Elmer"""
+    data = np.fromfile(filename, sep=" ")
+    n = math.isqrt(data.size)
+    if n * n != data.size:
+        raise ValueError(f"Matrix in {filename} is not square ({data.size} elements)")
+    return data.reshape((n, n))
+
+
+def _smatrix_from_components(s_matrix_re: np.ndarray, s_matrix_im: np.ndarray, polar_form: bool) -> np.ndarray:
+    """Stacks real and imaginary parts into an array with the components in the last axis"""
+    if polar_form:
+        return np.stack((np.hypot(s_matrix_re, s_matrix_im), np.degrees(np.arctan2(s_matrix_im, s_matrix_re))), axis=-1)
+    return np.stack((s_matrix_re, s_matrix_im), axis=-1)
+
+
 def read_result_smatrix(s_matrix_filename: str | Path, path: Path | None = None, polar_form: bool = True) -> np.ndarray:
     """
     Read Elmer Smatrix output and transform the entries to polar format
@@ -1676,26 +1693,78 @@ def read_result_smatrix(s_matrix_filename: str | Path, path: Path | None = None,
     if not Path(s_matrix_filename).exists() and path is not None:
         s_matrix_filename = path.joinpath(s_matrix_filename)
 
-    with open(s_matrix_filename, "r", encoding="utf-8") as file:
-        reader = csv.reader(file, delimiter=" ", skipinitialspace=True, quoting=csv.QUOTE_NONNUMERIC)
-        s_matrix_re = np.array([[x for x in row if isinstance(x, float)] for row in reader])
+    s_matrix_re = _read_square_matrix(s_matrix_filename)
+    s_matrix_im = _read_square_matrix(str(s_matrix_filename) + "_im")
+    return _smatrix_from_components(s_matrix_re, s_matrix_im, polar_form)
 
-    with open(str(s_matrix_filename) + "_im", "r", encoding="utf-8") as file:
-        reader = csv.reader(file, delimiter=" ", skipinitialspace=True, quoting=csv.QUOTE_NONNUMERIC)
-        s_matrix_im = np.array([[x for x in row if isinstance(x, float)] for row in reader])
 
-    if polar_form:
-        s_matrix_mag = np.hypot(s_matrix_re, s_matrix_im)
-        s_matrix_angle = np.degrees(np.arctan2(s_matrix_im, s_matrix_re))
+def read_result_smatrices(
+    simname: str, frequencies: list[float] | np.ndarray, path: Path, polar_form: bool = True
+) -> np.ndarray:
+    """
+    Read Elmer Smatrix outputs of all given frequencies into a single array
 
-    smatrix_full = np.zeros(s_matrix_re.shape + (2,))
-    for i1, i2 in np.ndindex(s_matrix_re.shape):
-        if polar_form:
-            smatrix_full[i1, i2, :] = np.array((s_matrix_mag[i1, i2], s_matrix_angle[i1, i2]))
-        else:
-            smatrix_full[i1, i2, :] = np.array((s_matrix_re[i1, i2], s_matrix_im[i1, i2]))
+    Args:
+        simname: simulation name used in the Smatrix file names
+        frequencies: frequencies of the Smatrix files to read
+        path: folder containing the Smatrix files
+        polar_form: Transform the entries to polar form. Defaults to True.
+
+    Returns:
+        np.array: Smatrices in the form S[freq, row, col, component]
+    """
+    if len(frequencies) == 0:
+        return np.zeros((0, 0, 0, 2))
+    filenames = [Path(path) / _get_smatrix_filename(simname, f) for f in frequencies]
+    s_matrix_re = np.stack([_read_square_matrix(f) for f in filenames])
+    s_matrix_im = np.stack([_read_square_matrix(f"{f}_im") for f in filenames])
+    return _smatrix_from_components(s_matrix_re, s_matrix_im, polar_form)
+
+
+def write_smatrix_npz(
+    filename: str | Path,
+    frequencies: list[float] | np.ndarray,
+    smatrix_arr: np.ndarray,
+    polar_form: bool = True,
+    renormalization: float = 50,
+    port_data: list[str] | None = None,
+) -> None:
+    """
+    Write Smatrix results into a binary numpy .npz file. Takes the same arguments as "write_snp_file".
+
+    The file contains arrays `frequencies`, `smatrix` (S[freq, row, col, component]), `polar_form`,
+    `renormalization` and `port_data`, and can be read with "read_smatrix_npz".
+    """
+    if len(frequencies) != len(smatrix_arr):
+        raise RuntimeError("Different number of frequencies and smatrix results in write_smatrix_npz")
+    np.savez(
+        filename,
+        frequencies=np.asarray(frequencies, dtype=float),
+        smatrix=np.asarray(smatrix_arr, dtype=float),
+        polar_form=polar_form,
+        renormalization=renormalization,
+        port_data=np.array(port_data or [], dtype=str),
+    )
 
-    return smatrix_full
+
+def read_smatrix_npz(filename: str | Path) -> tuple[np.ndarray, np.ndarray, bool, float, list[str]]:
+    """
+    Read Smatrix results saved by "write_smatrix_npz"
+
+    Args:
+        filename: npz filename to read
+
+    Returns:
+        tuple containg all inputs of "write_smatrix_npz" except filename, in the same format as "read_snp_file"
+    """
+    with np.load(filename) as data:
+        return (
+            data["frequencies"],
+            data["smatrix"],
+            bool(data["polar_form"]),
+            float(data["renormalization"]),
+            data["port_data"].tolist(),
+        )
 
 
 def read_elmer_results(result_file: Path | str):
@@ -1810,15 +1879,15 @@ def write_snp_file(
         else:
             touchstone_file.write("! Port: No port data given\n")
 
-        for freq, smatrix_full in zip(frequencies, smatrix_arr):
-            for row_ind, row in enumerate(smatrix_full):
-                if row_ind == 0:
-                    touchstone_file.write(f"{str(freq):30s} ")
-                else:
-                    touchstone_file.write(f"{' ':30s} ")
-                for elem in row:
-                    touchstone_file.write(f"{str(elem[0]):25s} {str(elem[1]):35s}")
-                touchstone_file.write("\n")
+        # convert to Python floats once, and write all rows at a time
+        lines = [
+            f"{str(freq) if row_ind == 0 else ' ':30s} "
+            + "".join(f"{str(elem[0]):25s} {str(elem[1]):35s}" for elem in row)
+            + "\n"
+            for freq, smatrix_full in zip(np.asarray(frequencies).tolist(), np.asarray(smatrix_arr).tolist())
+            for row_ind, row in enumerate(smatrix_full)
+        ]
+        touchstone_file.writelines(lines)
 
 
 def read_snp_file(filename: str | Path) -> tuple[np.ndarray, np.ndarray, bool, float, list[str]]:
@@ -1872,10 +1941,7 @@ def read_snp_file(filename: str | Path) -> tuple[np.ndarray, np.ndarray, bool, f
         frequencies[i] = data[n_ports * i][0]
         data[n_ports * i] = data[n_ports * i][1:]
 
-    smatrix_arr = np.zeros([n_matrices, n_ports, n_ports, 2])
-
-    for i, row, col, comp in np.ndindex(smatrix_arr.shape):
-        smatrix_arr[i, row, col, comp] = data[n_ports * i + row][2 * col + comp]
+    smatrix_arr = np.array(data, dtype=float).reshape((n_matrices, n_ports, n_ports, 2))
 
     return frequencies, smatrix_arr, polar_form, renormalization, port_data
 
@@ -1886,7 +1952,8 @@ def write_project_results_json(json_data: dict[str, Any], path: Path, polar_form
 
     If tool is capacitance, writes capacitance matrix
     If tool is epr_3d or capacitance with integrate energies=True, writes energies
-    If tool is wave_equation, writes S-matrix both in '_project_results.json' and touchstone format
+    If tool is wave_equation, writes S-matrix both in '_project_results.json' and touchstone format, and as arrays
+    in a binary '_project_results.npz' sidecar (see "write_smatrix_npz")
 
     Args:
         json_data: Complete parameter json for simulation
@@ -1945,25 +2012,22 @@ def write_project_results_json(json_data: dict[str, Any], path: Path, polar_form
 
         renormalization = renormalizations[0]
 
-        smatrix_arr = np.zeros([len(frequencies), len(ports), len(ports), 2])
-        results_list = []
-        for f_ind, f in enumerate(frequencies):
-            smatrix_full = read_result_smatrix(
-                sif_folder / _get_smatrix_filename(simname, f),
-                polar_form=polar_form,
-            )
-            results_list.append(
-                {
-                    "frequency": f,
-                    "renormalization": renormalization,
-                    "format": "polar" if polar_form else "cartesian",
-                    "smatrix": smatrix_full.tolist(),
-                }
-            )
-            smatrix_arr[f_ind] = smatrix_full
+        if frequencies:
+            smatrix_arr = read_result_smatrices(simname, frequencies, sif_folder, polar_form=polar_form)
+        else:
+            smatrix_arr = np.zeros([0, len(ports), len(ports), 2])
+        results_list = [
+            {
+                "frequency": f,
+                "renormalization": renormalization,
+                "format": "polar" if polar_form else "cartesian",
+                "smatrix": smatrix_full,
+            }
+            for f, smatrix_full in zip(frequencies, smatrix_arr.tolist())
+        ]
 
         with open(result_json_path, "w", encoding="utf-8") as outfile:
-            json.dump(results_list, outfile, indent=4)
+            json.dump(results_list, outfile)
 
         # move Smatrix dat files to a separate folder
         data_folder = path.joinpath("elmer_data")
@@ -1986,6 +2050,14 @@ def write_project_results_json(json_data: dict[str, Any], path: Path, polar_form
             renormalization=renormalization,
             port_data=port_data,
         )
+        write_smatrix_npz(
+            path / f"{simname}_project_results.npz",
+            frequencies,
+            smatrix_arr,
+            polar_form=polar_form,
+            renormalization=renormalization,
+            port_data=port_data,
+        )
         filter_resonant_vtus(frequencies, smatrix_arr, sif_folder, simname, polar_form=polar_form)
 
 
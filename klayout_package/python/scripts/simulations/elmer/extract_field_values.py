@@ -53,17 +53,17 @@ def get_data_extraction_sif(
     json_data: dict,
     elmer_data_file: str,
     results_file: str,
-    points_list: list[dict[str, float]],
+    points: np.ndarray,
     restart_position: int = 1,
 ):
     """
     Get contents of Elmer solver input file (.sif) used for extracting the field data
 
-    Embeds the requested point coordinates `points_list` in the .sif
+    Embeds the requested point coordinates `points` (array of shape Nx2 or Nx3 in µm) in the .sif
     """
     dim = 2 if json_data["tool"] == "cross-section" else 3
 
-    if dim != len(points_list[0]):
+    if dim != points.shape[1]:
         logging.warning("Sampled coordinate dimensions and json dimensions do not match")
         sys.exit()
 
@@ -78,7 +78,7 @@ def get_data_extraction_sif(
         restart_position=restart_position,
     )
     unit = 1e-6
-    points_list = [[unit * vd["x"], unit * vd["y"]] + ([unit * vd["z"]] if dim == 3 else []) for vd in points_list]
+    points_list = unit * points
 
     # We do not run this solver, but need it for Elmer to correctly load the elemental field data
     solver = get_electrostatics_solver(json_data, 1, "f.dat", c_matrix_output=False, exec_solver="Never")
@@ -99,6 +99,17 @@ def get_data_extraction_sif(
     return header + solver + placeholders
 
 
+def load_points(values: str | list[dict[str, float]]) -> np.ndarray:
+    """
+    Loads the sampled points of a layer in `_tls_mc.json` file as an array of shape Nx2 or Nx3.
+
+    The points are given either as a name of `.npy` file, which is memory-mapped, or as a list of coordinate dicts.
+    """
+    if isinstance(values, str):
+        return np.load(values, mmap_mode="r")
+    return np.array([[vd[k] for k in ("x", "y", "z") if k in vd] for vd in values], dtype=float)
+
+
 def get_elmer_results(path: str | Path, tmp_results_file: str):
     """
     Reads the Elmer result data found in `path/tmp_results_file`.
@@ -216,13 +227,14 @@ for tls_file in tls_files:
         if face == "metadata":
             continue
         for layer, values in face_data.items():
-            if not values:
+            points = load_points(values)
+            if len(points) == 0:
                 continue
             for exc in excitations:
                 tmp_results_file = f"fields_{layer}_{face}_{exc}.dat"
                 sif_filename = f"field_extractor_{layer}_{face}_{exc}"
                 sif_contents = get_data_extraction_sif(
-                    json_data, elmer_data_file, tmp_results_file, values, restart_position=exc
+                    json_data, elmer_data_file, tmp_results_file, points, restart_position=exc
                 )
                 with open(Path(sim_folder) / f"{sif_filename}.sif", "w", encoding="utf-8") as f:
                     f.write(sif_contents)
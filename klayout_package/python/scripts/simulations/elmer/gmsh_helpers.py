@@ -17,12 +17,24 @@
 # and organizations (meetiqm.com/iqm-organization-contributor-license-agreement).
 import logging
 import itertools
+import json
 import re
+import time
+from collections import Counter
 from pathlib import Path
 from typing import Any, Sequence, Iterable
 import gmsh
 import numpy as np
 
+from mesh_cache import (
+    get_mesh_cache_dir,
+    get_mesh_cache_size,
+    get_cache_key,
+    hash_file,
+    fetch_from_cache,
+    store_in_cache,
+)
+
 try:
     import pya
 except ImportError:
@@ -34,6 +46,20 @@ MESH_LAYER_PREFIX = "elmer_prefix_"
 # type alias for dimtag
 DimTag = tuple[int, int]
 
+# values of workflow key ``mesh_format`` and corresponding values of Gmsh option ``Mesh.Binary``
+MESH_FORMATS = {"text": 0, "binary": 1}
+
+# mesh statistics stored in the mesh summary file and corresponding read-only Gmsh options
+_MESH_SUMMARY_OPTIONS = {
+    "nodes": "Mesh.NbNodes",
+    "triangles": "Mesh.NbTriangles",
+    "quadrangles": "Mesh.NbQuadrangles",
+    "tetrahedra": "Mesh.NbTetrahedra",
+    "hexahedra": "Mesh.NbHexahedra",
+    "prisms": "Mesh.NbPrisms",
+    "pyramids": "Mesh.NbPyramids",
+}
+
 
 def get_metal_layers(layers):
     return {k: v for k, v in layers.items() if "excitation" in v}
@@ -60,9 +86,6 @@ def produce_mesh(json_data: dict[str, Any], msh_file: Path) -> None:
         logging.info(f"Reusing existing mesh from {str(msh_file)}")
         return
 
-    # Initialize gmsh
-    gmsh.initialize()
-
     # Read geometry from gds file
     layout = pya.Layout()
     layout.read(json_data["gds_file"])
@@ -79,6 +102,19 @@ def produce_mesh(json_data: dict[str, Any], msh_file: Path) -> None:
     else:
         bbox = cell.bbox()
 
+    # Reuse mesh from the user-level mesh cache if an equal mesh has been produced earlier
+    workflow = json_data.get("workflow", {})
+    cache_dir = get_mesh_cache_dir(workflow)
+    cache_key = get_mesh_cache_key(json_data, layout, cell, bbox) if cache_dir else None
+    summary_cache_key = get_cache_key(cache_key, "summary") if cache_dir else None
+    if fetch_from_cache(cache_dir, cache_key, msh_file):
+        fetch_from_cache(cache_dir, summary_cache_key, get_mesh_summary_file(msh_file))
+        return
+
+    # Initialize gmsh
+    gmsh.initialize()
+    timer = PhaseTimer()
+
     # Create mesh using geometries in gds file
     gmsh.model.add("3D-mesh")
     dim_tags = {}
@@ -93,29 +129,8 @@ def produce_mesh(json_data: dict[str, Any], msh_file: Path) -> None:
         else:
             reg = pya.Region(bbox)
 
-        # Convert layer region to polygons
-        layer_dim_tags = []
-        layer_edge_ids = []
-        for simple_poly in reg.each():
-            poly = separated_hull_and_holes(simple_poly)
-            hull_point_coordinates = [
-                (point.x * layout.dbu, point.y * layout.dbu, 0) for point in poly.each_point_hull()
-            ]
-            hull_plane_surface_id, hull_edge_ids = add_polygon(hull_point_coordinates)
-            layer_edge_ids += hull_edge_ids
-            hull_dim_tag = (2, hull_plane_surface_id)
-            hole_dim_tags = []
-            for hole in range(poly.holes()):
-                hole_point_coordinates = [
-                    (point.x * layout.dbu, point.y * layout.dbu, 0) for point in poly.each_point_hole(hole)
-                ]
-                hole_plane_surface_id, hole_edge_ids = add_polygon(hole_point_coordinates)
-                layer_edge_ids += hole_edge_ids
-                hole_dim_tags.append((2, hole_plane_surface_id))
-            if hole_dim_tags:
-                layer_dim_tags += gmsh.model.occ.cut([hull_dim_tag], hole_dim_tags)[0]
-            else:
-                layer_dim_tags.append(hull_dim_tag)
+        # Convert layer region to plane surfaces
+        layer_dim_tags = add_region_surfaces(reg, layout.dbu)
 
         # Move to correct height
         z = data.get("z", 0.0)
@@ -138,14 +153,19 @@ def produce_mesh(json_data: dict[str, Any], msh_file: Path) -> None:
                 # add port polygon and store its dim_tag
                 surface_id, _ = add_polygon(port["polygon"])
                 dim_tags[f'port_{port["number"]}'] = [(2, surface_id)]
+    timer.lap("import")
 
-    # Subtract layers
+    # Use multi-threaded OpenCASCADE boolean operations if Gmsh is given several threads
+    if int(workflow.get("gmsh_n_threads", 1)) > 1:
+        gmsh.option.setNumber("Geometry.OCCParallel", 1)
+
+    # Subtract layers. The model is synchronized only once after the fragment.
     for name, data in layers.items():
         subtract = data.get("subtract", [])
         if subtract:
             tool_dim_tags = [t for n in subtract for t in dim_tags[n]]
             dim_tags[name] = gmsh.model.occ.cut(dim_tags[name], tool_dim_tags, removeTool=False)[0]
-            gmsh.model.occ.synchronize()
+    timer.lap("booleans")
 
     # Call fragment and get updated dim_tags as new_tags. Then synchronize.
     all_dim_tags = [tag for tags in dim_tags.values() for tag in tags]
@@ -155,10 +175,10 @@ def produce_mesh(json_data: dict[str, Any], msh_file: Path) -> None:
         name: [new_tag for old_tag in tags for new_tag in dim_tags_map[old_tag]] for name, tags in dim_tags.items()
     }
     gmsh.model.occ.synchronize()
+    timer.lap("fragment")
 
     # Set meshing
     mesh_size = json_data.get("mesh_size", {})
-    workflow = json_data.get("workflow", {})
     set_meshing(mesh_size, new_tags, workflow)
 
     # Remove layers without material
@@ -199,9 +219,9 @@ def produce_mesh(json_data: dict[str, Any], msh_file: Path) -> None:
     # Set domain boundary as ground
     solid_dts = [(d, t) for dts in new_tags.values() for d, t in dts if d == 3]
     face_dts = [(d, t) for dt in solid_dts for d, t in get_recursive_children([dt]) if d == 2]
-    new_tags["domain_boundary"] = [
-        d for d in face_dts if face_dts.count(d) == 1 and d not in edge_ports_dts.union(metal_boundary_dts)
-    ]
+    face_counts = Counter(face_dts)
+    excluded_dts = edge_ports_dts.union(metal_boundary_dts)
+    new_tags["domain_boundary"] = [d for d in face_dts if face_counts[d] == 1 and d not in excluded_dts]
 
     # Create physical groups from each object in new_tags
     for name, dts in new_tags.items():
@@ -216,13 +236,21 @@ def produce_mesh(json_data: dict[str, Any], msh_file: Path) -> None:
         if boundary_tags[n1].intersection(boundary_tags[n2]):
             logging.warning(f"Detected overlapping mesh boundaries: {n1} and {n2}")
 
+    timer.lap("mesh_setup")
+
     # Generate and save mesh
     gmsh.model.mesh.generate(1)
+    timer.lap("mesh_1d")
     gmsh.model.mesh.generate(2)
+    timer.lap("mesh_2d")
     gmsh.model.mesh.generate(3)
+    timer.lap("mesh_3d")
 
     optimize_mesh(json_data.get("mesh_optimizer"))
-    gmsh.write(str(msh_file))
+    timer.lap("optimize")
+    write_mesh(msh_file, workflow, timer.timings)
+    store_in_cache(cache_dir, cache_key, msh_file, get_mesh_cache_size(workflow))
+    store_in_cache(cache_dir, summary_cache_key, get_mesh_summary_file(msh_file), get_mesh_cache_size(workflow))
 
     # Open mesh viewer
     if workflow.get("run_gmsh_gui", False):
@@ -231,6 +259,88 @@ def produce_mesh(json_data: dict[str, Any], msh_file: Path) -> None:
     gmsh.finalize()
 
 
+def get_mesh_cache_key(json_data: dict[str, Any], layout: pya.Layout, cell: pya.Cell, bbox: pya.Box) -> str:
+    """
+    Returns the mesh cache key of `produce_mesh`.
+
+    The key is a hash of the layer geometry inside bbox, the layer definitions, mesh settings, ports, Gmsh version, and
+    the source code of this module. Names of the simulation and layer numbers do not affect the key.
+
+    Args:
+        json_data: all the model data produced by `export_elmer_json`
+        layout: layout read from the gds file
+        cell: top cell of the layout
+        bbox: limiting boundary box of the mesh
+
+    Returns:
+        cache key string
+    """
+    layers = {}
+    for name, data in json_data["layers"].items():
+        layers[name] = {k: v for k, v in data.items() if k != "layer"}
+        if "layer" in data:
+            reg = pya.Region(cell.shapes(layout.layer(data["layer"], 0))) & bbox
+            layers[name]["shapes"] = sorted(p.to_s() for p in reg.merged().each())
+    return get_cache_key(
+        "gmsh",
+        gmsh.__version__,
+        hash_file(__file__),
+        layout.dbu,
+        bbox.to_s(),
+        layers,
+        json_data["tool"],
+        json_data["ports"],
+        json_data.get("mesh_size", {}),
+        json_data.get("mesh_optimizer"),
+        get_mesh_format(json_data.get("workflow", {})),
+    )
+
+
+def get_mesh_format(workflow: dict[str, Any]) -> str:
+    """Returns the mesh file format of the workflow, ``"text"`` by default.
+
+    The format is given by workflow key ``mesh_format``, which is either ``"text"`` or ``"binary"``.
+    """
+    mesh_format = workflow.get("mesh_format", "text")
+    if mesh_format not in MESH_FORMATS:
+        raise ValueError(f"Unknown mesh_format {mesh_format}, expected one of {list(MESH_FORMATS)}")
+    return mesh_format
+
+
+def get_mesh_summary_file(msh_file: Path | str) -> Path:
+    """Returns the path of the mesh summary file written next to the mesh file by `write_mesh`."""
+    msh_file = Path(msh_file)
+    return msh_file.with_name(f"{msh_file.stem}_mesh_summary.json")
+
+
+def write_mesh(msh_file: Path | str, workflow: dict[str, Any], timings: dict[str, float] | None = None) -> None:
+    """
+    Writes the current Gmsh mesh into msh_file and a mesh summary next to it.
+
+    The mesh is written in MSH4 format, as text or binary depending on workflow key ``mesh_format``. The summary file
+    contains the mesh format, the mesh file size and the numbers of nodes and elements, so that the element counts can
+    be used without parsing the mesh file, even after the mesh file has been removed.
+
+    Args:
+        msh_file: mesh file name
+        workflow: workflow parameters
+        timings: optional durations of the mesh generation phases in seconds, stored in the summary as ``timings``
+    """
+    mesh_format = get_mesh_format(workflow)
+    gmsh.option.setNumber("Mesh.Binary", MESH_FORMATS[mesh_format])
+    gmsh.write(str(msh_file))
+
+    summary = {
+        "mesh_format": mesh_format,
+        "file_size": Path(msh_file).stat().st_size,
+        **{name: int(gmsh.option.getNumber(option)) for name, option in _MESH_SUMMARY_OPTIONS.items()},
+    }
+    if timings is not None:
+        summary["timings"] = timings
+    with open(get_mesh_summary_file(msh_file), "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=4)
+
+
 def optimize_mesh(mesh_optimizer: dict | None) -> None:
     """Optimize the mesh if the mesh_optimizer is a dictionary. Ignore mesh optimization if mesh_optimizer is None."""
     if mesh_optimizer is None:
@@ -275,6 +385,58 @@ def add_polygon(point_coordinates: Sequence[Sequence[float]], mesh_size: float =
     return gmsh.model.occ.addPlaneSurface(loops), lines
 
 
+def add_region_surfaces(region: pya.Region, dbu: float) -> list[DimTag]:
+    """
+    Adds the polygons of a region as plane surfaces at z=0 in the OpenCASCADE model.
+
+    Vertices shared by the polygons are added only once, and the holes of a polygon are added as inner curve loops of
+    its surface, so no boolean operations are needed.
+
+    Args:
+        region: region of the polygons in database units
+        dbu: database unit
+
+    Returns:
+        list of dim_tags of the added surfaces
+    """
+    point_ids = {}
+
+    def add_curve_loop(points):
+        point_tags = []
+        for point in points:
+            key = (point.x, point.y)
+            if key not in point_ids:
+                point_ids[key] = gmsh.model.occ.addPoint(point.x * dbu, point.y * dbu, 0)
+            point_tags.append(point_ids[key])
+        lines = [gmsh.model.occ.addLine(point_tags[i - 1], point_tags[i]) for i in range(1, len(point_tags))]
+        lines.append(gmsh.model.occ.addLine(point_tags[-1], point_tags[0]))
+        return gmsh.model.occ.addCurveLoop(lines)
+
+    dim_tags = []
+    for simple_poly in region.each():
+        poly = separated_hull_and_holes(simple_poly)
+        # OpenCASCADE requires the holes to have the same orientation as the hull, unlike in KLayout
+        loops = [add_curve_loop(poly.each_point_hull())]
+        loops += [add_curve_loop(reversed(list(poly.each_point_hole(hole)))) for hole in range(poly.holes())]
+        dim_tags.append((2, gmsh.model.occ.addPlaneSurface(loops)))
+    return dim_tags
+
+
+class PhaseTimer:
+    """Measures wall-clock durations of consecutive phases and logs them."""
+
+    def __init__(self):
+        self.timings = {}
+        self._start = time.perf_counter()
+
+    def lap(self, phase: str) -> None:
+        """Records the time elapsed since the previous lap as the duration of the given phase."""
+        now = time.perf_counter()
+        self.timings[phase] = now - self._start
+        self._start = now
+        logging.info(f"Gmsh phase {phase}: {self.timings[phase]:.2f} s")
+
+
 def separated_hull_and_holes(polygon: pya.Polygon | pya.SimplePolygon) -> pya.Polygon | pya.SimplePolygon:
     """Returns Polygon with holes separated from hull. Takes Polygon or SimplePolygon as the argument."""
     bbox = polygon.bbox().enlarged(10, 10)
@@ -19,11 +19,12 @@
 
 import logging
 import importlib.util
-import copy
+from contextlib import nullcontext
+from multiprocessing.pool import Pool
 from typing import Any, Callable
 from pathlib import Path
-from elmer_helpers import read_result_smatrix, produce_sif_files, write_snp_file, read_snp_file
-from run_helpers import _run_elmer_solver
+from elmer_helpers import read_result_smatrices, produce_sif_files, write_snp_file, read_snp_file, read_smatrix_npz
+from run_helpers import ElmerSolverPool
 
 from scipy.signal import find_peaks, peak_prominences, peak_widths
 from scipy.optimize import curve_fit
@@ -98,6 +99,28 @@ def rational_fit(
     return (residual, func)
 
 
+def _fit_residual(args: tuple[np.ndarray, np.ndarray, int, int]) -> float:
+    """Returns the residual of ``rational_fit(*args)``. Can be run in a process pool, unlike the fitted functions."""
+    return rational_fit(*args)[0]
+
+
+def _cache_evaluations(func: Callable[[np.ndarray], np.ndarray]) -> Callable[[np.ndarray], np.ndarray]:
+    """Wraps ``func`` to reuse the results of earlier calls with an equal argument array.
+
+    The returned arrays are shared between the calls and must not be modified.
+    """
+    cache = {}
+
+    def cached_func(x: np.ndarray) -> np.ndarray:
+        x = np.asarray(x)
+        key = (x.shape, x.dtype.str, x.tobytes())
+        if key not in cache:
+            cache[key] = func(x)
+        return cache[key]
+
+    return cached_func
+
+
 def sweep_orders_and_fit(
     f_all: np.ndarray,
     s_all: np.ndarray,
@@ -105,6 +128,9 @@ def sweep_orders_and_fit(
     max_num_order: int = 10,
     min_denom_order: int = 2,
     max_denom_order: int = 20,
+    initial_orders: tuple[int, int] | None = None,
+    order_window: int = 2,
+    pool: Pool | None = None,
 ) -> tuple[Callable[[np.ndarray], np.ndarray], tuple[int, int]]:
     """
     Args:
@@ -114,26 +140,56 @@ def sweep_orders_and_fit(
         max_num_order   : maximum order of the numerator of the fitted rational function
         min_denom_order : minimum order of the denominator of the fitted rational function
         max_denom_order : maximum order of the denominator of the fitted rational function
+        initial_orders  : Orders of a previous best fit, e.g. from the previous sweep iteration. If given, only orders
+                          within ``order_window`` of them are tried, and the window is moved towards smaller
+                          residuals until the best orders are not improved. If None, all orders are tried.
+        order_window    : Half width of the window of tried orders around ``initial_orders``
+        pool            : Optional multiprocessing pool used for fitting the orders in parallel
 
     Returns:
-        min_func: function of the best fit
+        min_func: function of the best fit. Evaluations of the function are cached.
         orders: orders of the numerator and denominator for the best fit
     """
-    min_residual, min_func, orders = float("inf"), None, None
-    for num_order in range(min_num_order, max_num_order + 1):
-        effective_len = len(f_all) if len(f_all) < 10 else len(f_all) // 2
-        cur_max_denom_order = min(effective_len - num_order - 1, max_denom_order + 1)
-        for denom_order in range(min_denom_order, cur_max_denom_order):
-            residual, func = rational_fit(f_all, s_all, num_order, denom_order)
-            if residual < min_residual:
-                min_residual = residual
-                min_func = func
-                orders = (num_order, denom_order)
-
-    if min_residual == float("inf"):
+    effective_len = len(f_all) if len(f_all) < 10 else len(f_all) // 2
+    all_orders = [
+        (num_order, denom_order)
+        for num_order in range(min_num_order, max_num_order + 1)
+        for denom_order in range(min_denom_order, min(effective_len - num_order - 1, max_denom_order + 1))
+    ]
+    order_index = {orders: i for i, orders in enumerate(all_orders)}
+    residuals = {}
+
+    def best_of(candidates):
+        # same tie-breaking as a serial sweep over all orders
+        return min(candidates, key=lambda o: (residuals[o], order_index[o]))
+
+    def fit(candidates):
+        new_orders = [o for o in candidates if o not in residuals]
+        args = [(f_all, s_all, *o) for o in new_orders]
+        residuals.update(zip(new_orders, pool.map(_fit_residual, args) if pool else map(_fit_residual, args)))
+
+    def window(center):
+        return [o for o in all_orders if max(abs(o[0] - center[0]), abs(o[1] - center[1])) <= order_window]
+
+    center = tuple(initial_orders) if initial_orders is not None else None
+    if center is None or not window(center):
+        fit(all_orders)
+    else:
+        while True:
+            candidates = window(center)
+            fit(candidates)
+            best = best_of(candidates)
+            if center in residuals and residuals[best] >= residuals[center]:
+                break
+            center = best
+
+    if not residuals or min(residuals.values()) == float("inf"):
         raise RuntimeError("Least squares fit failed with all orders in interpolated frequency sweep.")
+    orders = best_of(residuals)
 
-    return min_func, orders
+    # the fitted functions cannot be returned from the pool, so fit the best orders again
+    _, min_func = rational_fit(f_all, s_all, *orders)
+    return _cache_evaluations(min_func), orders
 
 
 def _sample_on_slope(
@@ -329,20 +385,42 @@ def interpolate_s_parameters_from_snp(
     """Interpolate S-matrix results from an snp file and save the interpolated result to another snp file
 
     Args:
-        simulated_snp: Path for the existing snp file
+        simulated_snp: Path for the existing snp file, or for the `.npz` file written by `write_smatrix_npz`
         interpolated_snp: Where to save the interpolated results
         interpolation_frequencies: Frequencies to interpolate at
         plot_results: Plot each interpolated S-matrix result
         image_folder: Folder where to save the plots as png images
     """
     interpolation_frequencies = np.array(interpolation_frequencies)
-    f_sim, s_sim, polar_form, renorm, port_data = read_snp_file(simulated_snp)
+    read_function = read_smatrix_npz if str(simulated_snp).endswith(".npz") else read_snp_file
+    f_sim, s_sim, polar_form, renorm, port_data = read_function(simulated_snp)
     s_int = interpolate_s_parameters(
         f_sim, s_sim, interpolation_frequencies, polar_form, plot_results=plot_results, image_folder=image_folder
     )
     write_snp_file(interpolated_snp, interpolation_frequencies, s_int, polar_form, renorm, port_data)
 
 
+def _save_fit_plot(
+    filename: str,
+    eval_freqs: np.ndarray,
+    s_mag_plot: np.ndarray,
+    f_all: np.ndarray,
+    s_mag_fit: np.ndarray,
+    cur_freqs: np.ndarray,
+    fit_index: int,
+) -> None:
+    """Saves a plot of the fitted S-matrix magnitude and the simulated points of one sweep iteration"""
+    fig, ax = plt.subplots()
+    ax.plot(eval_freqs, s_mag_plot)
+    ax.plot(f_all, s_mag_fit, "x")
+    for xc in cur_freqs:
+        ax.axvline(x=xc, color="r", ls="--", lw=0.5)
+    ax.set_xlabel("Frequency (GHz)")
+    ax.set_ylabel(f"S1{fit_index + 1} Mag")
+    fig.savefig(filename)
+    plt.close()
+
+
 def interpolating_frequency_sweep(
     json_data: dict[str, Any],
     exec_path_override: Path,
@@ -407,102 +485,107 @@ def interpolating_frequency_sweep(
     s_mag_fit = np.array([])
 
     f_all, s_all = np.array([]), np.array([])
-
-    while s_error > max_delta_s and iteration_count < max_iter:
-        if iteration_count == 1:
-            # First batch is sampled linearly and is 2 times larger than the next ones
-            cur_freqs = np.linspace(start_f, end_f, 2 * frequency_batch)
-        else:
-            if fit_magnitude:
-                prev_func_mag = prev_func_re
+    orders_re, orders_im = None, None
+
+    # the order sweeps use the processes reserved for the solver, which are idle while fitting
+    n_fit_processes = n_parallel_simulations * n_processes
+    pending_plot = None
+    with (
+        ElmerSolverPool(simname, n_parallel_simulations, n_processes, n_threads, exec_path_override) as solver_pool,
+        Pool(n_fit_processes) if n_fit_processes > 1 else nullcontext() as fit_pool,
+    ):
+        while s_error > max_delta_s and iteration_count < max_iter:
+            if iteration_count == 1:
+                # First batch is sampled linearly and is 2 times larger than the next ones
+                cur_freqs = np.linspace(start_f, end_f, 2 * frequency_batch)
             else:
+                if fit_magnitude:
+                    prev_func_mag = prev_func_re
+                else:
+
+                    def prev_func_mag(f):
+                        return np.hypot(prev_func_re(f), prev_func_im(f))
+
+                cur_freqs = _sample_on_slope(prev_func_mag, f_all, s_mag_fit, frequency_batch)
+
+            # create sifs, needs correct frequencies and sif names in json data. Sif creation does not modify json data,
+            # so a shallow copy is enough
+            sif_names = [simname + "_f" + str(f).replace(".", "_") for f in cur_freqs]
+            json_data_current_batch = {**json_data, "sif_names": sif_names, "frequency": cur_freqs.tolist()}
+            produce_sif_files(json_data_current_batch, exec_path_override.joinpath(simname))
+
+            # run elmer in the persistent pool and save the plot of the previous iteration while the batch is solved
+            jobs = solver_pool.submit(sif_names)
+            if pending_plot is not None:
+                _save_fit_plot(*pending_plot)
+                pending_plot = None
+            solver_pool.wait(jobs)
+
+            s_new = read_result_smatrices(simname, cur_freqs, exec_path_override.joinpath(simname), polar_form=False)
+            if iteration_count == 1:
+                s_all = s_new
+                f_all = cur_freqs
+            else:
+                s_all = np.concatenate((s_all, s_new))
+                f_all = np.concatenate((f_all, cur_freqs))
 
-                def prev_func_mag(f):
-                    return np.hypot(prev_func_re(f), prev_func_im(f))
-
-            cur_freqs = _sample_on_slope(prev_func_mag, f_all, s_mag_fit, frequency_batch)
-
-        # create sifs, needs correct frequencies and sif names in json data
-        json_data_current_batch = copy.deepcopy(json_data)
-        sif_names = [simname + "_f" + str(f).replace(".", "_") for f in cur_freqs]
-        json_data_current_batch["sif_names"] = sif_names
-        json_data_current_batch["frequency"] = cur_freqs.tolist()
-        produce_sif_files(json_data_current_batch, exec_path_override.joinpath(simname))
-
-        # run elmer
-        _run_elmer_solver(
-            sim_name=simname,
-            sif_names=sif_names,
-            n_parallel_simulations=n_parallel_simulations,
-            n_processes=n_processes,
-            n_threads=n_threads,
-            exec_path_override=exec_path_override,
-        )
+            sort_index = f_all.argsort()
+            f_all, s_all = f_all[sort_index], s_all[sort_index, :, :, :]
 
-        s_new_list = []
-        for f in cur_freqs:
-            smatrix_filaname = f'SMatrix_{simname}_f{str(f).replace(".", "_")}.dat'
-            s_new_list.append(
-                read_result_smatrix(smatrix_filaname, path=exec_path_override.joinpath(simname), polar_form=False)
-            )
+            s_mag_fit = np.hypot(s_all[:, 0, fit_index, 0], s_all[:, 0, fit_index, 1])
 
-        s_new = np.stack(s_new_list, axis=0)
-        if iteration_count == 1:
-            s_all = s_new
-            f_all = cur_freqs
-        else:
-            s_all = np.concatenate((s_all, s_new))
-            f_all = np.concatenate((f_all, cur_freqs))
+            if fit_magnitude:
+                min_func_re, orders_re = sweep_orders_and_fit(f_all, s_mag_fit, initial_orders=orders_re, pool=fit_pool)
+                min_func_im, orders_im = None, None
+            else:
+                min_func_re, orders_re = sweep_orders_and_fit(
+                    f_all, s_all[:, 0, fit_index, 0], initial_orders=orders_re, pool=fit_pool
+                )
+                min_func_im, orders_im = sweep_orders_and_fit(
+                    f_all, s_all[:, 0, fit_index, 1], initial_orders=orders_im, pool=fit_pool
+                )
 
-        sort_index = f_all.argsort()
-        f_all, s_all = f_all[sort_index], s_all[sort_index, :, :, :]
+            # error norm between the fitted function and previous fitted function on all frequencies. The evaluations
+            # of the fitted functions are cached, so each function is evaluated on eval_freqs only once.
+            if iteration_count > 1:
+                new_s = min_func_re(eval_freqs)
+                old_s = prev_func_re(eval_freqs)
+                s_error = np.mean(np.abs(new_s - old_s) / np.abs(new_s))
+
+                if not fit_magnitude:
+                    new_s = min_func_im(eval_freqs)
+                    old_s = prev_func_im(eval_freqs)
+                    s_error_im = np.mean(np.abs(new_s - old_s) / np.abs(new_s))
+                    s_error = (s_error + s_error_im) / 2
+                    logging.info(
+                        f"iteration: {iteration_count}, delta_s_re/im: {s_error}, orders: re {orders_re} im {orders_im}"
+                    )
+                else:
+                    logging.info(f"iteration: {iteration_count}, delta_s_mag: {s_error}, orders: mag {orders_re}")
 
-        s_mag_fit = np.hypot(s_all[:, 0, fit_index, 0], s_all[:, 0, fit_index, 1])
+            if fit_magnitude:
+                s_mag_plot = min_func_re(eval_freqs)
+                plot_filename = f"it_{iteration_count}_mag_{orders_re}.png"
+            else:
+                s_mag_plot = np.hypot(min_func_re(eval_freqs), min_func_im(eval_freqs))
+                plot_filename = f"it_{iteration_count}_re_{orders_re}_im_{orders_im}.png"
 
-        if fit_magnitude:
-            min_func_re, orders_re = sweep_orders_and_fit(f_all, s_mag_fit)
-            min_func_im, orders_im = None, None
-        else:
-            min_func_re, orders_re = sweep_orders_and_fit(f_all, s_all[:, 0, fit_index, 0])
-            min_func_im, orders_im = sweep_orders_and_fit(f_all, s_all[:, 0, fit_index, 1])
-
-        # error norm between the fitted function and previous fitted function on all frequencies
-        if iteration_count > 1:
-            new_s = min_func_re(eval_freqs)
-            old_s = prev_func_re(eval_freqs)
-            s_error = np.mean(np.abs(new_s - old_s) / np.abs(new_s))
-
-            if not fit_magnitude:
-                new_s = min_func_im(eval_freqs)
-                old_s = prev_func_im(eval_freqs)
-                s_error_im = np.mean(np.abs(new_s - old_s) / np.abs(new_s))
-                s_error = (s_error + s_error_im) / 2
-                logging.info(
-                    f"iteration: {iteration_count}, delta_s_re/im: {s_error}, orders: re {orders_re} im {orders_im}"
+            if plot_results:
+                pending_plot = (
+                    f"{image_folder}/{plot_filename}",
+                    eval_freqs,
+                    s_mag_plot,
+                    f_all,
+                    s_mag_fit,
+                    cur_freqs,
+                    fit_index,
                 )
-            else:
-                logging.info(f"iteration: {iteration_count}, delta_s_mag: {s_error}, orders: mag {orders_re}")
 
-        if fit_magnitude:
-            s_mag_plot = min_func_re(eval_freqs)
-            plot_filename = f"it_{iteration_count}_mag_{orders_re}.png"
-        else:
-            s_mag_plot = np.hypot(min_func_re(eval_freqs), min_func_im(eval_freqs))
-            plot_filename = f"it_{iteration_count}_re_{orders_re}_im_{orders_im}.png"
-
-        if plot_results:
-            fig, ax = plt.subplots()
-            ax.plot(eval_freqs, s_mag_plot)
-            ax.plot(f_all, s_mag_fit, "x")
-            for xc in cur_freqs:
-                ax.axvline(x=xc, color="r", ls="--", lw=0.5)
-            ax.set_xlabel("Frequency (GHz)")
-            ax.set_ylabel(f"S1{fit_index + 1} Mag")
-            fig.savefig(f"{image_folder}/{plot_filename}")
-            plt.close()
-
-        prev_func_re, prev_func_im = min_func_re, min_func_im
-        iteration_count += 1
+            prev_func_re, prev_func_im = min_func_re, min_func_im
+            iteration_count += 1
+
+    if pending_plot is not None:
+        _save_fit_plot(*pending_plot)
 
     if iteration_count == max_iter:
         logging.warning(f"Failed to converge in {max_iter} iterations")
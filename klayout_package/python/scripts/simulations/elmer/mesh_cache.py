@@ -0,0 +1,184 @@
+# This code is part of KQCircuits
+# Copyright (C) 2025 IQM Finland Oy
+#
+# This program is free software: you can redistribute it and/or modify it under the terms of the GNU General Public
+# License as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+# warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with this program. If not, see
+# https://www.gnu.org/licenses/gpl-3.0.html.
+#
+# The software distribution should follow IQM trademark policy for open-source software
+# (meetiqm.com/iqm-open-source-trademark-policy). IQM welcomes contributions to the code.
+# Please see our contribution agreements for individuals (meetiqm.com/iqm-individual-contributor-license-agreement)
+# and organizations (meetiqm.com/iqm-organization-contributor-license-agreement).
+
+"""User-level cache of meshes shared between simulation runs.
+
+Cache entries are directories ``<cache dir>/<key>/`` named by a sha256 key. Each entry contains the cached file or
+directory as ``data``. Cached files are hard-linked into place when possible, and cached directories are copied.
+Entries are evicted in least recently used order when the total size of the cache exceeds the size limit.
+
+The cache is configured with the following ``workflow`` keys:
+
+* ``mesh_cache_dir``: cache directory, e.g. ``~/.cache/kqcircuits/mesh_cache``. Defaults to environment variable
+  ``KQC_MESH_CACHE_DIR``. The cache is disabled if neither is set, or if the directory is ``None`` or empty string.
+* ``mesh_cache_size``: maximum total size of the cache in gigabytes, 20 by default.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import time
+from pathlib import Path
+from typing import Any
+
+DEFAULT_MESH_CACHE_SIZE = 20  # gigabytes
+
+# Bump this if the cached data changes in a way that is not visible in the cache keys
+MESH_CACHE_VERSION = 1
+
+_DATA_NAME = "data"
+
+
+def get_mesh_cache_dir(workflow: dict[str, Any]) -> Path | None:
+    """Returns the mesh cache directory of the workflow, or None if the cache is disabled."""
+    cache_dir = workflow.get("mesh_cache_dir", os.environ.get("KQC_MESH_CACHE_DIR"))
+    return Path(cache_dir).expanduser() if cache_dir else None
+
+
+def get_mesh_cache_size(workflow: dict[str, Any]) -> int:
+    """Returns the maximum size of the mesh cache of the workflow in bytes."""
+    return int(workflow.get("mesh_cache_size", DEFAULT_MESH_CACHE_SIZE) * 1e9)
+
+
+def get_cache_key(*data: Any) -> str:
+    """Returns a sha256 key for json serializable data."""
+    key_json = json.dumps([MESH_CACHE_VERSION, *data], sort_keys=True, default=str)
+    return hashlib.sha256(key_json.encode("utf-8")).hexdigest()
+
+
+def hash_file(path: Path | str) -> str:
+    """Returns sha256 hash of the file contents."""
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+def _place(source: Path, target: Path, link: bool = False) -> None:
+    """Copies the file or directory tree from source to target. Existing files in target directory are replaced.
+
+    If link is True, a file is hard-linked instead of copied when possible.
+    """
+    if source.is_dir():
+        target.mkdir(parents=True, exist_ok=True)
+        for child in source.iterdir():
+            _place(child, target / child.name)
+        return
+
+    target.parent.mkdir(parents=True, exist_ok=True)
+    target.unlink(missing_ok=True)
+    if link:
+        try:
+            os.link(source, target)
+            return
+        except OSError:
+            pass  # e.g. target is on a different file system
+    shutil.copy2(source, target)
+
+
+def _size(path: Path) -> int:
+    if path.is_dir():
+        return sum(p.stat().st_size for p in path.rglob("*") if p.is_file())
+    return path.stat().st_size
+
+
+def fetch_from_cache(cache_dir: Path | None, key: str, target: Path | str) -> bool:
+    """Places the cached data of key to target.
+
+    Args:
+        cache_dir: cache directory or None if the cache is disabled
+        key: cache key
+        target: path of the file or directory to be created
+
+    Returns:
+        True if the key was found in the cache and target was created, otherwise False
+    """
+    if cache_dir is None:
+        return False
+    entry = cache_dir / key
+    data = entry / _DATA_NAME
+    if not data.exists():
+        return False
+    try:
+        # Single mesh files are never modified in place, so they can be hard-linked. Directories are copied, because
+        # ElmerGrid may rewrite files in them.
+        _place(data, Path(target), link=True)
+        os.utime(entry)  # mark as recently used
+    except OSError as e:
+        logging.warning(f"Failed to fetch {key} from mesh cache: {e}")
+        return False
+    logging.info(f"Fetched {target} from mesh cache {cache_dir}")
+    return True
+
+
+def store_in_cache(cache_dir: Path | None, key: str, source: Path | str, max_size: int) -> None:
+    """Stores a file or directory in the cache and evicts least recently used entries to fit the cache into max_size.
+
+    Args:
+        cache_dir: cache directory or None if the cache is disabled
+        key: cache key
+        source: path of the file or directory to be stored
+        max_size: maximum total size of the cache in bytes
+    """
+    if cache_dir is None:
+        return
+    entry = cache_dir / key
+    tmp_entry = cache_dir / f".tmp-{key}-{os.getpid()}"
+    try:
+        if _size(Path(source)) > max_size:
+            logging.info(f"{source} is too large to be stored in mesh cache")
+            return
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        _place(Path(source), tmp_entry / _DATA_NAME)
+        try:
+            tmp_entry.rename(entry)  # atomic, so concurrent readers never see a partial entry
+        except OSError:
+            shutil.rmtree(tmp_entry)  # another process stored the same key first
+            return
+        evict_from_cache(cache_dir, max_size)
+    except OSError as e:
+        logging.warning(f"Failed to store {source} in mesh cache: {e}")
+        shutil.rmtree(tmp_entry, ignore_errors=True)
+
+
+def evict_from_cache(cache_dir: Path, max_size: int) -> None:
+    """Removes least recently used entries from the cache until the total size is at most max_size."""
+    entries = []
+    for entry in cache_dir.iterdir():
+        if entry.is_dir() and not entry.name.startswith("."):
+            try:
+                entries.append((entry.stat().st_mtime, _size(entry), entry))
+            except OSError:
+                continue  # entry was removed by another process
+    total_size = sum(size for _, size, _ in entries)
+    for _, size, entry in sorted(entries):
+        if total_size <= max_size:
+            break
+        shutil.rmtree(entry, ignore_errors=True)
+        total_size -= size
+
+    # remove temporary entries left by interrupted processes
+    for tmp_entry in cache_dir.glob(".tmp-*"):
+        try:
+            if time.time() - tmp_entry.stat().st_mtime > 24 * 3600:
+                shutil.rmtree(tmp_entry, ignore_errors=True)
+        except OSError:
+            continue
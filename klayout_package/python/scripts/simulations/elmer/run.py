@@ -151,7 +151,7 @@ if tool == "cross-section":
 
     # Run sub-processes
     if workflow.get("run_elmergrid", True):
-        run_elmer_grid(msh_file, elmer_n_processes, path)
+        run_elmer_grid(msh_file, elmer_n_processes, path, workflow)
 
     if workflow.get("write_elmer_sifs", True):
         produce_cross_section_sif_files(json_data, path.joinpath(name))
@@ -177,7 +177,7 @@ else:
 
     # Run sub-processes
     if workflow.get("run_elmergrid", True):
-        run_elmer_grid(msh_file, elmer_n_processes, path)
+        run_elmer_grid(msh_file, elmer_n_processes, path, workflow)
 
     if workflow.get("write_elmer_sifs", True):
         produce_sif_files(json_data, path.joinpath(name))
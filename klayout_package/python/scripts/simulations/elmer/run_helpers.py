@@ -34,6 +34,15 @@ has_tqdm = importlib.util.find_spec("tqdm") is not None
 if has_tqdm:
     from tqdm import tqdm
 
+from mesh_cache import (  # pylint: disable=wrong-import-position
+    get_mesh_cache_dir,
+    get_mesh_cache_size,
+    get_cache_key,
+    hash_file,
+    fetch_from_cache,
+    store_in_cache,
+)
+
 
 def write_simulation_machine_versions_file(path: Path) -> None:
     """
@@ -76,30 +85,46 @@ def write_simulation_machine_versions_file(path: Path) -> None:
         json.dump(versions, file)
 
 
-def run_elmer_grid(msh_path: Path | str, n_processes: int, exec_path_override: Path | None = None) -> None:
-    """Run ElmerGrid to process meshes from .msh format to Elmer's mesh format. Partitions mesh if n_processes > 1"""
+def run_elmer_grid(
+    msh_path: Path | str,
+    n_processes: int,
+    exec_path_override: Path | None = None,
+    workflow: dict[str, Any] | None = None,
+) -> None:
+    """Run ElmerGrid to process meshes from .msh format to Elmer's mesh format. Partitions mesh if n_processes > 1
+
+    If ``workflow`` is given, the ElmerGrid output is shared through the user-level mesh cache configured in it. The
+    cache key is the hash of the .msh file, the ElmerGrid arguments and the hash of the ElmerGrid executable.
+    """
     mesh_dir = Path(msh_path).stem
     mesh_exists_identifier = f"partitioning.{n_processes}" if n_processes > 1 else "mesh.elements"
     if Path(mesh_dir).joinpath(mesh_exists_identifier).exists():
         logging.info(f"Reusing existing mesh from {str(mesh_dir)}/")
         return
+
     elmergrid_executable = shutil.which("ElmerGrid")
     if elmergrid_executable is not None:
-        subprocess.check_call([elmergrid_executable, "14", "2", msh_path], cwd=exec_path_override)
+        # input and output paths are given separately, because they do not affect the cached output
+        commands = [(["14", "2"], [msh_path], [])]
         if n_processes > 1:
-            subprocess.check_call(
-                [
-                    elmergrid_executable,
-                    "2",
-                    "2",
-                    mesh_dir + "/",
-                    "-metis",
-                    str(n_processes),
-                    "4",
-                    "-removeunused",
-                ],
-                cwd=exec_path_override,
+            commands.append((["2", "2"], [mesh_dir + "/"], ["-metis", str(n_processes), "4", "-removeunused"]))
+
+        exec_path = Path(exec_path_override) if exec_path_override else Path()
+        cache_dir = get_mesh_cache_dir(workflow) if workflow is not None else None
+        cache_key = None
+        if cache_dir:
+            cache_key = get_cache_key(
+                "elmergrid",
+                hash_file(exec_path / msh_path),
+                hash_file(Path(elmergrid_executable).resolve()),  # identifies the ElmerGrid version
+                [formats + options for formats, _, options in commands],
             )
+        if fetch_from_cache(cache_dir, cache_key, exec_path / mesh_dir):
+            return
+
+        for formats, paths, options in commands:
+            subprocess.check_call([elmergrid_executable, *formats, *paths, *options], cwd=exec_path_override)
+        store_in_cache(cache_dir, cache_key, exec_path / mesh_dir, get_mesh_cache_size(workflow))
     else:
         logging.warning(
             "ElmerGrid was not found! Make sure you have ElmerFEM installed: https://github.com/ElmerCSC/elmerfem"
@@ -240,6 +265,39 @@ def elmer_check_warnings(log_file: Path | str, cwd: Path | str | None = None):
             logging.warning(f" Solution trivially zero. See {log_file}:{ind}")
 
 
+def _get_elmer_solver_commands(
+    sim_name: str, sif_names: list[str], n_processes: int, exec_path_override: Path | str | None = None
+) -> list[list[str]]:
+    """
+    Returns ElmerSolver commands for running the given sif files
+
+    Args:
+        sim_name          : Simulation name e.g name of the folder with sif files
+        sif_names         : Simulation sif names
+        n_processes       : Number of dependent processes for each simulation
+        exec_path_override: Working directory where the commands will be executed
+    """
+    elmersolver_executable = shutil.which("ElmerSolver")
+    elmersolver_mpi_executable = shutil.which("ElmerSolver_mpi")
+
+    sif_paths = [str(Path(sim_name).joinpath(f"{sif_file}.sif").as_posix()) for sif_file in sif_names]
+
+    if n_processes > 1 and elmersolver_mpi_executable is not None:
+        if sys.platform == "linux" and is_microsoft(exec_path_override) and is_singularity(exec_path_override):
+            # If using wsl and singularity the mpi command needs to be given inside singularity
+            return [[elmersolver_mpi_executable, sif, "-np", str(n_processes)] for sif in sif_paths]
+        mpi_command = "mpirun" if shutil.which("mpirun") is not None else "mpiexec"
+        return [[mpi_command, "-np", str(n_processes), elmersolver_mpi_executable, sif] for sif in sif_paths]
+
+    if elmersolver_executable is not None:
+        return [[elmersolver_executable, sif] for sif in sif_paths]
+
+    logging.warning(
+        "ElmerSolver was not found! Make sure you have ElmerFEM installed: https://github.com/ElmerCSC/elmerfem"
+    )
+    sys.exit()
+
+
 def _run_elmer_solver(
     sim_name: str,
     sif_names: list[str],
@@ -264,26 +322,7 @@ def _run_elmer_solver(
     my_env = os.environ.copy()
     my_env["OMP_NUM_THREADS"] = str(n_threads)
 
-    elmersolver_executable = shutil.which("ElmerSolver")
-    elmersolver_mpi_executable = shutil.which("ElmerSolver_mpi")
-
-    sif_paths = [str(Path(sim_name).joinpath(f"{sif_file}.sif").as_posix()) for sif_file in sif_names]
-
-    if n_processes > 1 and elmersolver_mpi_executable is not None:
-        if sys.platform == "linux" and is_microsoft(exec_path_override) and is_singularity(exec_path_override):
-            # If using wsl and singularity the mpi command needs to be given inside singularity
-            run_cmds = [[elmersolver_mpi_executable, sif, "-np", str(n_processes)] for sif in sif_paths]
-        else:
-            mpi_command = "mpirun" if shutil.which("mpirun") is not None else "mpiexec"
-            run_cmds = [[mpi_command, "-np", str(n_processes), elmersolver_mpi_executable, sif] for sif in sif_paths]
-
-    elif elmersolver_executable is not None:
-        run_cmds = [[elmersolver_executable, sif] for sif in sif_paths]
-    else:
-        logging.warning(
-            "ElmerSolver was not found! Make sure you have ElmerFEM installed: https://github.com/ElmerCSC/elmerfem"
-        )
-        sys.exit()
+    run_cmds = _get_elmer_solver_commands(sim_name, sif_names, n_processes, exec_path_override)
     output_files = [f"log_files/{sif}.Elmer.log" for sif in sif_names]
 
     if n_parallel_simulations > 1:
@@ -297,6 +336,74 @@ def _run_elmer_solver(
         elmer_check_warnings(outfile, cwd=exec_path_override)
 
 
+class ElmerSolverPool:
+    """
+    Pool of ElmerSolver workers which is kept alive over several batches of sif files
+
+    ``_run_elmer_solver`` starts and joins a new pool for every call. This pool is started once, batches are submitted
+    with ``submit`` without blocking and collected with ``wait``, so that the caller can do other work, such as
+    plotting the previous results, while the batch is being solved. Use as a context manager to close the workers.
+
+    Args:
+        sim_name              : Simulation name e.g name of the folder with sif files
+        n_parallel_simulations: Number of parallel simulations
+        n_processes           : Number of dependent processes for each simulation
+        n_threads             : Number of threads to be used with elmer
+        exec_path_override    : Working directory where the commands will be executed
+                                       (usually KQCircuits/tmp/sim_name)
+    """
+
+    def __init__(
+        self,
+        sim_name: str,
+        n_parallel_simulations: int,
+        n_processes: int,
+        n_threads: int,
+        exec_path_override: Path | str | None = None,
+    ):
+        self.sim_name = sim_name
+        self.n_processes = n_processes
+        self.cwd = os.getcwd() if exec_path_override is None else exec_path_override
+        self.env = os.environ.copy()
+        self.env["OMP_NUM_THREADS"] = str(n_threads)
+        self.pool = Pool(max(n_parallel_simulations, 1))  # pylint: disable=consider-using-with
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.pool.terminate()  # do not wait for the running solvers if the caller failed
+            self.pool.join()
+
+    def submit(self, sif_names: list[str]) -> list[tuple[str, Any]]:
+        """
+        Starts solving the given sif files. The sifs need to already exist when calling this function.
+
+        Returns:
+            list of tuples (output file, multiprocessing AsyncResult) to be given to ``wait``
+        """
+        run_cmds = _get_elmer_solver_commands(self.sim_name, sif_names, self.n_processes, self.cwd)
+        output_files = [f"log_files/{sif}.Elmer.log" for sif in sif_names]
+        return [
+            (out, self.pool.apply_async(worker, (cmd, out, self.cwd, self.env)))
+            for cmd, out in zip(run_cmds, output_files)
+        ]
+
+    def wait(self, jobs: list[tuple[str, Any]]) -> None:
+        """Waits until the submitted jobs are solved and propagates the warnings in their Elmer logs"""
+        for out, job in jobs:
+            job.get()
+            elmer_check_warnings(out, cwd=self.cwd)
+
+    def close(self) -> None:
+        """Waits for all submitted jobs and stops the workers"""
+        self.pool.close()
+        self.pool.join()
+
+
 def run_elmer_solver(json_data: dict[str, Any], exec_path_override: Path | str | None = None) -> None:
     """
     Runs Elmersolver for the sif files defined in json_data
@@ -18,6 +18,9 @@
 
 """
 Deletes all Elmer and Gmsh mesh files from the current tmp folder
+
+The small ``*_mesh_summary.json`` files next to the Gmsh meshes are kept, so that ``elmer_profiler.py`` can still report
+the mesh element counts after the cleanup.
 """
 
 from pathlib import Path
@@ -19,10 +19,14 @@
 
 """
 Produces table of runtimes for gmsh and Elmer and the number of mesh tetrahedron from Elmer results
+
+The numbers of Gmsh mesh nodes and elements are read from the mesh summary files written next to the ``.msh`` files, so
+the mesh files themselves are not needed.
 """
 
 import re
 import os
+import json
 import logging
 from pathlib import Path
 from post_process_helpers import find_varied_parameters, tabulate_into_csv, load_json
@@ -92,6 +96,18 @@ def _load_gmsh_data(path: Path, mesh_name: str) -> dict:
         return {}
 
 
+def _load_mesh_summary(path: Path, mesh_name: str) -> dict:
+    """Load the number of Gmsh mesh nodes and elements from the mesh summary file path/<mesh_name>_mesh_summary.json"""
+    summary_file = Path(path).joinpath(mesh_name + "_mesh_summary.json")
+    if not summary_file.is_file():
+        logging.warning(f"No mesh summary file found at {summary_file}")
+        return {}
+    with open(summary_file, "r", encoding="utf-8") as f:
+        summary = json.load(f)
+    elements = sum(v for k, v in summary.items() if k not in ("mesh_format", "file_size", "nodes"))
+    return {"gmsh_nodes": summary["nodes"], "gmsh_elements": elements}
+
+
 def _load_workflow_data(definition_file: Path) -> dict:
     """Load relevant parts of workflow dict"""
     json_data = load_json(definition_file)
@@ -118,6 +134,7 @@ if names:
         res[key] = {
             **workflow_data,
             **_load_gmsh_data(path, mesh_name),
+            **_load_mesh_summary(path, mesh_name),
             **_load_elmer_runtimes(path, name, workflow_data["elmer_n_processes"]),
             **_load_elmer_elements(path, mesh_name),
         }
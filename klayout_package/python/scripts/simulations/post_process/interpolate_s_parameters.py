@@ -29,6 +29,7 @@ If no "simulated_snp" is set the input snp will be searched in the folder first
 for each input snp found.
 
 The result file will be named similarly to the input snp, but with an added `_interpolated` suffix (before extension)
+If the `_project_results.npz` file written by Elmer export exists next to the snp, the data is read from it instead.
 """
 import json
 import os
@@ -81,5 +82,9 @@ if not os.path.exists(result_folder):
 
 for snp in snp_files:
     part_snp = list(snp.rpartition(".s"))
+    # use the binary results sidecar written by Elmer export instead of parsing the snp file, if available
+    npz = part_snp[0] + "_project_results.npz"
     part_snp[0] = part_snp[0] + "_interpolated"
-    interpolate_s_parameters_from_snp(snp, "".join(part_snp), freqs, plot_results=True, image_folder=result_folder)
+    interpolate_s_parameters_from_snp(
+        npz if os.path.isfile(npz) else snp, "".join(part_snp), freqs, plot_results=True, image_folder=result_folder
+    )
@@ -17,6 +17,12 @@
 # and organizations (meetiqm.com/iqm-organization-contributor-license-agreement).
 import csv
 import json
+import os
+import sqlite3
+
+RESULTS_SUFFIX = "_project_results.json"
+RESULTS_INDEX_FILE = "results_index.sqlite"
+RESULTS_INDEX_VERSION = 2
 
 
 def load_json(filename):
@@ -25,6 +31,184 @@ def load_json(filename):
         return json.load(f)
 
 
+def _comparison_key(value):
+    """Returns a string that is equal for parameter values that compare equal in Python, e.g. for 1, 1.0 and True."""
+
+    def normalize(v):
+        if isinstance(v, (bool, float)) and float(v).is_integer():
+            return int(v)
+        if isinstance(v, dict):
+            return {k: normalize(x) for k, x in v.items()}
+        if isinstance(v, list):
+            return [normalize(x) for x in v]
+        return v
+
+    return json.dumps(normalize(value), sort_keys=True)
+
+
+class ResultsIndex:
+    """SQLite index of the simulation definitions and results in a folder.
+
+    Each simulation with a ``<name>_project_results.json`` file is indexed together with its definition file
+    ``<name>.json``. The index is stored in ``results_index.sqlite`` in the same folder. Files are only parsed again if
+    their modification time or size has changed since the previous update, so repeated post-processing of large sweeps
+    does not need to load every json file. Parameters are stored one row per (simulation, parameter), so finding the
+    varied parameters is a single query.
+
+    Args:
+        path: folder containing the simulation files
+        update: if True, the index is updated to match the files in the folder
+    """
+
+    def __init__(self, path=os.path.curdir, update=True):
+        self.path = path
+        self.connection = sqlite3.connect(os.path.join(path, RESULTS_INDEX_FILE))
+        if self.connection.execute("PRAGMA user_version").fetchone()[0] != RESULTS_INDEX_VERSION:
+            self.connection.executescript(f"""
+                DROP TABLE IF EXISTS files;
+                DROP TABLE IF EXISTS simulations;
+                DROP TABLE IF EXISTS parameters;
+                CREATE TABLE files (name TEXT PRIMARY KEY, mtime_ns INTEGER, size INTEGER);
+                CREATE TABLE simulations (key TEXT PRIMARY KEY, definition TEXT, result TEXT);
+                CREATE TABLE parameters (
+                    key TEXT, name TEXT, position INTEGER, value TEXT, comparison_key TEXT, PRIMARY KEY (key, name)
+                );
+                PRAGMA user_version = {RESULTS_INDEX_VERSION};
+                """)
+        if update:
+            self.update()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        """Closes the index database."""
+        self.connection.close()
+
+    def update(self):
+        """Updates the index to match the simulation files in the folder. Returns the number of updated simulations."""
+        stats = {}
+        with os.scandir(self.path) as entries:
+            for entry in entries:
+                if entry.name.endswith(".json") and entry.is_file():
+                    stat = entry.stat()
+                    stats[entry.name] = (stat.st_mtime_ns, stat.st_size)
+        keys = {f.removesuffix(RESULTS_SUFFIX) for f in stats if f.endswith(RESULTS_SUFFIX)}
+        indexed = dict(((n, (m, s)) for n, m, s in self.connection.execute("SELECT name, mtime_ns, size FROM files")))
+        indexed_keys = {k for (k,) in self.connection.execute("SELECT key FROM simulations")}
+
+        def is_current(file_name):
+            return file_name not in stats or indexed.get(file_name) == stats[file_name]
+
+        changed = [
+            k for k in keys if not (k in indexed_keys and is_current(k + ".json") and is_current(k + RESULTS_SUFFIX))
+        ]
+        with self.connection:
+            for key in indexed_keys - keys:
+                self._delete(key)
+            for key in changed:
+                self._delete(key)
+                self._insert(key, {f: stats[f] for f in (key + ".json", key + RESULTS_SUFFIX) if f in stats})
+        return len(changed)
+
+    def _delete(self, key):
+        for table in ("simulations", "parameters"):
+            self.connection.execute(f"DELETE FROM {table} WHERE key = ?", (key,))
+        self.connection.executemany("DELETE FROM files WHERE name = ?", ((key + ".json",), (key + RESULTS_SUFFIX,)))
+
+    def _insert(self, key, file_stats):
+        def read(file_name):
+            if file_name not in file_stats:
+                return None
+            with open(os.path.join(self.path, file_name), "r", encoding="utf-8") as f:
+                return f.read()
+
+        definition_text, result_text = read(key + ".json"), read(key + RESULTS_SUFFIX)
+        definition = json.loads(definition_text) if definition_text is not None else {}
+        self.connection.execute("INSERT INTO simulations VALUES (?, ?, ?)", (key, definition_text, result_text))
+        self.connection.executemany(
+            "INSERT INTO parameters VALUES (?, ?, ?, ?, ?)",
+            (
+                (key, name, position, json.dumps(value, sort_keys=True), _comparison_key(value))
+                for position, (name, value) in enumerate(definition.get("parameters", {}).items())
+            ),
+        )
+        self.connection.executemany(
+            "INSERT INTO files VALUES (?, ?, ?)", ((n, m, s) for n, (m, s) in file_stats.items())
+        )
+
+    def keys(self):
+        """Returns the sorted list of indexed simulation names."""
+        return [k for (k,) in self.connection.execute("SELECT key FROM simulations ORDER BY key")]
+
+    def __contains__(self, key):
+        return self.connection.execute("SELECT 1 FROM simulations WHERE key = ?", (key,)).fetchone() is not None
+
+    def _load(self, key, column):
+        row = self.connection.execute(f"SELECT {column} FROM simulations WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            raise KeyError(key)
+        return None if row[0] is None else json.loads(row[0])
+
+    def definition(self, key):
+        """Returns the contents of the definition file of simulation ``key``, or None if the file is missing."""
+        return self._load(key, "definition")
+
+    def result(self, key):
+        """Returns the contents of the results file of simulation ``key``."""
+        return self._load(key, "result")
+
+    def items(self, keys=None):
+        """Yields tuples (key, definition, result) one simulation at a time.
+
+        Args:
+            keys: list of simulation names to load, or None for all indexed simulations
+        """
+        for key in self.keys() if keys is None else keys:
+            yield key, self.definition(key), self.result(key)
+
+    def varied_parameters(self, keys=None):
+        """Finds the parameters that vary between the definitions of the given simulations.
+
+        Same as ``find_varied_parameters``, but queries the index instead of loading the definition files.
+
+        Args:
+            keys: list of simulation names, or None for all indexed simulations
+
+        Returns:
+            tuple (list, dict)
+            - list of parameter names
+            - dictionary with simulation name as key and list of parameter values as value
+        """
+        keys = self.keys() if keys is None else list(keys)
+        with self.connection:
+            self.connection.execute("CREATE TEMP TABLE IF NOT EXISTS selected (key TEXT PRIMARY KEY)")
+            self.connection.execute("DELETE FROM selected")
+            self.connection.executemany("INSERT OR IGNORE INTO selected VALUES (?)", ((k,) for k in keys))
+        parameters = [
+            name
+            for (name,) in self.connection.execute(
+                "SELECT name FROM parameters WHERE key IN selected GROUP BY name "
+                "HAVING COUNT(DISTINCT comparison_key) > 1 ORDER BY MIN(position), name"
+            )
+        ]
+        column = {p: i for i, p in enumerate(parameters)}
+        parameter_values = {k: [None] * len(parameters) for k in keys}
+        rows = self.connection.execute(
+            "SELECT key, name, value FROM parameters WHERE key IN selected AND name IN (SELECT name FROM parameters "
+            "WHERE key IN selected GROUP BY name HAVING COUNT(DISTINCT comparison_key) > 1)"
+        )
+        decoded = {}  # sweeps repeat the same values, so decode each distinct value only once
+        for key, name, value in rows:
+            if value not in decoded:
+                decoded[value] = json.loads(value)
+            parameter_values[key][column[name]] = decoded[value]
+        return parameters, parameter_values
+
+
 def find_varied_parameters(json_files):
     """Finds the parameters that vary between the definitions in the json files.
 
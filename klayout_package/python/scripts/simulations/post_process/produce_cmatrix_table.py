@@ -23,7 +23,7 @@ cross-section simulation results are found.
 """
 
 import os
-from post_process_helpers import find_varied_parameters, tabulate_into_csv, load_json
+from post_process_helpers import ResultsIndex, tabulate_into_csv
 
 
 def _get_excitations(json_data):
@@ -32,40 +32,40 @@ def _get_excitations(json_data):
 
 # Find data files
 path = os.path.curdir
-result_files = [f for f in os.listdir(path) if f.endswith("_project_results.json")]
-if result_files:
+index = ResultsIndex(path)
+keys = index.keys()
+if keys:
     # Find parameters that are swept
-    definition_files = [f.replace("_project_results.json", ".json") for f in result_files]
-    parameters, parameter_values = find_varied_parameters(definition_files)
+    parameters, parameter_values = index.varied_parameters(keys)
 
-    # Load result data
+    # Load result data. Only the data needed for deembedding is kept from the definitions.
     cmatrix = {}
-    for key, result_file in zip(parameter_values.keys(), result_files):
-        result = load_json(result_file)
+    cs_excitations = {}
+    ports_3d = {}
+    for key, definition, result in index.items(keys):
         cdata = result.get("CMatrix") or result.get("Cs")
         if cdata is None:
-            print(f"Neither 'CMatrix' nor 'Cs' found in the result file {result_file}")
+            print(f"Neither 'CMatrix' nor 'Cs' found in the result file {key}_project_results.json")
             continue
 
         cmatrix[key] = {f"C{i+1}{j+1}": c for i, l in enumerate(cdata) for j, c in enumerate(l)}
+        if definition is not None:
+            if definition["tool"] == "cross-section":
+                cs_excitations[key] = _get_excitations(definition)
+            else:
+                ports_3d[key] = definition.get("ports", [])
 
     # deembedding
     try:
-        def_data_cs = {}
-        def_data_3d = {}
-        for key, def_file in zip(parameter_values.keys(), definition_files):
-            data = load_json(def_file)
-            (def_data_cs if data["tool"] == "cross-section" else def_data_3d)[key] = data
-
-        for key, def_data in def_data_3d.items():
-            for port in def_data.get("ports", []):
+        for key, ports in ports_3d.items():
+            for port in ports:
                 d_len, d_cross_section = 1e-6 * port.get("deembed_len", 0), port.get("deembed_cross_section")
                 if d_len and d_cross_section:
                     cs_key = f"{key}_{d_cross_section}"
-                    if cs_key not in def_data_cs:
+                    if cs_key not in cs_excitations:
                         print(f"WARNING: deembed cross section not found {cs_key}")
                         continue
-                    exc_set = _get_excitations(def_data_cs[cs_key])
+                    exc_set = set(cs_excitations[cs_key])
                     if len(exc_set) > 1:
                         print(f"WARNING: Multiple signals in deembedding cross section {cs_key}")
                         continue
@@ -79,3 +79,4 @@ if result_files:
         print(f"Encountered exception in capacitance deembedding\n {e}")
 
     tabulate_into_csv(f"{os.path.basename(os.path.abspath(path))}_results.csv", cmatrix, parameters, parameter_values)
+index.close()
@@ -27,9 +27,10 @@ Args:
         If given, the script tries to look for cross-section results for EPR correction and groups EPRs by partition
         region names.
 """
+
 import os
 import sys
-from post_process_helpers import find_varied_parameters, tabulate_into_csv, load_json
+from post_process_helpers import ResultsIndex, tabulate_into_csv, load_json
 
 pp_data = {}
 if len(sys.argv) > 1:
@@ -38,6 +39,9 @@ if len(sys.argv) > 1:
 groups = pp_data.get("groups", [])
 region_corrections = pp_data.get("region_corrections", {})
 
+path = os.path.curdir
+index = ResultsIndex(path)
+
 
 def _get_ith(d: list | tuple | float, i: int):
     """gets the ith element of a list that also works for scalars"""
@@ -50,7 +54,7 @@ def excitation_list(json_data: dict):
 
 
 def get_ind_by_exc(simulation: str, excitation: int):
-    sim_data = load_json(f"{simulation}.json")
+    sim_data = index.definition(simulation)
     excitations = excitation_list(sim_data)
     return excitations.index(excitation) if excitation in excitations else 0
 
@@ -70,7 +74,7 @@ def get_mer_coefficients(simulation: str, correction_key: str, excitation: int):
     """
 
     cs_name = simulation + "_" + correction_key
-    res = load_json(f"{cs_name}_project_results.json")
+    res = index.result(cs_name)
 
     result_ind = get_ind_by_exc(cs_name, excitation)
 
@@ -110,7 +114,7 @@ def get_deembed_e_dict(simulation: str, region: str, deembed_len: float, excitat
         return None
 
     cs_name = simulation + "_" + correction_key
-    res = load_json(f"{cs_name}_project_results.json")
+    res = index.result(cs_name)
 
     result_ind = get_ind_by_exc(cs_name, excitation)
 
@@ -136,7 +140,7 @@ def get_all_deembed_energies(sim_data, excitation):
 
     def is_port_excited(original_key, deembed_cs, exc):
         """Checks if the port corresponding to deembed_cs is excited in 3D simulation based on layer excitations."""
-        cs_data = load_json(f"{original_key}_{deembed_cs}.json")
+        cs_data = index.definition(f"{original_key}_{deembed_cs}")
         if cs_data.get("voltage_excitations"):
             return True
         return any(v.get("excitation") == exc for v in cs_data["layers"].values())
@@ -175,27 +179,20 @@ def get_results_list(results: dict[str, list[float] | float]):
 
 
 # Find data files
-path = os.path.curdir
-all_files = [f for f in os.listdir(path) if f.endswith("_project_results.json")]
 correction_keys = {k for k in region_corrections.values() if k is not None}
-correction_files = [f for f in all_files if any(k in f for k in correction_keys)]
-result_files = list(set(all_files) - set(correction_files))
+result_keys = [f for f in index.keys() if not any(k in f for k in correction_keys)]
 
-if result_files:
+if result_keys:
     # Find parameters that are swept
-    definition_files = [f.replace("_project_results.json", ".json") for f in result_files]
-    parameters, parameter_values = find_varied_parameters(definition_files)
+    parameters, parameter_values = index.varied_parameters(result_keys)
     parameters = ["result_index"] + parameters
 
     # Load result data
     epr_dict = {}
-    for i, (original_key, result_file) in enumerate(zip(list(parameter_values.keys()), result_files)):
-        result_json = load_json(result_file)
-        sim_data = load_json(f"{original_key}.json")
-
+    for original_key, sim_data, result_json in index.items(result_keys):
         results_list = get_results_list(result_json)
         if not results_list:
-            print(f'No energy results found in "{result_file}".')
+            print(f'No energy results found in "{original_key}_project_results.json".')
 
         original_params = parameter_values.pop(original_key)
         for excitation, result in zip(excitation_list(sim_data), results_list):
@@ -309,3 +306,4 @@ if result_files:
                 )
 
     tabulate_into_csv(f"{os.path.basename(os.path.abspath(path))}_epr.csv", epr_dict, parameters, parameter_values)
+index.close()
@@ -24,18 +24,19 @@ Args:
     sys.argv[1]: parameter file name, where the file includes loss tangents for different layers
 
 """
+
 import sys
 import subprocess
 import logging
 from pathlib import Path
 import pandas as pd
-from post_process_helpers import find_varied_parameters, load_json
+from post_process_helpers import ResultsIndex, load_json
 
 loss_tangents = load_json(sys.argv[1])
 
 epr_files = list(Path(".").glob("*_epr.csv"))
-def_files = [str(p).replace("_project_results.json", ".json") for p in Path(".").glob("*_project_results.json")]
-sweep_params, _ = find_varied_parameters(def_files)
+with ResultsIndex() as index:
+    sweep_params, _ = index.varied_parameters()
 
 if not epr_files:
     # If the result contains sheet energies, produce_epr_table will print a warning
@@ -40,6 +40,10 @@ simulation performance unless the parameter ``tls_sheet_approximation=True`` is
 Use -h argument to read about available arguments for the script. Number of samples, sampling box boundaries and
 seed number of the sampler can be configured using arguments.
 
+The sampled points are saved for each face and distribution in a ``.npy`` file as an array of shape Nx3 with columns
+x, y, z in µm. The file names are listed in the ``<simulation name>_tls_mc.json`` file together with the sampling
+metadata.
+
 This script can be reused without re-exporting the simulation if the points need to be resampled.
 """
 
@@ -132,26 +136,28 @@ def get_z(
         return None
 
 
-def _sample_from_triangle(tri: np.ndarray) -> np.ndarray:
+def _sample_from_triangles(triangles: np.ndarray, rng: np.random.Generator) -> np.ndarray:
     """
-    Uniformly samples a point from a triangle
+    Uniformly samples one point from each triangle
 
     Source for the formula:
     https://math.stackexchange.com/questions/18686/uniform-random-point-in-triangle-in-3d
 
     Args:
-        tri: points defining the triangle (array of shape 3x2)
+        triangles: points defining the triangles (array of shape Nx3x2)
+        rng: Random number generator object
 
     Returns:
-        sampled point (array of shape 1x2)
+        sampled points (array of shape Nx2)
     """
-    r1, r2 = np.random.rand(2)
+    r1, r2 = rng.random((2, len(triangles), 1))
     sqrt_r1 = np.sqrt(r1)
-    point = (1 - sqrt_r1) * tri[0] + sqrt_r1 * (1 - r2) * tri[1] + sqrt_r1 * r2 * tri[2]
-    return point
+    return (1 - sqrt_r1) * triangles[:, 0] + sqrt_r1 * (1 - r2) * triangles[:, 1] + sqrt_r1 * r2 * triangles[:, 2]
 
 
-def _sample_from_region(region: klayout.db.Region, n_samples: int, zlims: list[float], dbu: float) -> list[dict]:
+def _sample_from_region(
+    region: klayout.db.Region, n_samples: int, zlims: list[float], dbu: float, rng: np.random.Generator
+) -> np.ndarray:
     """Samples points uniformly from an arbitrary 2D region using triangulation. Additionally samples
     z-coordinates for each point which is done uniformly and independent of the xy-sampling from `region`.
 
@@ -160,29 +166,44 @@ def _sample_from_region(region: klayout.db.Region, n_samples: int, zlims: list[f
         n_samples: Number of samples to be returned
         zlims: list defining the range for sampling z-coordinates. Should have 2 elements in the order [min, max]
         dbu: Database units used in region
+        rng: Random number generator object
 
     Returns:
-        list of sampled points in dictionary format
+        sampled points as array of shape Nx3 with columns x, y, z
     """
     triangles = []
     areas = []
     # Triangulate each polygon in the region
     for poly in region.each():
         for tri in poly.delaunay():
-            pts = np.array([[pt.x, pt.y] for pt in tri.each_point_hull()])
-            triangles.append(pts)
+            triangles.append([[pt.x, pt.y] for pt in tri.each_point_hull()])
             areas.append(tri.area())
-    areas = np.array(areas)
-    probs = areas / areas.sum()
+    triangles = np.array(triangles, dtype=float)
+    areas = np.array(areas, dtype=float)
+    # randomly choose a triangle for each sample and then point inside the triangle
+    chosen = rng.choice(len(triangles), size=n_samples, p=areas / areas.sum())
+    points = np.empty((n_samples, 3))
+    points[:, :2] = _sample_from_triangles(triangles[chosen], rng) * dbu
     # sample z independently
-    z_sampled = np.random.uniform(low=zlims[0], high=zlims[1], size=n_samples)
-    sampled_points = []
-    for z in z_sampled:
-        # randomly choose a triangle and then point inside the triangle
-        tri = triangles[np.random.choice(len(triangles), p=probs)]
-        pt = _sample_from_triangle(tri)
-        sampled_points.append({"x": pt[0] * dbu, "y": pt[1] * dbu, "z": z})
-    return sampled_points
+    points[:, 2] = rng.uniform(low=zlims[0], high=zlims[1], size=n_samples)
+    return points
+
+
+def _save_points(name: str, face: str, distribution: str, points: list | np.ndarray) -> str:
+    """Saves sampled points in a ``.npy`` file as array of shape Nx3 with columns x, y, z.
+
+    Args:
+        name: name of the simulation
+        face: face id of the points
+        distribution: name of the sampled distribution
+        points: list of (x, y, z) tuples or array of shape Nx3
+
+    Returns:
+        name of the file
+    """
+    file_name = f"{name}_tls_mc_{face}_{distribution}.npy"
+    np.save(file_name, np.array(points, dtype=float).reshape(-1, 3))
+    return file_name
 
 
 parser = argparse.ArgumentParser(description="Monte carlo point sampler for TLS")
@@ -277,6 +298,7 @@ for file_name, parameters in sim_parameters.items():
 
     # Use same seed for all sweeps
     rng = random.Random(seed)
+    np_rng = np.random.default_rng(seed)
     # Number of sample points = given defect density * sampling box area
     sampling_box_area = (box_x2 - box_x1) * (box_y2 - box_y1)
 
@@ -322,8 +344,8 @@ for file_name, parameters in sim_parameters.items():
                 )
                 # Reject point if sampled outside of region
                 if z is not None:
-                    points.append({"x": dpoint.x, "y": dpoint.y, "z": z})
-            result[face][distribution] = points
+                    points.append((dpoint.x, dpoint.y, z))
+            result[face][distribution] = _save_points(parameters["name"], face, distribution, points)
         # Fourth, substrate distribution
         substrate_i = face[0]
         substrate = parameters["layers"][f"substrate_{substrate_i}"]
@@ -343,8 +365,8 @@ for file_name, parameters in sim_parameters.items():
                 elif face[1] == "b":
                     if z < parameters["layers"][etch_layer]["z"] + parameters["layers"][etch_layer]["thickness"]:
                         continue
-            points.append({"x": dpoint.x, "y": dpoint.y, "z": float(f"{z:.5f}")})
-        result[face]["substrate"] = points
+            points.append((dpoint.x, dpoint.y, float(f"{z:.5f}")))
+        result[face]["substrate"] = _save_points(parameters["name"], face, "substrate", points)
 
         # Sample from gap walls
         gap_region = regions.get(f"{face}_gap")
@@ -366,7 +388,8 @@ for file_name, parameters in sim_parameters.items():
                 else:
                     zlims[0] -= ma_th
                 print(f"Sampling {file_name} ma wall on face {face} using {ma_wall_n_points} points")
-                result[face]["ma_wall"] = _sample_from_region(ma_wall_region, ma_wall_n_points, zlims, layout.dbu)
+                points = _sample_from_region(ma_wall_region, ma_wall_n_points, zlims, layout.dbu, np_rng)
+                result[face]["ma_wall"] = _save_points(parameters["name"], face, "ma_wall", points)
             # SA wall
             trench_props = parameters["layers"].get(f"{face}_etch")
             if trench_props:
@@ -377,7 +400,8 @@ for file_name, parameters in sim_parameters.items():
                 if sa_wall_n_points > 0:
                     zlims = [trench_props["z"], trench_props["z"] + trench_props["thickness"]]
                     print(f"Sampling {file_name} sa wall on face {face} using {sa_wall_n_points} points")
-                    result[face]["sa_wall"] = _sample_from_region(sa_wall_region, sa_wall_n_points, zlims, layout.dbu)
+                    points = _sample_from_region(sa_wall_region, sa_wall_n_points, zlims, layout.dbu, np_rng)
+                    result[face]["sa_wall"] = _save_points(parameters["name"], face, "sa_wall", points)
 
     with open(f"{parameters['name']}_tls_mc.json", "w", encoding="utf-8") as file:
         json.dump(result, file, indent=4)
@@ -197,7 +197,7 @@ if use_elmer:
         'n_workers': 1,               # <--------- This defines the number of
                                       #            parallel independent processes.
                                       #            Setting this larger than 1 activates
-                                      #            the use of the simple workload manager.
+                                      #            the use of the DAG scheduler.
     }
     if use_sbatch:
         # if simulation is run in a HPC system, sbatch_parameters can be given here
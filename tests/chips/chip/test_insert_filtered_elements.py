@@ -0,0 +1,72 @@
+# This code is part of KQCircuits
+# Copyright (C) 2025 IQM Finland Oy
+#
+# This program is free software: you can redistribute it and/or modify it under the terms of the GNU General Public
+# License as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+# warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with this program. If not, see
+# https://www.gnu.org/licenses/gpl-3.0.html.
+#
+# The software distribution should follow IQM trademark policy for open-source software
+# (meetiqm.com/iqm-open-source-trademark-policy). IQM welcomes contributions to the code.
+# Please see our contribution agreements for individuals (meetiqm.com/iqm-individual-contributor-license-agreement)
+# and organizations (meetiqm.com/iqm-organization-contributor-license-agreement).
+
+import pytest
+
+from kqcircuits.chips.chip import Chip
+from kqcircuits.elements.tsvs.tsv import Tsv
+from kqcircuits.pya_resolver import pya
+from kqcircuits.util.count_instances import count_instances_in_cell
+
+
+@pytest.fixture
+def chip():
+    layout = pya.Layout()
+    chip = Chip()
+    chip.layout = layout
+    chip.cell = layout.create_cell("chip")
+    return chip
+
+
+def test_make_grid_locations(chip):
+    locations = chip.make_grid_locations(pya.DBox(0, 0, 1000, 500), delta_x=200, delta_y=100, x0=50)
+    assert all(isinstance(location, pya.DPoint) for location in locations)
+    assert len(locations) == 5 * 5
+    assert locations[0] == pya.DPoint(150, 50)
+    assert locations[1] == pya.DPoint(150, 150)
+    assert locations[-1] == pya.DPoint(950, 450)
+
+
+@pytest.mark.parametrize("rotation", [0, 45])
+def test_filtered_elements_inserted_as_arrays(chip, rotation):
+    tsv = chip.add_element(Tsv, face_ids=["1t1"])
+    locations = chip.make_grid_locations(pya.DBox(0, 0, 2000, 2000), delta_x=100, delta_y=100)
+    filter_region = pya.Region(pya.DBox(400, 400, 1200, 1200).to_itype(chip.layout.dbu))
+    passed = chip.insert_filtered_elements(tsv, [("through_silicon_via", 0)], {0: filter_region}, locations, rotation)
+
+    passed_set = {(p.x, p.y) for p in passed}
+    expected = {(p.x, p.y) for p in locations if not (300 < p.x < 1300 and 300 < p.y < 1300)}
+    assert passed_set == expected
+    assert count_instances_in_cell(chip.cell, Tsv) == len(passed)
+    assert chip.cell.child_instances() < len(passed) / 5
+    inserted = {(round(p.x, 3), round(p.y, 3)) for inst in chip.cell.each_inst() for p in _array_positions(inst)}
+    assert inserted == passed_set
+
+
+def test_filtered_elements_from_list_of_points(chip):
+    tsv = chip.add_element(Tsv, face_ids=["1t1"])
+    locations = [pya.DPoint(0, 0), pya.DPoint(100, 0), pya.DPoint(300, 0), pya.DPoint(0, 100)]
+    passed = chip.insert_filtered_elements(tsv, [("through_silicon_via", 0)], {}, locations)
+    assert passed == locations
+    assert chip.cell.child_instances() == 3
+
+
+def _array_positions(inst):
+    for i in range(max(inst.na, 1)):
+        for j in range(max(inst.nb, 1)):
+            yield pya.DPoint(inst.dcplx_trans.disp + i * inst.da + j * inst.db)
@@ -0,0 +1,74 @@
+# This code is part of KQCircuits
+# Copyright (C) 2025 IQM Finland Oy
+#
+# This program is free software: you can redistribute it and/or modify it under the terms of the GNU General Public
+# License as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+# warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with this program. If not, see
+# https://www.gnu.org/licenses/gpl-3.0.html.
+#
+# The software distribution should follow IQM trademark policy for open-source software
+# (meetiqm.com/iqm-open-source-trademark-policy). IQM welcomes contributions to the code.
+# Please see our contribution agreements for individuals (meetiqm.com/iqm-individual-contributor-license-agreement)
+# and organizations (meetiqm.com/iqm-organization-contributor-license-agreement).
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+# Modules that are slow to import and only needed by a few functions, so they must not be imported by element or chip
+# modules
+HEAVY_MODULES = ["setuptools", "scipy.spatial", "scipy.optimize"]
+
+
+def _run_python(code, tmp_dir, importtime=False):
+    env = {**os.environ, "KQC_TMP_PATH": str(tmp_dir), "PYTHONPATH": os.pathsep.join(sys.path)}
+    args = [sys.executable, *(["-X", "importtime"] if importtime else []), "-c", code]
+    return subprocess.run(args, env=env, capture_output=True, text=True, check=True)
+
+
+def _import_times(stderr):
+    """Returns dictionary of cumulative import times in microseconds parsed from ``python -X importtime`` output."""
+    times = {}
+    for line in stderr.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            _, cumulative, name = line[len("import time:") :].split("|")
+            if cumulative.strip().isdigit():
+                times[name.strip()] = int(cumulative)
+    return times
+
+
+@pytest.mark.parametrize("module", ["kqcircuits.elements.element", "kqcircuits.chips.single_xmons"])
+def test_cold_import_is_lazy(module, tmp_path):
+    tmp_dir = tmp_path / "kqc_tmp"
+    times = _import_times(_run_python(f"import {module}", tmp_dir, importtime=True).stderr)
+    assert module in times
+    assert "kqcircuits.defaults" in times
+    assert not [m for m in HEAVY_MODULES if m in times]
+    assert not tmp_dir.exists()
+
+
+def test_lazy_defaults_are_computed_on_access(tmp_path):
+    tmp_dir = tmp_path / "kqc_tmp"
+    code = (
+        "import kqcircuits.defaults as d\n"
+        "from kqcircuits.defaults import default_layers\n"
+        "assert default_layers is d.layer_config_module.default_layers\n"
+        "assert 'default_faces' in dir(d)\n"
+        "print(d.TMP_PATH)\n"
+    )
+    assert _run_python(code, tmp_dir).stdout.strip() == str(tmp_dir)
+    assert tmp_dir.is_dir()
+
+
+def test_unknown_attribute_raises():
+    import kqcircuits.defaults  # pylint: disable=import-outside-toplevel
+
+    with pytest.raises(AttributeError):
+        kqcircuits.defaults.no_such_default  # pylint: disable=pointless-statement
@@ -18,7 +18,11 @@
 
 
 from kqcircuits.chips.chip import Chip
-from kqcircuits.elements.waveguide_composite import produce_fixed_length_bend
+from kqcircuits.elements.waveguide_composite import (
+    produce_fixed_length_bend,
+    _length_of_var_length_bend,
+    _var_length_bend,
+)
 from kqcircuits.pya_resolver import pya
 from kqcircuits.util.geometry_helper import get_cell_path_length
 
@@ -55,14 +59,46 @@ def test_long_bend_with_bridge():
     assert relative_error < relative_length_tolerance
 
 
-def _relative_length_error(target_len, point_a, point_a_corner, point_b, point_b_corner, bridges):
+def test_length_model_matches_created_waveguide():
+    layout = pya.Layout()
+    points = (pya.DPoint(0, 0), pya.DPoint(100, 0), pya.DPoint(400, 1000), pya.DPoint(400, 900))
+    for corner_dist in [100, 200, 350, 500]:
+        for bridges in ["no", "middle", "middle and ends"]:
+            cell = _var_length_bend(layout, Chip.LIBRARY_NAME, corner_dist, *points, bridges, Chip.r)
+            model_length = _length_of_var_length_bend(corner_dist, *points, Chip.r)
+            assert abs(model_length - get_cell_path_length(cell)) / model_length < relative_length_tolerance
+
+
+def test_bend_with_non_default_radius():
+    for r in [50, 150]:
+        relative_error = _relative_length_error(
+            1300, pya.DPoint(0, 0), pya.DPoint(100, 0), pya.DPoint(400, 1000), pya.DPoint(400, 900), "no", r=r
+        )
+        assert relative_error < relative_length_tolerance
 
+
+def test_only_final_waveguide_cell_is_created():
     layout = pya.Layout()
+    chip = _chip(layout)
+    produce_fixed_length_bend(
+        chip, 1200, pya.DPoint(0, 0), pya.DPoint(100, 0), pya.DPoint(400, 1000), pya.DPoint(400, 900), "no"
+    )
+    assert len([c for c in layout.each_cell() if c.name.startswith("Waveguide Composite")]) == 1
+
+
+def _chip(layout, **parameters):
     chip_cell = layout.create_cell("chip")
     chip = Chip()
+    for name, value in parameters.items():
+        setattr(chip, name, value)
     chip.layout = layout
     chip.cell = chip_cell
+    return chip
+
+
+def _relative_length_error(target_len, point_a, point_a_corner, point_b, point_b_corner, bridges, **parameters):
 
+    chip = _chip(pya.Layout(), **parameters)
     inst = produce_fixed_length_bend(chip, target_len, point_a, point_a_corner, point_b, point_b_corner, bridges)
     actual_length = get_cell_path_length(inst.cell)
     return abs(actual_length - target_len) / target_len
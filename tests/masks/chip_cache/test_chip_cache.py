@@ -0,0 +1,162 @@
+# This code is part of KQCircuits
+# Copyright (C) 2025 IQM Finland Oy
+#
+# This program is free software: you can redistribute it and/or modify it under the terms of the GNU General Public
+# License as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+# warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with this program. If not, see
+# https://www.gnu.org/licenses/gpl-3.0.html.
+#
+# The software distribution should follow IQM trademark policy for open-source software
+# (meetiqm.com/iqm-open-source-trademark-policy). IQM welcomes contributions to the code.
+# Please see our contribution agreements for individuals (meetiqm.com/iqm-individual-contributor-license-agreement)
+# and organizations (meetiqm.com/iqm-organization-contributor-license-agreement).
+
+import importlib.util
+import sys
+
+import pytest
+
+from kqcircuits.chips.chip import Chip
+from kqcircuits.chips.demo import Demo
+from kqcircuits.masks.chip_cache import (
+    chip_cache_key,
+    load_cached_chip,
+    module_source_hashes,
+    pcell_source_hashes,
+    save_chip_cache,
+)
+from kqcircuits.masks.mask_set import MaskSet
+from kqcircuits.pya_resolver import pya
+
+extra_params = {"enable_debug": False, "mock_chips": False, "skip_extras": False, "no_cache": False}
+
+
+def _key(chip, with_grid=False, **extra):
+    return chip_cache_key(chip, "Mask", with_grid, "", {**extra_params, **extra})
+
+
+def test_module_source_hashes_include_transitive_imports():
+    hashes = module_source_hashes("kqcircuits.chips.demo")
+    assert "kqcircuits.chips.demo" in hashes
+    assert "kqcircuits.chips.chip" in hashes
+    assert "kqcircuits.elements.element" in hashes
+    assert "kqcircuits.defaults" in hashes
+
+
+def test_pcell_source_hashes_include_pcells_created_by_name():
+    hashes = pcell_source_hashes()
+    assert "kqcircuits.elements.airbridges.airbridge_rectangular" in hashes
+    assert "kqcircuits.elements.airbridges.airbridge_multi_face" in hashes
+    assert "kqcircuits.elements.airbridge_connection" in hashes
+    assert "kqcircuits.elements.flip_chip_connectors.flip_chip_connector_dc" in hashes
+
+
+def test_cache_key_is_deterministic():
+    assert _key((Demo, "DE1", {"name_brand": "A"})) == _key((Demo, "DE1", {"name_brand": "A"}))
+
+
+def test_cache_key_changes_with_inputs():
+    key = _key((Chip, "CH1", {"box": pya.DBox(0, 0, 10000, 10000)}))
+    assert key != _key((Chip, "CH1", {"box": pya.DBox(0, 0, 10000, 5000)}))
+    assert key != _key((Chip, "CH2", {"box": pya.DBox(0, 0, 10000, 10000)}))
+    assert key != _key((Demo, "CH1", {"box": pya.DBox(0, 0, 10000, 10000)}))
+    assert key != _key((Chip, "CH1", {"box": pya.DBox(0, 0, 10000, 10000)}), with_grid=True)
+    assert key != _key((Chip, "CH1", {"box": pya.DBox(0, 0, 10000, 10000)}), skip_extras=True)
+
+
+def test_cache_key_ignores_debug_and_no_cache_switches():
+    key = _key((Chip, "CH1"))
+    assert key == _key((Chip, "CH1"), enable_debug=True, no_cache=True)
+
+
+def test_cached_chip_is_found_only_with_matching_key(tmp_path):
+    (tmp_path / "CH1.oas").touch()
+    (tmp_path / "CH1.json").touch()
+    save_chip_cache(tmp_path, "CH1", "abc")
+    assert load_cached_chip(tmp_path, "CH1", "abc") == str(tmp_path / "CH1.oas")
+    assert load_cached_chip(tmp_path, "CH1", "def") is None
+
+
+def test_cached_chip_is_invalid_if_files_are_missing(tmp_path):
+    (tmp_path / "CH1.oas").touch()
+    (tmp_path / "CH1.json").touch()
+    save_chip_cache(tmp_path, "CH1", "abc")
+    (tmp_path / "CH1.json").unlink()
+    assert load_cached_chip(tmp_path, "CH1", "abc") is None
+
+
+def test_add_chip_reuses_cached_chips(tmp_path):
+    def add_chips():
+        mask_set = MaskSet(name="Cached", version=1, export_path=tmp_path)
+        mask_set._single_process = True
+        mask_set.add_chip([(Chip, "CH1"), (Chip, "CH2", {"name_brand": "B"})])
+        return mask_set
+
+    mask_set = add_chips()
+    assert mask_set.rebuilt_chips == ["CH1", "CH2"]
+    assert set(mask_set.chips_map_legend) == {"CH1", "CH2"}
+
+    (tmp_path / "Cached_v1" / "Chips" / "CH2" / "CH2.cache.json").unlink()
+    mask_set = add_chips()
+    assert mask_set.rebuilt_chips == ["CH2"]
+    assert list(mask_set.chips_map_legend) == ["CH1", "CH2"]
+
+
+CHIP_MODULE_SOURCE = """
+from kqcircuits.chips.chip import Chip
+from {helpers} import BRAND
+
+
+class ScriptChip(Chip):
+    def build(self):
+        self.name_brand = BRAND
+"""
+
+
+def _import_chip_module(tmp_path, monkeypatch, package):
+    """Writes a chip module and a helper module it imports, and returns the imported chip module"""
+    module_dir = tmp_path / package if package else tmp_path
+    module_dir.mkdir(exist_ok=True)
+    if package:
+        (module_dir / "__init__.py").touch()
+    helpers = f"{package}.helpers" if package else "script_helpers"
+    (module_dir / f"{helpers.rpartition('.')[2]}.py").write_text('BRAND = "A"\n', encoding="utf-8")
+    chip_file = module_dir / "chips.py"
+    chip_file.write_text(CHIP_MODULE_SOURCE.format(helpers=helpers), encoding="utf-8")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    spec = importlib.util.spec_from_file_location(f"{package}.chips" if package else "__main__", chip_file)
+    module = importlib.util.module_from_spec(spec)
+    if not package:
+        module.__spec__ = None  # as in a script run with ``python script.py``
+    monkeypatch.setitem(sys.modules, module.__name__, module)
+    spec.loader.exec_module(module)
+    module_source_hashes.cache_clear()
+    return module, chip_file, module_dir / f"{helpers.rpartition('.')[2]}.py"
+
+
+@pytest.mark.parametrize("package", ["", "own_chips"])
+def test_cache_key_changes_with_chip_source(tmp_path, monkeypatch, package):
+    module, chip_file, helpers_file = _import_chip_module(tmp_path, monkeypatch, package)
+    key = _key((module.ScriptChip, "SC1"))
+    assert key is not None
+
+    chip_file.write_text(chip_file.read_text(encoding="utf-8") + "        self.name_copy = None\n", encoding="utf-8")
+    module_source_hashes.cache_clear()
+    changed_key = _key((module.ScriptChip, "SC1"))
+    assert changed_key != key
+
+    helpers_file.write_text('BRAND = "B"\n', encoding="utf-8")
+    module_source_hashes.cache_clear()
+    assert _key((module.ScriptChip, "SC1")) != changed_key
+
+
+def test_chip_without_source_is_not_cached(monkeypatch):
+    monkeypatch.delattr(sys.modules["__main__"], "__file__", raising=False)
+    module_source_hashes.cache_clear()
+    chip_class = type("MainChip", (Chip,), {"__module__": "__main__"})
+    assert _key((chip_class, "MC1")) is None
@@ -0,0 +1,66 @@
+# This code is part of KQCircuits
+# Copyright (C) 2025 IQM Finland Oy
+#
+# This program is free software: you can redistribute it and/or modify it under the terms of the GNU General Public
+# License as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+# warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with this program. If not, see
+# https://www.gnu.org/licenses/gpl-3.0.html.
+#
+# The software distribution should follow IQM trademark policy for open-source software
+# (meetiqm.com/iqm-open-source-trademark-policy). IQM welcomes contributions to the code.
+# Please see our contribution agreements for individuals (meetiqm.com/iqm-individual-contributor-license-agreement)
+# and organizations (meetiqm.com/iqm-organization-contributor-license-agreement).
+
+import pytest
+
+from kqcircuits.chips.chip import Chip
+from kqcircuits.masks.mask_export import export_mask, export_mask_layers
+from kqcircuits.masks.mask_set import MaskSet
+
+
+@pytest.fixture
+def built_mask_set(tmp_path):
+    mask_set = MaskSet(name="Parallel", version=1, export_path=tmp_path)
+    mask_set._single_process = True
+    chips_map = [["---"] * 15 for _ in range(15)]
+    chips_map[7][6:9] = ["CH1"] * 3
+    mask_layout = mask_set.add_mask_layout(
+        chips_map,
+        mask_export_layers=["base_metal_gap_wo_grid", "-base_metal_gap", "^airbridge_pads", "-^airbridge_flyover"],
+    )
+    mask_set.add_chip(Chip, "CH1")
+    mask_set.build()
+    return mask_set, mask_layout
+
+
+def test_parallel_export_is_identical_to_serial_export(tmp_path, built_mask_set):
+    mask_set, mask_layout = built_mask_set
+    serial_dir = tmp_path / "serial"
+    parallel_dir = tmp_path / "parallel"
+    serial_dir.mkdir()
+    parallel_dir.mkdir()
+    export_mask_layers(serial_dir, mask_layout, mask_set, cpus=1)
+    export_mask_layers(parallel_dir, mask_layout, mask_set, cpus=4)
+
+    serial_files = sorted(p.name for p in serial_dir.iterdir())
+    assert len(serial_files) == 4
+    assert serial_files == sorted(p.name for p in parallel_dir.iterdir())
+    for file_name in serial_files:
+        assert (serial_dir / file_name).read_bytes() == (parallel_dir / file_name).read_bytes()
+
+
+def test_threaded_inversion_is_deterministic(tmp_path, built_mask_set):
+    mask_set, mask_layout = built_mask_set
+    file_bytes = []
+    for i, threads in enumerate([4, 4, 1]):
+        export_dir = tmp_path / f"export_{i}"
+        export_dir.mkdir()
+        export_mask(export_dir, "-base_metal_gap", mask_layout, mask_set, threads)
+        (exported_file,) = export_dir.iterdir()
+        file_bytes.append(exported_file.read_bytes())
+    assert file_bytes[0] == file_bytes[1] == file_bytes[2]
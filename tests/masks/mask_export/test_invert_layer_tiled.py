@@ -0,0 +1,57 @@
+# This code is part of KQCircuits
+# Copyright (C) 2025 IQM Finland Oy
+#
+# This program is free software: you can redistribute it and/or modify it under the terms of the GNU General Public
+# License as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+# warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with this program. If not, see
+# https://www.gnu.org/licenses/gpl-3.0.html.
+#
+# The software distribution should follow IQM trademark policy for open-source software
+# (meetiqm.com/iqm-open-source-trademark-policy). IQM welcomes contributions to the code.
+# Please see our contribution agreements for individuals (meetiqm.com/iqm-individual-contributor-license-agreement)
+# and organizations (meetiqm.com/iqm-organization-contributor-license-agreement).
+
+import pytest
+
+from kqcircuits.masks.mask_export import invert_layer_tiled
+from kqcircuits.pya_resolver import pya
+from kqcircuits.util.geometry_helper import circle_polygon
+
+
+@pytest.fixture
+def grid_cell():
+    """Returns a layout and a cell containing an array of squares, partially outside of the wafer."""
+    layout = pya.Layout()
+    layer = layout.layer(pya.LayerInfo(1, 0))
+    square = layout.create_cell("square")
+    square.shapes(layer).insert(pya.DBox(0, 0, 40, 40))
+    cell = layout.create_cell("top")
+    cell.insert(
+        pya.DCellInstArray(
+            square.cell_index(), pya.DTrans(pya.DVector(-6000, -6000)), pya.DVector(300, 0), pya.DVector(0, 300), 41, 41
+        )
+    )
+    cell.shapes(layer).insert(pya.DBox(-1000, -1000, 1000, 1000))
+    return layout, cell
+
+
+@pytest.mark.parametrize("tile_size, threads", [(1000, 1), (700, 4)])
+def test_tiled_inversion_equals_merged_inversion(grid_cell, tile_size, threads):
+    layout, grid_cell = grid_cell
+    layer = layout.layer(pya.LayerInfo(1, 0))
+    output_layer = layout.layer(pya.LayerInfo(2, 0))
+    wafer_rad = 5000
+
+    invert_layer_tiled(grid_cell, layer, output_layer, wafer_rad, tile_size, threads)
+
+    disc = pya.Region(circle_polygon(wafer_rad).to_itype(layout.dbu))
+    expected = pya.Region(grid_cell.begin_shapes_rec(layer)).merged() ^ disc
+    result = pya.Region(grid_cell.begin_shapes_rec(output_layer))
+    assert not result.is_empty()
+    # edges crossing tile boundaries are snapped to the database grid, which leaves only slivers narrower than dbu
+    assert (result ^ expected).sized(-1).is_empty()
@@ -0,0 +1,94 @@
+# This code is part of KQCircuits
+# Copyright (C) 2025 IQM Finland Oy
+#
+# This program is free software: you can redistribute it and/or modify it under the terms of the GNU General Public
+# License as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+# warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with this program. If not, see
+# https://www.gnu.org/licenses/gpl-3.0.html.
+#
+# The software distribution should follow IQM trademark policy for open-source software
+# (meetiqm.com/iqm-open-source-trademark-policy). IQM welcomes contributions to the code.
+# Please see our contribution agreements for individuals (meetiqm.com/iqm-individual-contributor-license-agreement)
+# and organizations (meetiqm.com/iqm-organization-contributor-license-agreement).
+
+import json
+import sys
+
+from kqcircuits.chips.chip import Chip
+from kqcircuits.masks.mask_set import CHIP_BUILD_TIMES_FILE, MaskSet
+
+
+def _mask_set(tmp_path):
+    mask_set = MaskSet(name="Pool", version=1, export_path=tmp_path)
+    mask_set._extra_params["mock_chips"] = True
+    mask_set._extra_params["no_cache"] = True
+    mask_set._single_process = False
+    return mask_set
+
+
+def test_pool_is_reused_over_add_chip_calls(tmp_path):
+    mask_set = _mask_set(tmp_path)
+    mask_set.add_chip([(Chip, "CH1"), (Chip, "CH2")], cpus=2)
+    pool = mask_set._pool
+    mask_set.add_chip([(Chip, "CH3"), (Chip, "CH4")], cpus=2)
+    assert pool is not None and mask_set._pool is pool
+    mask_set.close_pool()
+    assert mask_set._pool is None
+    assert set(mask_set.chips_map_legend) == {"CH1", "CH2", "CH3", "CH4"}
+
+
+def test_pool_is_restarted_for_classes_defined_after_it(tmp_path, monkeypatch):
+    mask_set = _mask_set(tmp_path)
+    mask_set.add_chip([(Chip, "CH1")], cpus=2)
+    pool = mask_set._pool
+
+    late_chip = type("LateChip", (Chip,), {"__module__": "__main__"})
+    monkeypatch.setattr(sys.modules["__main__"], "LateChip", late_chip, raising=False)
+    mask_set.add_chip([(late_chip, "CH2"), (Chip, "CH3", {"chip_class": late_chip})], cpus=2)
+    assert mask_set._pool is not pool
+    pool = mask_set._pool
+    mask_set.add_chip([(late_chip, "CH4")], cpus=2)
+    assert mask_set._pool is pool
+    mask_set.close_pool()
+    assert set(mask_set.chips_map_legend) == {"CH1", "CH2", "CH3", "CH4"}
+
+
+def test_build_times_are_recorded(tmp_path):
+    mask_set = _mask_set(tmp_path)
+    mask_set.add_chip([(Chip, "CH1"), (Chip, "CH2")], cpus=2)
+    mask_set.close_pool()
+    with open(mask_set._mask_set_dir / CHIP_BUILD_TIMES_FILE, encoding="utf-8") as f:
+        build_times = json.load(f)
+    assert set(build_times["variants"]) == {"CH1", "CH2"}
+    assert all(timing["seconds"] > 0 for timing in build_times["variants"].values())
+    worker_variants = [v for worker in build_times["workers"].values() for v in worker["variants"]]
+    assert sorted(worker_variants) == ["CH1", "CH2"]
+
+
+def test_chips_are_ordered_longest_first(tmp_path):
+    mask_dir = tmp_path / "Pool_v1"
+    mask_dir.mkdir()
+    previous = {"variants": {"CH1": {"seconds": 1.0}, "CH2": {"seconds": 5.0}, "CH3": {"seconds": 3.0}}}
+    (mask_dir / CHIP_BUILD_TIMES_FILE).write_text(json.dumps(previous), encoding="utf-8")
+    mask_set = _mask_set(tmp_path)
+    chips = [(Chip, "CH1"), (Chip, "CH2"), (Chip, "NEW"), (Chip, "CH3")]
+    assert [chip[1] for chip in mask_set._longest_first(chips)] == ["NEW", "CH2", "CH3", "CH1"]
+
+
+def test_chips_are_loaded_in_given_order(tmp_path):
+    mask_dir = tmp_path / "Pool_v1"
+    mask_dir.mkdir()
+    previous = {"variants": {"CH1": {"seconds": 1.0}, "CH2": {"seconds": 2.0}, "CH3": {"seconds": 3.0}}}
+    (mask_dir / CHIP_BUILD_TIMES_FILE).write_text(json.dumps(previous), encoding="utf-8")
+    mask_set = _mask_set(tmp_path)
+    mask_set.add_chip([(Chip, "CH1"), (Chip, "CH2"), (Chip, "CH3")], cpus=2)
+    mask_set.close_pool()
+    assert list(mask_set.chips_map_legend) == ["CH1", "CH2", "CH3"]
+    assert mask_set.rebuilt_chips == ["CH1", "CH2", "CH3"]
+    cell_indices = [cell.cell_index() for cell in mask_set.chips_map_legend.values()]
+    assert cell_indices == sorted(cell_indices)
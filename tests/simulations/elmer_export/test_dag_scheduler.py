@@ -0,0 +1,164 @@
+# This code is part of KQCircuits
+# Copyright (C) 2025 IQM Finland Oy
+#
+# This program is free software: you can redistribute it and/or modify it under the terms of the GNU General Public
+# License as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+# warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with this program. If not, see
+# https://www.gnu.org/licenses/gpl-3.0.html.
+#
+# The software distribution should follow IQM trademark policy for open-source software
+# (meetiqm.com/iqm-open-source-trademark-policy). IQM welcomes contributions to the code.
+# Please see our contribution agreements for individuals (meetiqm.com/iqm-individual-contributor-license-agreement)
+# and organizations (meetiqm.com/iqm-organization-contributor-license-agreement).
+
+import json
+import os
+from pathlib import Path
+
+import pytest
+
+SCRIPT_PATH = Path(__file__).parents[3] / "klayout_package" / "python" / "scripts" / "simulations" / "elmer"
+
+# run.py replacement which records the start and end of each stage and fails the stage given in the simulation json
+FAKE_RUN_SCRIPT = """
+import json
+import sys
+import time
+
+with open(sys.argv[1], encoding="utf-8") as f:
+    data = json.load(f)
+stage = sys.argv[2]
+with open("events.txt", "a", encoding="utf-8") as f:
+    f.write(f"start {stage} {data['name']}\\n")
+time.sleep(0.2)
+with open("events.txt", "a", encoding="utf-8") as f:
+    f.write(f"end {stage} {data['name']}\\n")
+sys.exit(1 if data.get("fail_stage") == stage else 0)
+"""
+
+STAGE_FLAGS = {
+    "gmsh": "--only-gmsh",
+    "elmergrid": "--only-elmergrid",
+    "sifs": "--only-elmer-sifs",
+    "elmer": "--only-elmer",
+    "results": "--write-project-results",
+}
+
+
+@pytest.fixture
+def dag_scheduler(monkeypatch):
+    monkeypatch.syspath_prepend(str(SCRIPT_PATH))
+    import dag_scheduler  # pylint: disable=import-outside-toplevel,import-error
+
+    return dag_scheduler
+
+
+@pytest.fixture
+def run_dir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "run.py").write_text(FAKE_RUN_SCRIPT, encoding="utf-8")
+    return tmp_path
+
+
+def _write_simulation(name, mesh_name=None, elmer_processes=1, fail_stage=None):
+    data = {
+        "name": name,
+        "mesh_name": mesh_name or name,
+        "workflow": {"gmsh_n_threads": 1, "elmer_n_processes": elmer_processes, "elmer_n_threads": 1},
+    }
+    if fail_stage is not None:
+        data["fail_stage"] = STAGE_FLAGS[fail_stage]
+    Path(f"{name}.json").write_text(json.dumps(data), encoding="utf-8")
+    return f"{name}.json"
+
+
+def _run(dag_scheduler, json_files, cpus):
+    tasks = dag_scheduler.build_tasks(json_files)
+    failed = dag_scheduler.run_tasks(tasks, cpus=cpus, run_script="run.py", poll_interval=0.01)
+    flags = {flag: stage for stage, flag in STAGE_FLAGS.items()}
+    events = []
+    for line in Path("events.txt").read_text(encoding="utf-8").splitlines():
+        event, flag, name = line.split()
+        events.append((event, f"{flags[flag]}:{name}"))
+    return tasks, failed, events
+
+
+@pytest.mark.usefixtures("run_dir")
+def test_tasks_of_shared_mesh(dag_scheduler):
+    tasks = dag_scheduler.build_tasks([_write_simulation("a"), _write_simulation("b", mesh_name="a")])
+    assert "gmsh:a" in tasks and "gmsh:b" not in tasks
+    assert tasks["sifs:b"].deps == ["elmergrid:a"]
+    assert tasks["gmsh:a"].priority > tasks["sifs:a"].priority
+
+
+@pytest.mark.usefixtures("run_dir")
+def test_tasks_start_after_their_dependencies(dag_scheduler):
+    json_files = [_write_simulation("a"), _write_simulation("b", mesh_name="a"), _write_simulation("c")]
+    tasks, failed, events = _run(dag_scheduler, json_files, cpus=4)
+    assert not failed
+    assert {name for event, name in events if event == "end"} == set(tasks)
+    for task in tasks.values():
+        start = events.index(("start", task.name))
+        assert all(events.index(("end", dep)) < start for dep in task.deps)
+
+
+@pytest.mark.usefixtures("run_dir")
+def test_failure_skips_dependent_tasks(dag_scheduler):
+    json_files = [_write_simulation("a", fail_stage="elmergrid"), _write_simulation("b", mesh_name="a")]
+    json_files.append(_write_simulation("c", fail_stage="elmer"))
+    _, failed, events = _run(dag_scheduler, json_files, cpus=2)
+    skipped = {"sifs:a", "sifs:b", "elmer:a", "elmer:b", "results:a", "results:b", "results:c"}
+    assert failed == {"elmergrid:a", "elmer:c"} | skipped
+    started = {name for event, name in events if event == "start"}
+    assert started == {"gmsh:a", "elmergrid:a", "gmsh:c", "elmergrid:c", "sifs:c", "elmer:c"}
+    assert json.loads(Path(dag_scheduler.STATE_FILE).read_text(encoding="utf-8"))["done"] == [
+        "elmergrid:c",
+        "gmsh:a",
+        "gmsh:c",
+        "sifs:c",
+    ]
+
+
+@pytest.mark.usefixtures("run_dir")
+def test_running_tasks_fit_into_cpus(dag_scheduler):
+    json_files = [_write_simulation(name, elmer_processes=2) for name in "abcd"]
+    json_files.append(_write_simulation("e", elmer_processes=8))
+    tasks, failed, events = _run(dag_scheduler, json_files, cpus=4)
+    assert not failed
+    used_cpus, max_used_cpus = 0, 0
+    for event, name in events:
+        # tasks larger than the machine are run alone using all cpus
+        used_cpus += min(tasks[name].cpus, 4) if event == "start" else -min(tasks[name].cpus, 4)
+        max_used_cpus = max(max_used_cpus, used_cpus)
+    assert max_used_cpus == 4
+
+
+def test_finished_tasks_are_not_run_again(dag_scheduler, run_dir):
+    json_files = [_write_simulation("a")]
+    _run(dag_scheduler, json_files, cpus=2)
+    (run_dir / "events.txt").unlink()
+    (run_dir / "events.txt").touch()
+    _, failed, events = _run(dag_scheduler, json_files, cpus=2)
+    assert not failed and not events
+
+
+def test_state_of_replaced_simulations_is_ignored(dag_scheduler, run_dir):
+    json_files = [_write_simulation("a")]
+    _run(dag_scheduler, json_files, cpus=2)
+    (run_dir / "events.txt").unlink()
+    (run_dir / "events.txt").touch()
+    # re-exporting rewrites the json file with the same simulation name
+    os.utime(run_dir / "a.json", ns=(0, 0))
+    tasks, failed, events = _run(dag_scheduler, json_files, cpus=2)
+    assert not failed
+    assert {name for event, name in events if event == "end"} == set(tasks)
+
+
+def test_manifest_lists_json_files(dag_scheduler, run_dir):
+    (run_dir / "simulations.txt").write_text("a.json\n\nsub dir/b.json\n", encoding="utf-8")
+    assert dag_scheduler.read_manifest(run_dir / "simulations.txt") == ["a.json", "sub dir/b.json"]
@@ -0,0 +1,91 @@
+# This code is part of KQCircuits
+# Copyright (C) 2025 IQM Finland Oy
+#
+# This program is free software: you can redistribute it and/or modify it under the terms of the GNU General Public
+# License as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+# warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with this program. If not, see
+# https://www.gnu.org/licenses/gpl-3.0.html.
+#
+# The software distribution should follow IQM trademark policy for open-source software
+# (meetiqm.com/iqm-open-source-trademark-policy). IQM welcomes contributions to the code.
+# Please see our contribution agreements for individuals (meetiqm.com/iqm-individual-contributor-license-agreement)
+# and organizations (meetiqm.com/iqm-organization-contributor-license-agreement).
+
+import json
+from pathlib import Path
+
+import pytest
+
+from kqcircuits.qubits.double_pads import DoublePads
+from kqcircuits.simulations.export.elmer.elmer_export import export_elmer
+from kqcircuits.simulations.export.elmer.elmer_solution import ElmerCapacitanceSolution
+from kqcircuits.simulations.single_element_simulation import get_single_element_sim_class
+
+DoublePadsSim = get_single_element_sim_class(DoublePads)
+
+
+@pytest.fixture
+def mesh_names(layout, tmp_path):
+    simulations = [
+        DoublePadsSim(layout, name="a"),
+        DoublePadsSim(layout, name="b"),
+        DoublePadsSim(layout, name="c", ground_gap=[700, 800]),
+    ]
+    solutions = [
+        ElmerCapacitanceSolution(name="_s1"),
+        ElmerCapacitanceSolution(name="_s2", mesh_size={"1t1_gap": 2}),
+        ElmerCapacitanceSolution(name="_s3", p_element_order=2),
+    ]
+    export_elmer([(sim, sol) for sim in simulations for sol in solutions], tmp_path)
+    names = {}
+    for sim in simulations:
+        for sol in solutions:
+            with open(tmp_path / f"{sim.name}{sol.name}.json", encoding="utf-8") as f:
+                names[sim.name + sol.name] = json.load(f)["mesh_name"]
+    return names
+
+
+def test_equal_geometry_shares_mesh(mesh_names):
+    assert mesh_names["b_s1"] == "a_s1"
+    assert mesh_names["b_s2"] == "a_s2"
+
+
+def test_solution_parameters_not_affecting_mesh_share_mesh(mesh_names):
+    assert mesh_names["a_s3"] == "a_s1"
+    assert mesh_names["b_s3"] == "a_s1"
+
+
+def test_different_mesh_size_does_not_share_mesh(mesh_names):
+    assert mesh_names["a_s2"] == "a_s2"
+
+
+def test_different_geometry_does_not_share_mesh(mesh_names):
+    assert mesh_names["c_s1"] == "c_s1"
+    assert mesh_names["c_s2"] == "c_s2"
+    assert mesh_names["c_s3"] == "c_s1"
+
+
+def test_mesh_deduplication_is_logged(layout, tmp_path, caplog):
+    caplog.set_level("INFO")
+    simulations = [DoublePadsSim(layout, name="a"), DoublePadsSim(layout, name="b")]
+    export_elmer(simulations, tmp_path)
+    assert "Mesh deduplication: 1 meshes for 2 simulations (50% of simulations reuse a mesh)" in caplog.text
+
+
+def test_parallel_workflow_passes_json_files_in_manifest(layout, tmp_path):
+    simulations = [DoublePadsSim(layout, name=f"sim_{i}") for i in range(3)]
+    workflow = {"n_workers": 2, "elmer_n_processes": 1, "elmer_n_threads": 1}
+    script = export_elmer(simulations, tmp_path, workflow=workflow)
+    manifest = (tmp_path / "simulation_simulations.txt").read_text(encoding="utf-8").splitlines()
+    assert manifest == ["sim_0.json", "sim_1.json", "sim_2.json"]
+    scheduler_lines = [
+        line for line in Path(script).read_text(encoding="utf-8").splitlines() if "dag_scheduler.py" in line
+    ]
+    assert len(scheduler_lines) == 1
+    assert '--manifest "simulation_simulations.txt"' in scheduler_lines[0]
+    assert ".json" not in scheduler_lines[0]
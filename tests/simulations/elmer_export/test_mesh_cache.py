@@ -0,0 +1,90 @@
+# This code is part of KQCircuits
+# Copyright (C) 2025 IQM Finland Oy
+#
+# This program is free software: you can redistribute it and/or modify it under the terms of the GNU General Public
+# License as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+# warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with this program. If not, see
+# https://www.gnu.org/licenses/gpl-3.0.html.
+#
+# The software distribution should follow IQM trademark policy for open-source software
+# (meetiqm.com/iqm-open-source-trademark-policy). IQM welcomes contributions to the code.
+# Please see our contribution agreements for individuals (meetiqm.com/iqm-individual-contributor-license-agreement)
+# and organizations (meetiqm.com/iqm-organization-contributor-license-agreement).
+
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+SCRIPT_PATH = Path(__file__).parents[3] / "klayout_package" / "python" / "scripts" / "simulations" / "elmer"
+
+# ElmerGrid replacement which logs its arguments and writes the converted mesh
+FAKE_ELMERGRID = """#!{python}
+import sys
+from pathlib import Path
+
+with open("{log}", "a", encoding="utf-8") as f:
+    f.write(" ".join(sys.argv[1:]) + "\\n")
+mesh_dir = Path(Path(sys.argv[3]).stem)
+mesh_dir.mkdir(exist_ok=True)
+(mesh_dir / "mesh.elements").write_text("{version}", encoding="utf-8")
+"""
+
+
+@pytest.fixture
+def run_helpers(monkeypatch):
+    monkeypatch.syspath_prepend(str(SCRIPT_PATH))
+    import run_helpers  # pylint: disable=import-outside-toplevel,import-error
+
+    return run_helpers
+
+
+@pytest.fixture
+def elmergrid(tmp_path, monkeypatch):
+    """Installs a fake ElmerGrid into PATH and returns the path of its log"""
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    log = tmp_path / "elmergrid.log"
+    (bin_dir / "ElmerGrid").write_text(
+        FAKE_ELMERGRID.format(python=sys.executable, log=log, version=1), encoding="utf-8"
+    )
+    (bin_dir / "ElmerGrid").chmod(0o755)
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+    return log
+
+
+def _run_elmer_grid(run_helpers, run_dir, workflow, monkeypatch):
+    run_dir.mkdir()
+    monkeypatch.chdir(run_dir)
+    (run_dir / "sim.msh").write_text("mesh", encoding="utf-8")
+    run_helpers.run_elmer_grid("sim.msh", 1, workflow=workflow)
+    return (run_dir / "sim" / "mesh.elements").read_text(encoding="utf-8")
+
+
+def test_mesh_cache_is_disabled_by_default(run_helpers, monkeypatch, tmp_path):
+    monkeypatch.delenv("KQC_MESH_CACHE_DIR", raising=False)
+    assert run_helpers.get_mesh_cache_dir({}) is None
+    assert run_helpers.get_mesh_cache_dir({"mesh_cache_dir": None}) is None
+    assert run_helpers.get_mesh_cache_dir({"mesh_cache_dir": str(tmp_path)}) == tmp_path
+    monkeypatch.setenv("KQC_MESH_CACHE_DIR", str(tmp_path))
+    assert run_helpers.get_mesh_cache_dir({}) == tmp_path
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="Fake ElmerGrid is a shell script")
+def test_elmergrid_output_is_cached_per_elmergrid_version(run_helpers, elmergrid, tmp_path, monkeypatch):
+    workflow = {"mesh_cache_dir": str(tmp_path / "cache")}
+    assert _run_elmer_grid(run_helpers, tmp_path / "run1", workflow, monkeypatch) == "1"
+    assert _run_elmer_grid(run_helpers, tmp_path / "run2", workflow, monkeypatch) == "1"
+    assert len(elmergrid.read_text(encoding="utf-8").splitlines()) == 1
+
+    (tmp_path / "bin" / "ElmerGrid").write_text(
+        (tmp_path / "bin" / "ElmerGrid").read_text(encoding="utf-8").replace('"1"', '"2"'), encoding="utf-8"
+    )
+    assert _run_elmer_grid(run_helpers, tmp_path / "run3", workflow, monkeypatch) == "2"
+    assert elmergrid.read_text(encoding="utf-8").splitlines() == ["14 2 sim.msh"] * 2
@@ -0,0 +1,117 @@
+# This code is part of KQCircuits
+# Copyright (C) 2025 IQM Finland Oy
+#
+# This program is free software: you can redistribute it and/or modify it under the terms of the GNU General Public
+# License as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+# warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with this program. If not, see
+# https://www.gnu.org/licenses/gpl-3.0.html.
+#
+# The software distribution should follow IQM trademark policy for open-source software
+# (meetiqm.com/iqm-open-source-trademark-policy). IQM welcomes contributions to the code.
+# Please see our contribution agreements for individuals (meetiqm.com/iqm-individual-contributor-license-agreement)
+# and organizations (meetiqm.com/iqm-organization-contributor-license-agreement).
+
+import logging
+import time
+
+import pytest
+
+from kqcircuits.pya_resolver import pya
+from kqcircuits.simulations.port import InternalPort
+from kqcircuits.simulations.simulation import Simulation
+from kqcircuits.util.parameters import Param, pdt
+
+
+class IslandGridSimulation(Simulation):
+    """Simulation with a grid of metal islands in the ground plane. Neighbouring islands in a row may be connected by
+    airbridges.
+    """
+
+    columns = Param(pdt.TypeInt, "Number of island columns", 3)
+    rows = Param(pdt.TypeInt, "Number of island rows", 1)
+    bridged = Param(pdt.TypeBoolean, "Connect islands of each row by airbridges", False)
+    port_island = Param(pdt.TypeInt, "Index of the island with an internal port, or -1 for no port", -1)
+
+    def build(self):
+        islands = pya.Region()
+        for row in range(self.rows):
+            for col in range(self.columns):
+                islands.insert(self._island(row, col).to_itype(self.layout.dbu))
+                if self.bridged and col > 0:
+                    pads = [self._island(row, c).enlarged(-5, -5) for c in (col - 1, col)]
+                    for pad in pads:
+                        self.cell.shapes(self.get_layer("airbridge_pads")).insert(pad)
+                    self.cell.shapes(self.get_layer("airbridge_flyover")).insert(pads[0] + pads[1])
+        gap = pya.Region(self.box.enlarged(-50, -50).to_itype(self.layout.dbu)) - islands
+        self.cell.shapes(self.get_layer("base_metal_gap_wo_grid")).insert(gap)
+        if self.port_island >= 0:
+            island = self._island(self.port_island // self.columns, self.port_island % self.columns)
+            self.ports.append(InternalPort(1, island.center(), island.p1 - pya.DVector(5, 5)))
+
+    @staticmethod
+    def _island(row, col):
+        return pya.DBox(100 + 30 * col, 100 + 30 * row, 120 + 30 * col, 120 + 30 * row)
+
+
+def _region(simulation, name):
+    return pya.Region(simulation.cell.begin_shapes_rec(simulation.layout.layer(simulation.layers[name]["layer"], 0)))
+
+
+def _excitations(simulation):
+    return {name: layer["excitation"] for name, layer in simulation.layers.items() if "excitation" in layer}
+
+
+def test_floating_islands_are_separate_signals(layout):
+    simulation = IslandGridSimulation(layout, columns=3, box=pya.DBox(0, 0, 300, 300))
+    assert _excitations(simulation) == {"1t1_ground": 0, "1t1_signal_1": 1, "1t1_signal_2": 2, "1t1_signal_3": 3}
+
+
+def test_airbridges_connect_islands(layout):
+    simulation = IslandGridSimulation(layout, columns=3, bridged=True, box=pya.DBox(0, 0, 300, 300))
+    assert _excitations(simulation) == {
+        "1t1_ground": 0,
+        "1t1_signal_1": 1,
+        "1t1_airbridge_pads": 1,
+        "1t1_airbridge_flyover": 1,
+    }
+
+
+def test_port_metal_is_first_signal(layout):
+    simulation = IslandGridSimulation(layout, columns=3, port_island=2, box=pya.DBox(0, 0, 300, 300))
+    excitations = _excitations(simulation)
+    assert excitations["1t1_signal_1"] == 1
+    assert _region(simulation, "1t1_signal_1").bbox() == pya.DBox(160, 100, 180, 120).to_itype(layout.dbu)
+
+
+def test_ground_touching_simulation_box_edge(layout):
+    simulation = IslandGridSimulation(layout, columns=0, box=pya.DBox(0, 0, 300, 300))
+    assert _excitations(simulation) == {"1t1_ground": 0}
+    expected = pya.Region(pya.DBox(0, 0, 300, 300).to_itype(layout.dbu)) - pya.Region(
+        pya.DBox(50, 50, 250, 250).to_itype(layout.dbu)
+    )
+    assert (_region(simulation, "1t1_ground") ^ expected).is_empty()
+
+
+@pytest.mark.slow
+@pytest.mark.parametrize("columns", [10, 100, 1000])
+def test_split_metal_layers_scaling(layout, caplog, monkeypatch, columns):
+    caplog.set_level(logging.INFO)
+    durations = []
+    split = Simulation.split_metal_layers_by_excitation
+
+    def timed_split(self):
+        start = time.perf_counter()
+        split(self)
+        durations.append(time.perf_counter() - start)
+
+    monkeypatch.setattr(Simulation, "split_metal_layers_by_excitation", timed_split)
+    rows = 4
+    box = pya.DBox(0, 0, 200 + 30 * columns, 200 + 30 * rows)
+    simulation = IslandGridSimulation(layout, columns=columns, rows=rows, bridged=True, box=box)
+    logging.info(f"Split metal layers of {columns * rows} bridged islands in {durations[0]:.3f} s")
+    assert len([n for n in _excitations(simulation) if "_signal_" in n]) == rows
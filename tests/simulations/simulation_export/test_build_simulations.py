@@ -0,0 +1,91 @@
+# This code is part of KQCircuits
+# Copyright (C) 2025 IQM Finland Oy
+#
+# This program is free software: you can redistribute it and/or modify it under the terms of the GNU General Public
+# License as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+# warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with this program. If not, see
+# https://www.gnu.org/licenses/gpl-3.0.html.
+#
+# The software distribution should follow IQM trademark policy for open-source software
+# (meetiqm.com/iqm-open-source-trademark-policy). IQM welcomes contributions to the code.
+# Please see our contribution agreements for individuals (meetiqm.com/iqm-individual-contributor-license-agreement)
+# and organizations (meetiqm.com/iqm-organization-contributor-license-agreement).
+
+import pytest
+
+from kqcircuits.pya_resolver import pya
+from kqcircuits.qubits.double_pads import DoublePads
+from kqcircuits.simulations.export.simulation_export import (
+    build_simulations,
+    cross_sweep_simulation,
+    get_geometry_fingerprint,
+    sweep_simulation,
+)
+from kqcircuits.simulations.single_element_simulation import get_single_element_sim_class
+from kqcircuits.simulations.waveguides_sim import WaveGuidesSim
+
+_WG_PARAMETERS = {"name": "wg", "use_edge_ports": False}
+
+
+def _assert_same_simulations(sims, ref_sims):
+    assert [s.name for s in sims] == [s.name for s in ref_sims]
+    for sim, ref in zip(sims, ref_sims):
+        assert sim.cell.name == ref.cell.name
+        assert sim.layers == ref.layers
+        assert [p.number for p in sim.ports] == [p.number for p in ref.ports]
+        assert get_geometry_fingerprint(sim) == get_geometry_fingerprint(ref)
+        for layer_info in ref.layout.layer_infos():
+            region = pya.Region(sim.cell.begin_shapes_rec(sim.layout.layer(layer_info)))
+            ref_region = pya.Region(ref.cell.begin_shapes_rec(ref.layout.layer(layer_info)))
+            assert (region ^ ref_region).is_empty()
+
+
+@pytest.mark.parametrize("sweep_function", [sweep_simulation, cross_sweep_simulation])
+def test_parallel_sweep_equals_sequential_sweep(sweep_function):
+    sweeps = {"n_guides": [1, 2], "spacing": [50, 150]}
+    ref_sims = sweep_function(pya.Layout(), WaveGuidesSim, _WG_PARAMETERS, sweeps)
+    sims = sweep_function(pya.Layout(), WaveGuidesSim, _WG_PARAMETERS, sweeps, cpus=2)
+    _assert_same_simulations(sims, ref_sims)
+
+
+def test_parallel_sweep_has_same_cell_hierarchy_as_sequential_sweep():
+    def cells(layout):
+        return [
+            (cell.name, cell.is_pcell_variant(), [layout.cell(i).name for i in cell.each_child_cell()])
+            for cell in layout.each_cell()
+        ]
+
+    sweeps = {"n_guides": [1, 2], "spacing": [50, 150]}
+    ref_layout, layout = pya.Layout(), pya.Layout()
+    sweep_simulation(ref_layout, WaveGuidesSim, _WG_PARAMETERS, sweeps)
+    sweep_simulation(layout, WaveGuidesSim, _WG_PARAMETERS, sweeps, cpus=2)
+    assert cells(layout) == cells(ref_layout)
+
+
+def test_parallel_sweep_uses_given_layout():
+    layout = pya.Layout()
+    sims = sweep_simulation(layout, WaveGuidesSim, _WG_PARAMETERS, {"n_guides": [1, 2, 3]}, cpus=2)
+    assert all(sim.layout is layout for sim in sims)
+    assert [c.name for c in layout.top_cells()] == ["wg_n_guides_1", "wg_n_guides_2", "wg_n_guides_3"]
+
+
+def test_unpicklable_simulation_class_is_built_sequentially():
+    sim_class = get_single_element_sim_class(DoublePads)
+    parameter_list = [{"name": "a"}, {"name": "b", "ground_gap": [700, 800]}]
+    ref_sims = build_simulations(pya.Layout(), sim_class, parameter_list)
+    sims = build_simulations(pya.Layout(), sim_class, parameter_list, cpus=2)
+    _assert_same_simulations(sims, ref_sims)
+
+
+def test_build_solutions_without_layout():
+    class Solution:
+        def __init__(self, **parameters):
+            self.parameters = parameters
+
+    solutions = build_simulations(None, Solution, [{"a": 1}, {"a": 2}], cpus=2)
+    assert [s.parameters for s in solutions] == [{"a": 1}, {"a": 2}]
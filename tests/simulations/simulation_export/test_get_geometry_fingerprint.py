@@ -0,0 +1,60 @@
+# This code is part of KQCircuits
+# Copyright (C) 2025 IQM Finland Oy
+#
+# This program is free software: you can redistribute it and/or modify it under the terms of the GNU General Public
+# License as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+# warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with this program. If not, see
+# https://www.gnu.org/licenses/gpl-3.0.html.
+#
+# The software distribution should follow IQM trademark policy for open-source software
+# (meetiqm.com/iqm-open-source-trademark-policy). IQM welcomes contributions to the code.
+# Please see our contribution agreements for individuals (meetiqm.com/iqm-individual-contributor-license-agreement)
+# and organizations (meetiqm.com/iqm-organization-contributor-license-agreement).
+
+from kqcircuits.pya_resolver import pya
+from kqcircuits.qubits.double_pads import DoublePads
+from kqcircuits.simulations.export.simulation_export import get_geometry_fingerprint
+from kqcircuits.simulations.single_element_simulation import get_single_element_sim_class
+
+DoublePadsSim = get_single_element_sim_class(DoublePads)
+
+
+def test_fingerprint_does_not_depend_on_name(layout):
+    assert get_geometry_fingerprint(DoublePadsSim(layout, name="a")) == get_geometry_fingerprint(
+        DoublePadsSim(layout, name="b")
+    )
+
+
+def test_fingerprint_is_equal_in_different_layouts():
+    assert get_geometry_fingerprint(DoublePadsSim(pya.Layout())) == get_geometry_fingerprint(
+        DoublePadsSim(pya.Layout())
+    )
+
+
+def test_fingerprint_depends_on_geometry(layout):
+    assert get_geometry_fingerprint(DoublePadsSim(layout, name="a")) != get_geometry_fingerprint(
+        DoublePadsSim(layout, name="b", ground_gap=[700, 800])
+    )
+
+
+def test_fingerprint_depends_on_z_levels(layout):
+    assert get_geometry_fingerprint(DoublePadsSim(layout, name="a")) != get_geometry_fingerprint(
+        DoublePadsSim(layout, name="b", substrate_height=[600])
+    )
+
+
+def test_fingerprint_depends_on_materials(layout):
+    assert get_geometry_fingerprint(DoublePadsSim(layout, name="a")) != get_geometry_fingerprint(
+        DoublePadsSim(layout, name="b", material_dict={"silicon": {"permittivity": 11.5}})
+    )
+
+
+def test_fingerprint_depends_on_box(layout):
+    assert get_geometry_fingerprint(DoublePadsSim(layout, name="a")) != get_geometry_fingerprint(
+        DoublePadsSim(layout, name="b", box=pya.DBox(pya.DPoint(0, 0), pya.DPoint(600, 500)))
+    )
@@ -16,10 +16,15 @@
 # Please see our contribution agreements for individuals (meetiqm.com/iqm-individual-contributor-license-agreement)
 # and organizations (meetiqm.com/iqm-organization-contributor-license-agreement).
 
+import math
+
+import numpy as np
 import pytest
 from kqcircuits.klayout_view import KLayoutView
+from kqcircuits.chips.chip import Chip
 from kqcircuits.chips.demo import Demo
-from kqcircuits.util.area import get_area_and_density
+from kqcircuits.pya_resolver import pya, lay
+from kqcircuits.util.area import get_area_and_density, export_density_maps, export_density_map_image
 from kqcircuits.defaults import default_faces
 
 
@@ -35,6 +40,13 @@ def demo_chip_cell(view):
     return inst.cell
 
 
+@pytest.fixture
+def small_chip_cell(view):
+    """Returns a small chip cell, with grid enabled and layers merged"""
+    inst, _ = view.insert_cell(Chip, with_grid=True, merge_base_metal_gap=True, box=pya.DBox(0, 0, 3000, 3000))
+    return inst.cell
+
+
 def test_get_area_and_density_ground_grid_optimization(demo_chip_cell):
     """Compare optimized and non-optimized area calculation results"""
     layer_infos = [default_faces["1t1"][layer] for layer in ["ground_grid", "base_metal_gap", "base_metal_gap_wo_grid"]]
@@ -58,3 +70,69 @@ def test_get_area_and_density_ground_grid_optimization(demo_chip_cell):
         )
         < 1e-4
     )
+
+
+def test_get_area_and_density_accumulates_all_tiles(small_chip_cell):
+    """Total area over several tiles equals the merged area of the layer"""
+    layout = small_chip_cell.layout()
+    layer_info = default_faces["1t1"]["base_metal_gap_wo_grid"]
+    expected_area = pya.Region(small_chip_cell.begin_shapes_rec(layout.layer(layer_info))).area() * layout.dbu**2
+
+    results = get_area_and_density(small_chip_cell, [layer_info], tile_size=1000)
+
+    assert abs(1 - results[layer_info.name]["area"] / expected_area) < 1e-6
+
+
+@pytest.mark.parametrize("optimize", [False, True])
+def test_density_map_sums_to_total_area(small_chip_cell, optimize):
+    layer_infos = [default_faces["1t1"][layer] for layer in ["ground_grid", "base_metal_gap", "base_metal_gap_wo_grid"]]
+
+    results = get_area_and_density(small_chip_cell, layer_infos, optimize, tile_size=1000, density_map=True)
+
+    bbox = small_chip_cell.dbbox()
+    expected_shape = (math.ceil(bbox.height() / 1000), math.ceil(bbox.width() / 1000))
+    for values in results.values():
+        assert values["area_map"].shape == expected_shape
+        assert abs(1 - values["area_map"].sum() / values["area"]) < 1e-4
+        # edge tiles are clipped to the chip, so only the inner tiles have the full tile area
+        assert np.allclose(values["density_map"][:-1, :-1], values["area_map"][:-1, :-1] / 1000**2)
+
+
+def test_export_density_maps(small_chip_cell, tmp_path):
+    layer_infos = [default_faces["1t1"][layer] for layer in ["base_metal_gap", "base_metal_gap_wo_grid"]]
+    results = get_area_and_density(small_chip_cell, layer_infos, tile_size=2500, density_map=True)
+
+    export_density_maps(results, tmp_path / "chip_density_map", ["1t1_base_metal_gap"], 2500)
+
+    data = np.load(tmp_path / "chip_density_map.npz")
+    assert data["tile_size"] == 2500
+    assert np.array_equal(data["1t1_base_metal_gap-density"], results["1t1_base_metal_gap"]["density_map"])
+    assert np.array_equal(data["1t1_base_metal_gap_wo_grid-area"], results["1t1_base_metal_gap_wo_grid"]["area_map"])
+    assert (tmp_path / "chip_density_map-1t1_base_metal_gap.png").exists()
+    assert not (tmp_path / "chip_density_map-1t1_base_metal_gap_wo_grid.png").exists()
+
+
+def test_density_of_edge_tiles_is_relative_to_clipped_tile_area(view):
+    layout = view.layout
+    cell = layout.create_cell("box")
+    layer_info = default_faces["1t1"]["base_metal_gap_wo_grid"]
+    cell.shapes(layout.layer(layer_info)).insert(pya.DBox(0, 0, 2500, 1200))
+
+    results = get_area_and_density(cell, [layer_info], tile_size=1000, density_map=True)
+
+    assert np.allclose(results[layer_info.name]["area_map"], [[1e6, 1e6, 5e5], [2e5, 2e5, 1e5]])
+    assert np.allclose(results[layer_info.name]["density_map"], 1.0)
+
+
+def test_export_density_map_image(tmp_path):
+    density = np.array([[0.0, 1.0], [0.5, 2.0]])
+
+    export_density_map_image(density, str(tmp_path / "density.png"), size=20)
+
+    image = lay.PixelBuffer.read_png(str(tmp_path / "density.png"))
+    assert (image.width(), image.height()) == (20, 20)
+    # the first density row is at the bottom of the image and values are clipped to full density
+    assert image.pixel(0, 19) & 0xFFFFFF == 0x0000FF
+    assert image.pixel(19, 10) & 0xFFFFFF == 0xFF0000
+    assert image.pixel(0, 0) & 0xFFFFFF == 0x800080
+    assert image.pixel(19, 0) & 0xFFFFFF == 0xFF0000
@@ -0,0 +1,131 @@
+# This code is part of KQCircuits
+# Copyright (C) 2025 IQM Finland Oy
+#
+# This program is free software: you can redistribute it and/or modify it under the terms of the GNU General Public
+# License as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+# warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with this program. If not, see
+# https://www.gnu.org/licenses/gpl-3.0.html.
+#
+# The software distribution should follow IQM trademark policy for open-source software
+# (meetiqm.com/iqm-open-source-trademark-policy). IQM welcomes contributions to the code.
+# Please see our contribution agreements for individuals (meetiqm.com/iqm-individual-contributor-license-agreement)
+# and organizations (meetiqm.com/iqm-organization-contributor-license-agreement).
+
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import pytest
+
+from kqcircuits.chips.chip import Chip
+from kqcircuits.chips.demo import Demo
+from kqcircuits.defaults import default_layers
+from kqcircuits.pya_resolver import pya
+from kqcircuits.util.area import get_area_and_density
+from kqcircuits.util.groundgrid import insert_ground_grid, ground_grid_element_cells
+from kqcircuits.util.merge import merge_layout_layers_on_face
+
+grid_layer = pya.LayerInfo(1, 0)
+
+
+def _grid_cell(layout, hierarchical):
+    cell = layout.create_cell("top")
+    protection = pya.Region(pya.Box(20000, 20000, 60000, 60000)) + pya.Region(pya.Box(70000, 0, 71000, 100000))
+    insert_ground_grid(
+        cell, grid_layer, pya.Box(0, 0, 100000, 100000), protection, 1000, 500, hierarchical=hierarchical
+    )
+    return cell
+
+
+def _region(cell, layer_name):
+    return pya.Region(cell.begin_shapes_rec(cell.layout().layer(default_layers[layer_name])))
+
+
+def test_hierarchical_grid_has_same_shapes():
+    layout = pya.Layout()
+    flat = pya.Region(_grid_cell(layout, False).begin_shapes_rec(layout.layer(grid_layer)))
+    hierarchical_cell = _grid_cell(layout, True)
+    hierarchical = pya.Region(hierarchical_cell.begin_shapes_rec(layout.layer(grid_layer)))
+    assert flat.count() == hierarchical.count() > 0
+    assert (flat ^ hierarchical).is_empty()
+    assert hierarchical_cell.shapes(layout.layer(grid_layer)).is_empty()
+    assert hierarchical_cell.child_instances() < hierarchical.count() / 10
+
+
+def test_hierarchical_grid_element_cells():
+    layout = pya.Layout()
+    assert ground_grid_element_cells(_grid_cell(layout, False)) == []
+    assert len(ground_grid_element_cells(_grid_cell(layout, True))) == 1
+
+
+@pytest.fixture(scope="module")
+def small_chips():
+    layout = pya.Layout()
+    box = pya.DBox(0, 0, 3000, 3000)
+    chips = {h: Chip.create(layout, with_grid=True, hierarchical_grid=h, box=box) for h in (False, True)}
+    return layout, chips
+
+
+def test_merge_keeps_hierarchical_grid(small_chips):
+    layout, chips = small_chips
+    face = {name: default_layers[f"1t1_{name}"] for name in ("base_metal_gap_wo_grid", "base_metal_addition")}
+    face.update({name: default_layers[f"1t1_{name}"] for name in ("ground_grid", "base_metal_gap")})
+    cells = {}
+    for hierarchical, chip in chips.items():
+        cells[hierarchical] = layout.cell(layout.convert_cell_to_static(chip.cell_index()))
+        merge_layout_layers_on_face(layout, cells[hierarchical], face)
+    flat_gap, hierarchical_gap = (_region(cells[h], "1t1_base_metal_gap") for h in (False, True))
+    assert (flat_gap ^ hierarchical_gap).is_empty()
+    gap_layer = layout.layer(default_layers["1t1_base_metal_gap"])
+    assert cells[True].shapes(gap_layer).size() < cells[False].shapes(gap_layer).size() / 10
+
+
+def test_area_of_hierarchical_grid(small_chips):
+    _, chips = small_chips
+    layer_infos = [default_layers[f"1t1_{name}"] for name in ("ground_grid", "base_metal_gap_wo_grid")]
+    flat, hierarchical = (get_area_and_density(chips[h], layer_infos, density_map=True) for h in (False, True))
+    for layer_info in layer_infos:
+        assert flat[layer_info.name]["area"] == pytest.approx(hierarchical[layer_info.name]["area"])
+        assert flat[layer_info.name]["area_map"] == pytest.approx(hierarchical[layer_info.name]["area_map"])
+
+
+def _rss():
+    """Returns the resident set size of the current process in bytes"""
+    with open("/proc/self/statm", encoding="utf-8") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+def _export_demo_chip(path, hierarchical):
+    rss_before = _rss()
+    layout = pya.Layout()
+    chip = Demo.create(layout, with_grid=True, merge_base_metal_gap=True, hierarchical_grid=hierarchical)
+    layout.write(str(path))
+    shape_count = sum(chip.shapes(layer).size() for layer in layout.layer_indexes())
+    return _rss() - rss_before, shape_count
+
+
+@pytest.mark.slow
+@pytest.mark.skipif(not Path("/proc/self/statm").exists(), reason="Memory usage is read from /proc/self/statm")
+def test_hierarchical_grid_benchmark(tmp_path, caplog):
+    caplog.set_level(logging.INFO)
+    results = {}
+    for hierarchical in (False, True):
+        path = tmp_path / f"demo_{hierarchical}.oas"
+        # Each chip is built in a fresh process, so that the peak memory usage of the process can be compared
+        with ProcessPoolExecutor(1, mp_context=multiprocessing.get_context("spawn")) as executor:
+            rss, shape_count = executor.submit(_export_demo_chip, path, hierarchical).result()
+        results[hierarchical] = (rss, shape_count, path.stat().st_size)
+        logging.info(
+            f"Demo chip with hierarchical_grid={hierarchical}: RSS increase {rss / 2**20:.0f} MB, "
+            f"{shape_count} shapes in chip cell, .oas file size {path.stat().st_size / 1024:.0f} kB"
+        )
+    assert results[True][0] < results[False][0]
+    assert results[True][1] < results[False][1] / 10
+    assert results[True][2] < results[False][2]
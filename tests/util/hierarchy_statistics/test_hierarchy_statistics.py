@@ -0,0 +1,93 @@
+# This code is part of KQCircuits
+# Copyright (C) 2025 IQM Finland Oy
+#
+# This program is free software: you can redistribute it and/or modify it under the terms of the GNU General Public
+# License as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+# warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with this program. If not, see
+# https://www.gnu.org/licenses/gpl-3.0.html.
+#
+# The software distribution should follow IQM trademark policy for open-source software
+# (meetiqm.com/iqm-open-source-trademark-policy). IQM welcomes contributions to the code.
+# Please see our contribution agreements for individuals (meetiqm.com/iqm-individual-contributor-license-agreement)
+# and organizations (meetiqm.com/iqm-organization-contributor-license-agreement).
+
+import pytest
+
+from kqcircuits.elements.flip_chip_connectors.flip_chip_connector import FlipChipConnector
+from kqcircuits.elements.flip_chip_connectors.flip_chip_connector_dc import FlipChipConnectorDc
+from kqcircuits.elements.finger_capacitor_square import FingerCapacitorSquare
+from kqcircuits.pya_resolver import pya
+from kqcircuits.util.count_instances import count_instances_in_cell
+from kqcircuits.util.hierarchy_statistics import HierarchyStatistics, static_cell_class_name
+
+
+@pytest.fixture
+def layout_with_reused_cells():
+    """Layout where a bump cell is placed as an array in a reused cell::
+
+    top_cell
+    ├── 2 x group_cell
+    │   ├── 3 x 2 array of bump
+    │   └── capacitor
+    └── bump
+    """
+    layout = pya.Layout()
+    top_cell = layout.create_cell("top")
+    group_cell = layout.create_cell("group")
+    bump = FlipChipConnectorDc.create(layout)
+    capacitor = FingerCapacitorSquare.create(layout)
+    group_cell.insert(
+        pya.DCellInstArray(bump.cell_index(), pya.DTrans(), pya.DVector(200, 0), pya.DVector(0, 200), 3, 2)
+    )
+    group_cell.insert(pya.DCellInstArray(capacitor.cell_index(), pya.DTrans(0, 1000)))
+    top_cell.insert(pya.DCellInstArray(group_cell.cell_index(), pya.DTrans()))
+    top_cell.insert(pya.DCellInstArray(group_cell.cell_index(), pya.DTrans(2000, 0)))
+    top_cell.insert(pya.DCellInstArray(bump.cell_index(), pya.DTrans(0, -1000)))
+    return layout, top_cell, group_cell
+
+
+def test_counts_array_members_of_reused_cells(layout_with_reused_cells):
+    _, top_cell, group_cell = layout_with_reused_cells
+    stats = HierarchyStatistics(top_cell)
+    assert stats.count_instances(top_cell, FlipChipConnectorDc) == 2 * 6 + 1
+    assert stats.count_instances(group_cell, FlipChipConnectorDc) == 6
+    assert stats.count_instances(top_cell, FingerCapacitorSquare) == 2
+
+
+def test_counts_derived_pcell_classes(layout_with_reused_cells):
+    _, top_cell, _ = layout_with_reused_cells
+    stats = HierarchyStatistics(top_cell)
+    assert stats.count_instances(top_cell, FlipChipConnector) == 13
+    assert stats.pcell_counts(top_cell) == {FlipChipConnectorDc: 13, FingerCapacitorSquare: 2}
+
+
+def test_count_instances_in_cell_uses_statistics(layout_with_reused_cells):
+    _, top_cell, group_cell = layout_with_reused_cells
+    assert count_instances_in_cell(top_cell, FlipChipConnectorDc) == 13
+    assert count_instances_in_cell(group_cell, FingerCapacitorSquare) == 1
+
+
+def test_contains_cell_class_of_static_cells():
+    layout = pya.Layout()
+    top_cell = layout.create_cell("top")
+    qubit_cell = layout.create_cell("qubit")
+    junction_cell = layout.create_cell("Manhattan$3")
+    other_cell = layout.create_cell("other")
+    qubit_cell.insert(pya.DCellInstArray(junction_cell.cell_index(), pya.DTrans()))
+    top_cell.insert(pya.DCellInstArray(qubit_cell.cell_index(), pya.DTrans()))
+    top_cell.insert(pya.DCellInstArray(other_cell.cell_index(), pya.DTrans()))
+
+    stats = HierarchyStatistics(top_cell)
+    assert stats.contains_cell_class(top_cell, ["Manhattan", "Sim"])
+    assert stats.contains_cell_class(qubit_cell.cell_index(), ["Manhattan"])
+    assert not stats.contains_cell_class(other_cell, ["Manhattan"])
+
+
+def test_static_cell_class_name():
+    assert static_cell_class_name("Manhattan$12") == "Manhattan"
+    assert static_cell_class_name("Manhattan*Single*Junction") == "Manhattan Single Junction"
@@ -74,3 +74,24 @@ def test_cell_instance_hierarchy(
     assert result.instance.property("id") == expected_instance_name
     assert [inst.property("id") for inst in result.parent_instances] == expected_parent_instance_names
     assert result.top_cell.name == expected_top_cell_name
+
+
+def test_cell_instance_hierarchy_of_reused_cell(layout_with_cell_hierarchy):
+    layout, cells = layout_with_cell_hierarchy
+
+    # Place the same cell twice into top cell and once into cell_2, which is itself placed once
+    target_cell = FlipChipConnectorDc.create(layout)
+    insert_cell_into(cells[0], target_cell, trans=pya.DTrans(10.0, 0.0), inst_name="top_1")
+    insert_cell_into(cells[0], target_cell, trans=pya.DTrans(20.0, 0.0), inst_name="top_2")
+    insert_cell_into(cells[2], target_cell, trans=pya.DTrans(30.0, 0.0), inst_name="nested")
+
+    result = get_cell_instance_hierarchy(layout, target_cell.cell_index())
+
+    found = {
+        (r.instance.property("id"), tuple(i.property("id") for i in r.parent_instances), r.trans.disp.x) for r in result
+    }
+    assert found == {
+        ("top_1", (), 10.0),
+        ("top_2", (), 20.0),
+        ("nested", ("cell_2_instance", "cell_1_instance"), 200.0 + 50.0 + 30.0),
+    }
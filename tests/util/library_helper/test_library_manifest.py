@@ -0,0 +1,142 @@
+# This code is part of KQCircuits
+# Copyright (C) 2021 IQM Finland Oy
+#
+# This program is free software: you can redistribute it and/or modify it under the terms of the GNU General Public
+# License as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+# warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with this program. If not, see
+# https://www.gnu.org/licenses/gpl-3.0.html.
+#
+# The software distribution should follow IQM trademark policy for open-source software
+# (meetiqm.com/iqm-open-source-trademark-policy). IQM welcomes contributions to the code.
+# Please see our contribution agreements for individuals (meetiqm.com/iqm-individual-contributor-license-agreement)
+# and organizations (meetiqm.com/iqm-organization-contributor-license-agreement).
+
+import sys
+
+import pytest
+
+from kqcircuits import defaults
+from kqcircuits.elements.flip_chip_connectors.flip_chip_connector_dc import FlipChipConnectorDc
+from kqcircuits.pya_resolver import pya
+from kqcircuits.util import library_helper
+from kqcircuits.util.library_helper import delete_all_libraries, get_pcell_declaration, load_libraries
+from kqcircuits.util.load_save_layout import load_layout, save_layout
+
+PCELL_SOURCE = """
+from kqcircuits.pya_resolver import pya
+
+
+class ManifestTestCell(pya.PCellDeclarationHelper):
+    LIBRARY_NAME = "Manifest Test Library"
+    LIBRARY_DESCRIPTION = "Library for manifest tests"
+    LIBRARY_PATH = "manifest_lib"
+"""
+
+
+@pytest.fixture
+def manifest_src(tmp_path, monkeypatch):
+    """Temporary source package with a single PCell module and a separate TMP_PATH for the manifest."""
+    src = tmp_path / "manifest_test_pkg"
+    (src / "manifest_lib").mkdir(parents=True)
+    (src / "__init__.py").write_text("")
+    (src / "manifest_lib" / "__init__.py").write_text("")
+    (src / "manifest_lib" / "manifest_test_cell.py").write_text(PCELL_SOURCE)
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.setattr(library_helper, "SRC_PATHS", [src])
+    monkeypatch.setattr(defaults, "TMP_PATH", tmp_path / "tmp")
+    (tmp_path / "tmp").mkdir()
+    yield src
+    for name in [m for m in sys.modules if m.startswith("manifest_test_pkg")]:
+        del sys.modules[name]
+
+
+@pytest.fixture
+def lazy_libraries(tmp_path, monkeypatch):
+    """Deletes the KQCircuits libraries for a lazy load test and restores them afterwards."""
+    monkeypatch.setattr(defaults, "TMP_PATH", tmp_path)
+    delete_all_libraries()
+    yield
+    delete_all_libraries()
+    load_libraries()
+
+
+@pytest.fixture
+def import_counter(monkeypatch):
+    calls = []
+    get_classes = library_helper._get_library_src_pcell_classes
+    monkeypatch.setattr(
+        library_helper,
+        "_get_library_src_pcell_classes",
+        lambda *args, **kwargs: calls.append(args[1]) or get_classes(*args, **kwargs),
+    )
+    return calls
+
+
+@pytest.mark.usefixtures("manifest_src")
+def test_manifest_entries():
+    assert library_helper._get_library_manifest("manifest_lib") == [
+        {
+            "class": "ManifestTestCell",
+            "module": "manifest_test_pkg.manifest_lib.manifest_test_cell",
+            "library": "Manifest Test Library",
+            "library_path": "manifest_lib",
+            "description": "Library for manifest tests",
+        }
+    ]
+    assert (defaults.TMP_PATH / "pcell_library_manifest.json").exists()
+
+
+@pytest.mark.usefixtures("manifest_src")
+def test_manifest_is_reused(import_counter):
+    library_helper._get_library_manifest("manifest_lib")
+    library_helper._get_library_manifest("manifest_lib")
+    assert len(import_counter) == 1
+
+
+def test_manifest_is_rebuilt_when_file_changes(manifest_src, import_counter):
+    library_helper._get_library_manifest("manifest_lib")
+    (manifest_src / "manifest_lib" / "manifest_test_cell.py").write_text(PCELL_SOURCE + "\n# changed\n")
+    library_helper._get_library_manifest("manifest_lib")
+    (manifest_src / "manifest_lib" / "new_module.py").write_text("")
+    library_helper._get_library_manifest("manifest_lib")
+    assert len(import_counter) == 3
+
+
+@pytest.mark.usefixtures("lazy_libraries")
+def test_lazy_load_registers_pcells_on_demand():
+    library = load_libraries(path="elements", lazy=True)["Element Library"]
+    assert "Airbridge Rectangular" not in library.layout().pcell_names()
+    assert get_pcell_declaration("Element Library", "Airbridge Rectangular") is not None
+    assert library.layout().pcell_names() == ["Airbridge Rectangular"]
+    assert get_pcell_declaration("Element Library", "No Such Pcell") is None
+
+
+@pytest.mark.usefixtures("lazy_libraries")
+def test_eager_load_completes_lazy_load():
+    load_libraries(path="elements", lazy=True)
+    get_pcell_declaration("Element Library", "Airbridge Rectangular")
+    library = load_libraries(path="elements")["Element Library"]
+    manifest = library_helper._get_library_manifest("elements")
+    expected = {library_helper.to_library_name(e["class"]) for e in manifest if e["library"] == "Element Library"}
+    assert set(library.layout().pcell_names()) == expected
+
+
+@pytest.mark.usefixtures("lazy_libraries")
+def test_load_layout_restores_pcells_of_lazy_library(tmp_path):
+    load_libraries(path="elements", lazy=True)
+    layout = pya.Layout()
+    top = layout.create_cell("top")
+    top.insert(pya.DCellInstArray(FlipChipConnectorDc.create(layout).cell_index(), pya.DTrans()))
+    save_layout(tmp_path / "layout.oas", layout, write_context_info=True)
+
+    delete_all_libraries()
+    load_libraries(path="elements", lazy=True)
+    loaded = pya.Layout()
+    load_layout(tmp_path / "layout.oas", loaded)
+    pcell_cells = [c for c in loaded.each_cell() if c.is_library_cell() or c.is_pcell_variant()]
+    assert [c.pcell_declaration().name() for c in pcell_cells] == ["Flip Chip Connector Dc"]
@@ -0,0 +1,69 @@
+# This code is part of KQCircuits
+# Copyright (C) 2025 IQM Finland Oy
+#
+# This program is free software: you can redistribute it and/or modify it under the terms of the GNU General Public
+# License as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied
+# warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with this program. If not, see
+# https://www.gnu.org/licenses/gpl-3.0.html.
+#
+# The software distribution should follow IQM trademark policy for open-source software
+# (meetiqm.com/iqm-open-source-trademark-policy). IQM welcomes contributions to the code.
+# Please see our contribution agreements for individuals (meetiqm.com/iqm-individual-contributor-license-agreement)
+# and organizations (meetiqm.com/iqm-organization-contributor-license-agreement).
+
+import pytest
+
+from kqcircuits.chips.demo import Demo
+from kqcircuits.defaults import default_netlist_breakdown
+from kqcircuits.pya_resolver import pya
+from kqcircuits.util import netlist_extraction
+from kqcircuits.util.netlist_extraction import export_cell_netlist
+
+
+@pytest.fixture(scope="module")
+def demo_layout():
+    return pya.Layout()
+
+
+@pytest.fixture(scope="module")
+def demo_cells(demo_layout):
+    """Returns a static Demo chip cell and the corresponding PCell"""
+    cell = Demo.create(demo_layout)
+    static_cell = demo_layout.cell(demo_layout.convert_cell_to_static(cell.cell_index()))
+    return static_cell, cell
+
+
+def _read(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return f.read()
+
+
+def test_netlist_extracted_once(demo_cells, tmp_path, monkeypatch):
+    calls = []
+    extract = netlist_extraction._extract_cell_netlist
+    monkeypatch.setattr(netlist_extraction, "_extract_cell_netlist", lambda cell: calls.append(cell) or extract(cell))
+    static_cell, cell = demo_cells
+    export_cell_netlist(static_cell, tmp_path / "demo.json", cell, {"a": [], "b": ["Meander"]})
+    assert len(calls) == 1
+    assert {p.name for p in tmp_path.iterdir()} == {"demo.json", "demo_a.json", "demo_b.json"}
+
+
+def test_alt_netlist_with_default_breakdown_equals_default_netlist(demo_cells, tmp_path):
+    static_cell, cell = demo_cells
+    export_cell_netlist(static_cell, tmp_path / "demo.json", cell, {"default": default_netlist_breakdown})
+    assert _read(tmp_path / "demo_default.json") == _read(tmp_path / "demo.json")
+
+
+def test_alt_netlists_do_not_affect_each_other(demo_cells, tmp_path):
+    static_cell, cell = demo_cells
+    alt_netlists = {"a": ["Meander"], "b": [], "c": ["Meander", "Airbridge", "Launcher"]}
+    export_cell_netlist(static_cell, tmp_path / "all.json", cell, alt_netlists)
+    for tag, breakdown in alt_netlists.items():
+        export_cell_netlist(static_cell, tmp_path / f"{tag}.json", cell, {tag: breakdown})
+        assert _read(tmp_path / f"all_{tag}.json") == _read(tmp_path / f"{tag}_{tag}.json")
+        assert _read(tmp_path / "all.json") == _read(tmp_path / f"{tag}.json")